@@ -1,4 +1,5 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 from django.conf.global_settings import MEDIA_URL, MEDIA_ROOT
@@ -30,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -38,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store_app.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,17 +52,49 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'Ecosystem_Alfa_TC.urls'
 
+# Метрики запросов: заголовок Server-Timing и реакция на превышение query_budget вьюхи
+# ("warn" — предупреждение в лог, "raise" — исключение, для CI). Server-Timing
+# раскрывает внутренние тайминги, поэтому по умолчанию включен только при DEBUG
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', os.getenv('DEBUG', 'False')) == 'True'
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'warn')
+
+# Режим производительности админки для больших таблиц: число страниц по оценке
+# pg_class.reltuples (от ESTIMATED_COUNT_THRESHOLD строк) без полного COUNT(*); включается явно
+ADMIN_PERFORMANCE_MODE = os.getenv('ADMIN_PERFORMANCE_MODE', 'False') == 'True'
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', 10000))
+# Пагинация API: выборки от ESTIMATED_COUNT_THRESHOLD строк считаются по оценке
+# планировщика (EXPLAIN), точные COUNT кешируются по комбинации фильтров на столько секунд
+COUNT_CACHE_TIMEOUT = int(os.getenv('COUNT_CACHE_TIMEOUT', 30))
+
+# Денормализованный список продуктов (ProductListing): ProductsView читает одну таблицу
+# без JOIN, сигналы поддерживают строки; перед включением — manage.py refresh_product_listing
+PRODUCT_LISTING_ENABLED = os.getenv('PRODUCT_LISTING_ENABLED', 'False') == 'True'
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'store_app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'store_app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# MessagePack подключается, только если установлен msgpack
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'store_app.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('store_app.renderers.MessagePackParser')
+
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Shop API',
@@ -86,6 +121,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Ecosystem_Alfa_TC.wsgi.application'
+ASGI_APPLICATION = 'Ecosystem_Alfa_TC.asgi.application'
+
+# ASGI-профиль: список продуктов, категории и корзина обслуживаются async-вьюхами
+# (store_app.async_urls); запуск: uvicorn Ecosystem_Alfa_TC.asgi:application
+ASYNC_API_VIEWS = os.getenv('ASYNC_API_VIEWS', 'False') == 'True'
 
 
 # Database
@@ -97,10 +137,100 @@ DATABASES = {
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Постоянные соединения: одно на поток, переиспользуется между запросами
+        # и проверяется перед повторным использованием после разрыва
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Пул соединений psycopg 3 (DB_POOL=True) — для ASGI и многопоточных воркеров,
+# где постоянные соединения на поток не переиспользуются. Несовместим
+# с CONN_MAX_AGE, поэтому постоянные соединения при этом отключаются;
+# CONN_HEALTH_CHECKS включает проверку соединения при выдаче из пула.
+if os.getenv('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            # Ожидание свободного соединения, с
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            # Закрытие простаивающих соединений сверх min_size и ротация старых, с
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 600)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+        },
+    }
+
+# Реплики для чтения каталога: DB_REPLICA_HOSTS=host1,host2 (та же БД и учетные данные).
+# Чтения категорий и продуктов распределяются по репликам (round_robin или least_lag),
+# корзины, авторизация и все записи остаются на default
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['store_app.db_router.ReplicaRouter']
+    MIDDLEWARE.append('store_app.db_router.ReplicaPinningMiddleware')
+
+REPLICA_SELECTION = os.getenv('DB_REPLICA_SELECTION', 'round_robin')
+REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+
+# Локальный кеш процесса по умолчанию; при заданном REDIS_URL — общий Redis,
+# чтобы инвалидация дерева категорий была видна всем воркерам.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'store-app',
+        }
+    }
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+
+
+# Кеш снимков продуктов (name, price, изображения) в памяти процесса
+PRODUCT_CACHE_SIZE = int(os.getenv('PRODUCT_CACHE_SIZE', 10000))
+PRODUCT_CACHE_TTL = int(os.getenv('PRODUCT_CACHE_TTL', 60))
+
+# Кеш аутентификации по токену: LRU снимков пользователей в памяти процесса,
+# при заданном REDIS_URL — дополнительно общий кеш default, через который сброс
+# доходит до всех воркеров. Без него сброс виден только текущему процессу,
+# поэтому ttl по умолчанию короткий
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 60 if os.getenv('REDIS_URL') else 5))
+TOKEN_CACHE_ALIAS = 'default' if os.getenv('REDIS_URL') else None
+
+
+# Cart storage
+
+# По умолчанию корзины хранятся в PostgreSQL (ORMCartStorage).
+# KeyValueCartStorage держит их в Redis (OPTIONS.url) или, без url, в памяти процесса
+# (LocalKeyValueClient: только для разработки с одним процессом, корзины не общие для воркеров).
+CART_STORAGE = {
+    'BACKEND': os.getenv('CART_STORAGE_BACKEND', 'store_app.cart_storage.ORMCartStorage'),
+    'OPTIONS': {},
+}
+if CART_STORAGE['BACKEND'].endswith('KeyValueCartStorage'):
+    CART_STORAGE['OPTIONS'] = {
+        'url': os.getenv('CART_REDIS_URL', os.getenv('REDIS_URL')),
+        'ttl': int(os.getenv('CART_TTL', 7 * 24 * 60 * 60)),
+    }
+
 
 # Password validation
 
@@ -136,4 +266,15 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Раздача медиа: "sendfile" (FileResponse, os.sendfile через wsgi.file_wrapper),
+# "x-accel" (nginx по X-Accel-Redirect) или "off"
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'sendfile')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60))
+
+# Генерация вариантов изображений (размеры x JPEG/WebP/AVIF) в пуле воркеров
+IMAGE_PIPELINE_ENABLED = True
+IMAGE_PIPELINE_WORKERS = int(os.getenv('IMAGE_PIPELINE_WORKERS', 2))
+IMAGE_VARIANT_SIZES = {'small': 200, 'medium': 600, 'large': 1200}
\ No newline at end of file
@@ -1,14 +1,21 @@
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from Ecosystem_Alfa_TC import settings
+from store_app.media import serve_media
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/v1/', include('store_app.urls')),
+    path('api/v1/', include('store_app.async_urls' if settings.ASYNC_API_VIEWS else 'store_app.urls')),
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui')
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+# Медиа отдается через serve_media (X-Accel-Redirect или sendfile с кеширующими заголовками);
+# MEDIA_SERVE_MODE = "off", если медиа целиком раздает фронтовой прокси
+if settings.MEDIA_SERVE_MODE != 'off':
+    urlpatterns.append(
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media')
+    )
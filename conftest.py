@@ -0,0 +1 @@
+pytest_plugins = ["store_app.pytest_query_guard"]
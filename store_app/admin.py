@@ -1,14 +1,74 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
 
+from .counts import EstimatedCountPaginator
+from .filters import PRICE_BUCKETS, get_price_bucket_labels
 from .models import Category, SubCategory, Product, Cart, CartProduct
 
 
+class PriceRangeFilter(admin.SimpleListFilter):
+    """ Фильтр по ценовым диапазонам (как фасеты API) вместо списка всех различных цен """
+    title = "цена"
+    parameter_name = "price_range"
+
+    def lookups(self, request, model_admin):
+        return list(enumerate(get_price_bucket_labels()))
+
+    def queryset(self, request, queryset):
+        if self.value() is None or not self.value().isdigit() or int(self.value()) >= len(PRICE_BUCKETS):
+            return queryset
+        index = int(self.value())
+        queryset = queryset.filter(price__gte=PRICE_BUCKETS[index])
+        if index + 1 < len(PRICE_BUCKETS):
+            queryset = queryset.filter(price__lt=PRICE_BUCKETS[index + 1])
+        return queryset
+
+
+class CategorySlugFilter(admin.SimpleListFilter):
+    """ Фильтр по slug категории: варианты берутся из маленькой таблицы категорий, а не DISTINCT по записям """
+    title = "категория"
+    parameter_name = "category"
+    field_path = "category__slug"
+
+    def lookups(self, request, model_admin):
+        return Category.objects.order_by("name").values_list("slug", "name")
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field_path: self.value()})
+        return queryset
+
+
+class ProductCategorySlugFilter(CategorySlugFilter):
+    field_path = "subcategory__category__slug"
+
+
+class PerformanceModeAdmin(admin.ModelAdmin):
+    """
+    Режим производительности для больших таблиц (ADMIN_PERFORMANCE_MODE).
+
+    Число страниц больших выборок строится по оценке планировщика
+    (pg_class.reltuples, EXPLAIN), а полный COUNT(*) всей таблицы рядом
+    с результатами фильтрации не выполняется.
+    """
+
+    @property
+    def show_full_result_count(self):
+        return not getattr(settings, "ADMIN_PERFORMANCE_MODE", False)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator_class = EstimatedCountPaginator if getattr(settings, "ADMIN_PERFORMANCE_MODE", False) else Paginator
+        return paginator_class(queryset, per_page, orphans, allow_empty_first_page)
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """ Админ-панель для категорий """
     prepopulated_fields = {"slug": ["name"]}
     list_display = ["name", "slug", "image"]
     list_filter = ["name"]
+    readonly_fields = ["image_variants"]
 
 
 @admin.register(SubCategory)
@@ -16,24 +76,45 @@ class SubCategoryAdmin(admin.ModelAdmin):
     """ Админ-панель для подкатегорий """
     prepopulated_fields = {"slug": ["name"]}
     list_display = ["name", "slug", "image"]
-    list_filter = ["name"]
+    list_filter = [CategorySlugFilter]
+    search_fields = ["name", "=slug"]
+    ordering = ["name"]
+    readonly_fields = ["image_variants"]
+
+    def get_queryset(self, request):
+        # __str__ подкатегории (чекбокс действий, результаты автодополнения) читает category.name
+        return super().get_queryset(request).select_related("category")
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(PerformanceModeAdmin):
     """ Админ-панель для продуктов """
     prepopulated_fields = {"slug": ["name"]}
     list_display = ["name", "slug", "price", "image_small", "image_medium", "image_large"]
-    list_filter = ["name", "price"]
+    list_filter = [PriceRangeFilter, ProductCategorySlugFilter]
+    # Точный slug попадает в уникальный индекс, название — поиск по префиксу
+    search_fields = ["=slug", "^name"]
+    autocomplete_fields = ["subcategory"]
+    readonly_fields = ["image_variants"]
 
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(PerformanceModeAdmin):
     """ Админ-панель для корзин """
     list_display = ["user_id", "created_at"]
+    search_fields = ["^user__username"]
+    autocomplete_fields = ["user"]
+    ordering = ["-id"]
+
+    def get_queryset(self, request):
+        # Колонка user_id и __str__ корзины (результаты автодополнения) выводят str(user)
+        return super().get_queryset(request).select_related("user")
 
 
 @admin.register(CartProduct)
-class ProductCartAdmin(admin.ModelAdmin):
+class ProductCartAdmin(PerformanceModeAdmin):
     """ Админ-панель для продуктов в корзине """
     list_display = ["product__name", "cart", "quantity"]
+    # __str__ корзины читает user; без явного списка Django делает select_related() по всем связям
+    list_select_related = ["product", "cart__user"]
+    autocomplete_fields = ["cart", "product"]
@@ -0,0 +1,18 @@
+from django.urls import path
+
+from .async_views import AsyncCartView, AsyncCategoriesView, AsyncProductsView
+from .urls import urlpatterns as sync_urlpatterns
+
+# ASGI-профиль (ASYNC_API_VIEWS=True): каталог и корзина обслуживаются async-вьюхами,
+# остальные маршруты и имена совпадают с store_app.urls
+async_views = {
+    "categories": AsyncCategoriesView,
+    "products": AsyncProductsView,
+    "cart": AsyncCartView,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), async_views[pattern.name].as_view(), name=pattern.name)
+    if pattern.name in async_views else pattern
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,283 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import (
+    AuthenticationFailed, NotAcceptable, NotAuthenticated, NotFound, ParseError, UnsupportedMediaType,
+)
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import aget_catalog_version, get_catalog_cache, get_categories_cache_key
+from .cart_storage import get_cart_storage
+from .counts import CachedCountPaginator
+from .fast_serializers import CategoryTreeFastSerializer, ProductFastSerializer, ProductListingFastSerializer
+from .filters import filter_products, get_product_facets
+from .instrumentation import mark_handler_start, timed
+from .listing import is_listing_enabled
+from .models import Category, Product, ProductListing
+from .pagination import CategoryPagination, ProductCursorPagination, ProductPagination
+from .product_cache import attach_product_snapshots
+from .serializers import AddToCartSerializer, CartProductSerializer, ProductFilterSerializer
+from .token_cache import build_user, make_user_snapshot, token_cache
+from .views import CartView, CategoriesView, ProductsView
+
+
+def get_renderers() -> list:
+    """ Рендереры DRF-вьюх (orjson, MessagePack) без браузерного API: ему нужен контекст DRF-ответа """
+    return [renderer_class() for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES if renderer_class.format != "api"]
+
+
+async def apaginate(request, queryset, page_size: int) -> dict:
+    """
+    Асинхронный аналог EstimatedCountPagination: число строк (оценка или
+    кешированный COUNT) считается тем же пагинатором через acount(), страница
+    выбирается через async ORM; формат ответа совпадает (count, count_is_estimated, next, previous, results).
+    """
+    paginator = CachedCountPaginator(queryset, page_size)
+    count = await paginator.acount()
+    page = request.GET.get("page", 1)
+    try:
+        # count уже вычислен: validate_number не обращается к БД
+        number = paginator.validate_number(
+            paginator.num_pages if page in PageNumberPagination.last_page_strings else page
+        )
+    except InvalidPage:
+        raise NotFound(PageNumberPagination.invalid_page_message)
+
+    # Лишняя строка показывает, есть ли следующая страница, и при оценочном count
+    offset = (number - 1) * page_size
+    rows = [row async for row in queryset[offset:offset + page_size + 1]]
+    if not rows and number > 1:
+        raise NotFound(PageNumberPagination.invalid_page_message)
+    results = rows[:page_size]
+
+    url = request.build_absolute_uri()
+    previous = None
+    if number == 2:
+        previous = remove_query_param(url, "page")
+    elif number > 2:
+        previous = replace_query_param(url, "page", number - 1)
+    return {
+        "count": count,
+        "count_is_estimated": paginator.count_is_estimated,
+        "next": replace_query_param(url, "page", number + 1) if len(rows) > page_size else None,
+        "previous": previous,
+        "results": results,
+    }
+
+
+async def aauthenticate(request):
+    """ Аутентификация по заголовку Authorization: Token <key>, как CachedTokenAuthentication """
+    auth = request.headers.get("Authorization", "").split()
+    if not auth or auth[0].lower() != "token":
+        raise NotAuthenticated()
+    if len(auth) != 2:
+        raise AuthenticationFailed()
+
+    snapshot = await token_cache.aget(auth[1])
+    if snapshot is not None:
+        return build_user(snapshot)
+
+    token = await Token.objects.select_related("user").filter(key=auth[1]).afirst()
+    if token is None or not token.user.is_active:
+        raise AuthenticationFailed()
+    await token_cache.aset(token.key, make_user_snapshot(token.user))
+    return token.user
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAPIView(View):
+    """
+    Базовая асинхронная вьюха для ASGI-профиля.
+
+    DRF-вьюхи синхронные, поэтому здесь повторяется только то, что нужно
+    каталогу и корзине: аутентификация по токену, выбор рендерера и парсера
+    по Accept/Content-Type (JSON, MessagePack), ошибки в формате {"detail": ...}
+    и метрики запроса с бюджетом query_budget, как у InstrumentedViewMixin.
+    """
+    authentication_required = False
+    query_budget = {}
+    content_negotiation = DefaultContentNegotiation()
+
+    async def dispatch(self, request, *args, **kwargs):
+        renderers = get_renderers()
+        try:
+            self.renderer, self.accepted_media_type = self.content_negotiation.select_renderer(
+                Request(request), renderers
+            )
+        except NotAcceptable as exc:
+            self.renderer, self.accepted_media_type = renderers[0], renderers[0].media_type
+            return self.render({"detail": exc.detail}, exc.status_code)
+
+        try:
+            if self.authentication_required:
+                request.user = await aauthenticate(request)
+            mark_handler_start()
+            return await super().dispatch(request, *args, **kwargs)
+        except (NotAuthenticated, AuthenticationFailed, NotFound) as exc:
+            response = self.render({"detail": exc.detail}, exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response["WWW-Authenticate"] = "Token"
+            return response
+
+    def render(self, data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+        """ Ответ рендерером, выбранным по заголовку Accept """
+        with timed("render"):
+            content = self.renderer.render(data, self.accepted_media_type)
+        response = HttpResponse(content, status=status_code, content_type=self.renderer.media_type)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def parse(self, request) -> dict | None:
+        """ Тело запроса парсерами DRF по Content-Type; None — тело не разобрано """
+        parsers = [parser_class() for parser_class in api_settings.DEFAULT_PARSER_CLASSES]
+        try:
+            data = Request(request, parsers=parsers).data
+        except (ParseError, UnsupportedMediaType):
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class AsyncCategoriesView(AsyncAPIView):
+    """ Асинхронный список категорий с подкатегориями (кеш и ETag как у CategoriesView) """
+    query_budget = CategoriesView.query_budget
+
+    async def get(self, request):
+        version = await aget_catalog_version()
+        etag = quote_etag(f"categories-{version}")
+        last_modified = version // 1000
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = get_catalog_cache()
+        cache_key = get_categories_cache_key(version, request.build_absolute_uri())
+        data = await cache.aget(cache_key)
+        if data is None:
+            serializer = CategoryTreeFastSerializer(request)
+            data = await apaginate(request, serializer.prepare(Category.objects.all()), CategoryPagination.page_size)
+            subcategory_rows = [
+                row async for row in serializer.get_subcategory_rows(row.id for row in data["results"])
+            ]
+            with timed("serialize"):
+                data["results"] = serializer.build(data["results"], subcategory_rows)
+            await cache.aset(cache_key, data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+
+        response = self.render(data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class AsyncProductsView(AsyncAPIView):
+    """ Асинхронный список продуктов с фильтрами, фасетами и обоими режимами пагинации """
+    query_budget = ProductsView.query_budget
+
+    async def get(self, request):
+        filters_serializer = ProductFilterSerializer(data=request.GET)
+        if not filters_serializer.is_valid():
+            return self.render(filters_serializer.errors, status.HTTP_400_BAD_REQUEST)
+        filters = filters_serializer.validated_data
+
+        if is_listing_enabled():
+            queryset = filter_products(ProductListing.objects.all(), filters)
+            serializer = ProductListingFastSerializer(request)
+        else:
+            queryset = filter_products(Product.objects.select_related("subcategory__category"), filters)
+            serializer = ProductFastSerializer(request)
+
+        if request.GET.get("pagination") == "cursor" or "cursor" in request.GET:
+            paginator = ProductCursorPagination()
+            paginator.base_url = request.build_absolute_uri()
+            position = paginator.decode_cursor(Request(request))
+            rows = [row async for row in paginator.get_page_queryset(serializer.prepare(queryset), position)]
+            with timed("serialize"):
+                results = serializer.serialize(paginator.set_page(rows, position))
+            data = {
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": results,
+            }
+        else:
+            data = await apaginate(request, serializer.prepare(queryset), ProductPagination.page_size)
+            with timed("serialize"):
+                data["results"] = serializer.serialize(data["results"])
+
+        if filters["facets"]:
+            data["facets"] = await sync_to_async(get_product_facets)(queryset)
+        return self.render(data)
+
+
+class AsyncCartView(AsyncAPIView):
+    """ Асинхронные операции с корзиной поверх async-методов хранилища корзин """
+    authentication_required = True
+    query_budget = CartView.query_budget
+
+    async def get(self, request):
+        storage = get_cart_storage()
+        lines = await storage.aget_lines(request.user)
+        summary = await storage.aget_summary(request.user)
+        return self.render(CartView.build_cart_summary(lines, summary))
+
+    async def post(self, request):
+        serializer = AddToCartSerializer(data=self.parse(request))
+        # validate_product_id может догрузить снимок продукта из БД
+        if not await sync_to_async(serializer.is_valid)():
+            return self.render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        product_cart = await get_cart_storage().aadd(
+            request.user, serializer.validated_data["product_id"], serializer.validated_data["quantity"]
+        )
+        await sync_to_async(attach_product_snapshots)([product_cart])
+        return self.render(CartProductSerializer(product_cart).data, status.HTTP_201_CREATED)
+
+    async def put(self, request):
+        data = self.parse(request) or {}
+        try:
+            product_id, quantity = int(data["product_id"]), int(data["quantity"])
+        except (KeyError, TypeError, ValueError):
+            return self.render(
+                {"error": "product_id и quantity должны быть целыми числами"},
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        product_cart = await get_cart_storage().aset(request.user, product_id, quantity)
+        if product_cart is None:
+            return self.render({"error": "Продукт не найден в корзине"}, status.HTTP_404_NOT_FOUND)
+
+        await sync_to_async(attach_product_snapshots)([product_cart])
+        return self.render(CartProductSerializer(product_cart).data)
+
+    async def delete(self, request):
+        storage = get_cart_storage()
+
+        if request.GET.get("clear", False):
+            await storage.aclear(request.user)
+            return self.render({"detail": "Корзина очищена"})
+
+        product_id = request.GET.get("product_id")
+        if product_id is None:
+            return self.render(
+                {"error": "Не указан product_id или параметр clear"},
+                status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            product_id = int(product_id)
+        except ValueError:
+            return self.render({"error": "product_id должен быть целым числом"}, status.HTTP_400_BAD_REQUEST)
+
+        if await storage.aremove(request.user, product_id):
+            return self.render({"detail": f"Продукт с ID {product_id} уделен из корзины"})
+        return self.render({"error": "Продукт не найден в корзине"}, status.HTTP_404_NOT_FOUND)
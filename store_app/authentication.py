@@ -0,0 +1,23 @@
+from rest_framework.authentication import TokenAuthentication
+
+from .token_cache import build_user, make_user_snapshot, token_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кешем снимков пользователей по ключу токена.
+
+    При попадании в кеш запросы Token + User не выполняются; промах проверяется
+    стандартным путем (неизвестный токен и неактивный пользователь
+    не кешируются) и сохраняет снимок.
+    """
+
+    def authenticate_credentials(self, key):
+        snapshot = token_cache.get(key)
+        if snapshot is not None:
+            user = build_user(snapshot)
+            return user, self.get_model()(key=key, user=user)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, make_user_snapshot(user))
+        return user, token
@@ -0,0 +1,141 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from store_app.models import Category, Product
+
+
+def get_host() -> str:
+    """ Хост из ALLOWED_HOSTS, который примет тестовый клиент вне тестового раннера """
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+def get_bench_user():
+    User = get_user_model()
+    user = User.objects.filter(username__startswith="bench_user_").order_by("id").first()
+    if user is None:
+        user, _ = User.objects.get_or_create(username="bench_user_api")
+    return user
+
+
+def get_scenarios() -> dict:
+    """
+    Сценарии in-process бенчмарка: {имя: (метод, путь, тело, нужен ли токен)}.
+    Пути строятся по данным в базе, чтобы фильтры попадали в реальные slug.
+    """
+    category = Category.objects.order_by("id").first()
+    product = Product.objects.order_by("id").first()
+    scenarios = {
+        "categories": ("get", "/api/v1/categories/", None, False),
+        "products": ("get", "/api/v1/products/", None, False),
+        "products_page_10": ("get", "/api/v1/products/?page=10", None, False),
+        "products_cursor": ("get", "/api/v1/products/?pagination=cursor", None, False),
+        "products_search": ("get", "/api/v1/products/search/?q=молоко", None, False),
+        "cart": ("get", "/api/v1/cart/", None, True),
+    }
+    if category is not None:
+        scenarios["products_filtered"] = (
+            "get", f"/api/v1/products/?category={category.slug}&sort=price&facets=true", None, False
+        )
+    if product is not None:
+        scenarios["cart_add"] = ("post", "/api/v1/cart/", {"product_id": product.id, "quantity": 1}, True)
+    return scenarios
+
+
+def run_scenario(client, method, path, body, headers, runs: int) -> dict:
+    timings, queries, statuses = [], [], set()
+    for _ in range(runs):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            if body is None:
+                response = getattr(client, method)(path, headers=headers)
+            else:
+                response = getattr(client, method)(path, body, content_type="application/json", headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured.captured_queries))
+        statuses.add(response.status_code)
+
+    timings.sort()
+    return {
+        "runs": runs,
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)],
+        # Максимум, а не среднее: первый запрос с промахами кешей тоже считается
+        "queries": max(queries),
+        "status": sorted(statuses),
+    }
+
+
+def run_api_benchmark(runs: int = 100, warmup: int = 5, only=None) -> dict:
+    """ Прогоняет сценарии через тестовый клиент Django (полный стек без сети) """
+    user = get_bench_user()
+    token, _ = Token.objects.get_or_create(user=user)
+    client = Client()
+    host = get_host()
+
+    results = {}
+    for name, (method, path, body, auth) in get_scenarios().items():
+        if only and name not in only:
+            continue
+        headers = {"host": host, "accept": "application/json"}
+        if auth:
+            headers["authorization"] = f"Token {token.key}"
+        run_scenario(client, method, path, body, headers, warmup)
+        results[name] = run_scenario(client, method, path, body, headers, runs)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "products": Product.objects.count(),
+        },
+        "scenarios": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.2, min_delta_ms: float = 1.0) -> list[str]:
+    """
+    Сравнивает прогон с базовым и возвращает описания регрессий.
+
+    Регрессия — рост числа SQL-запросов или рост p50/p95 больше чем на
+    tolerance (доля), но не меньше min_delta_ms, чтобы шум на быстрых
+    эндпоинтах не ронял сравнение.
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(f"{name}: SQL-запросов {base['queries']} -> {result['queries']}")
+        for metric in ("p50_ms", "p95_ms"):
+            limit = base[metric] * (1 + tolerance)
+            if result[metric] > limit and result[metric] - base[metric] >= min_delta_ms:
+                regressions.append(f"{name}: {metric} {base[metric]:.2f} -> {result[metric]:.2f}")
+    return regressions
+
+
+def load_results(path) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_results(results: dict, path) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,79 @@
+"""
+Микробенчмарки сериализаторов и вьюх (pytest-benchmark).
+
+Не входят в обычный прогон тестов; запуск с сохранением результата в JSON
+и сравнением с последним сохраненным:
+pytest store_app/benchmarks/bench_serializers_views.py --benchmark-autosave
+pytest store_app/benchmarks/bench_serializers_views.py --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+import pytest
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from store_app.fast_serializers import CategoryTreeFastSerializer, ProductFastSerializer
+from store_app.models import CartProduct, Category, Product
+from store_app.product_cache import attach_product_snapshots
+from store_app.renderers import ORJSONRenderer
+from store_app.serializers import CartProductLineSerializer, CategoriesWithSubcategoriesSerializer, ProductSerializer
+
+pytest.importorskip("pytest_benchmark")
+
+PAGE = 30
+
+
+def product_page():
+    return Product.objects.select_related("subcategory__category").order_by("name", "price", "id")[:PAGE]
+
+
+@pytest.mark.django_db
+def test_product_serializer(benchmark, bench_data):
+    products = list(product_page())
+    benchmark(lambda: ProductSerializer(products, many=True).data)
+
+
+@pytest.mark.django_db
+def test_product_fast_serializer(benchmark, bench_data):
+    serializer = ProductFastSerializer()
+    rows = list(serializer.prepare(product_page()))
+    benchmark(serializer.serialize, rows)
+
+
+@pytest.mark.django_db
+def test_categories_serializer(benchmark, bench_data):
+    categories = list(Category.objects.prefetch_related("subcategories"))
+    benchmark(lambda: CategoriesWithSubcategoriesSerializer(categories, many=True).data)
+
+
+@pytest.mark.django_db
+def test_categories_fast_serializer(benchmark, bench_data):
+    serializer = CategoryTreeFastSerializer()
+    benchmark(lambda: serializer.serialize(serializer.prepare(Category.objects.all())))
+
+
+@pytest.mark.django_db
+def test_cart_line_serializer(benchmark, bench_data):
+    lines = attach_product_snapshots(list(CartProduct.objects.order_by("id")[:20]))
+    benchmark(lambda: CartProductLineSerializer(lines, many=True).data)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("renderer", [JSONRenderer(), ORJSONRenderer()], ids=["json", "orjson"])
+def test_render_product_page(benchmark, bench_data, renderer):
+    serializer = ProductFastSerializer()
+    data = {"results": serializer.serialize(serializer.prepare(product_page()))}
+    benchmark(renderer.render, data)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", [
+    "/api/v1/products/",
+    "/api/v1/products/?page=20",
+    "/api/v1/products/?pagination=cursor",
+    "/api/v1/products/?category=bench-category-1&sort=price&facets=true",
+    "/api/v1/products/search/?q=молоко",
+    "/api/v1/categories/",
+    "/api/v1/cart/",
+])
+def test_view(benchmark, bench_client, path):
+    response = benchmark(bench_client.get, path)
+    assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,23 @@
+import pytest
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from store_app.benchmarks.data import seed_store
+from store_app.models import Cart
+
+
+@pytest.fixture(scope="session")
+def bench_data(django_db_setup, django_db_blocker):
+    """Наполняет тестовую базу данными бенчмарка один раз на сессию"""
+    with django_db_blocker.unblock():
+        return seed_store(categories=5, subcategories=4, products=3000, users=10, lines_per_cart=10)
+
+
+@pytest.fixture
+def bench_client(db, bench_data):
+    """Клиент с токеном пользователя, у которого есть корзина"""
+    client = APIClient()
+    cart = Cart.objects.select_related("user").order_by("id").first()
+    token, _ = Token.objects.get_or_create(user=cart.user)
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
@@ -0,0 +1,9 @@
+# Без импортов Django: модуль используется и в locustfile, который запускается вне проекта
+
+WORDS = [
+    "молоко", "кефир", "сметана", "творог", "йогурт", "сыр", "масло", "ряженка",
+    "сосиски", "сардельки", "колбаса", "ветчина", "бекон", "фермерский", "деревенский",
+    "отборный", "классический", "нежный", "копченый", "вареный",
+]
+
+BENCH_PASSWORD = "bench-password"
@@ -0,0 +1,110 @@
+import random
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from store_app.benchmarks.constants import BENCH_PASSWORD, WORDS
+from store_app.cache import bump_catalog_version
+from store_app.listing import is_listing_enabled, refresh_product_listing
+from store_app.models import Cart, CartProduct, Category, Product, SubCategory
+from store_app.product_cache import product_cache
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def seed_store(
+    categories: int = 10,
+    subcategories: int = 5,
+    products: int = 10000,
+    users: int = 100,
+    lines_per_cart: int = 5,
+    seed: int = 0,
+    batch_size: int = 5000,
+    progress=None,
+) -> dict:
+    """
+    Детерминированно наполняет магазин данными для бенчмарков.
+
+    Создает categories категорий по subcategories подкатегорий, products
+    продуктов, users пользователей bench_user_N (пароль BENCH_PASSWORD)
+    с корзинами по lines_per_cart позиций. Повторный запуск с теми же
+    параметрами ничего не дублирует: объекты ищутся по slug и username.
+    Массовые вставки обходят сигналы, поэтому кеши каталога сбрасываются,
+    а список продуктов пересобирается явно.
+    """
+    rng = random.Random(seed)
+
+    subcategory_ids = []
+    for category_number in range(1, categories + 1):
+        category, _ = Category.objects.get_or_create(
+            slug=f"bench-category-{category_number}",
+            defaults={"name": f"Бенчмарк {category_number}", "image": "categories/test.jpg"},
+        )
+        for number in range(1, subcategories + 1):
+            subcategory, _ = SubCategory.objects.get_or_create(
+                slug=f"bench-subcategory-{category_number}-{number}",
+                defaults={
+                    "name": f"Бенчмарк {category_number}.{number}",
+                    "image": "subcategories/test.jpg",
+                    "category": category,
+                },
+            )
+            subcategory_ids.append(subcategory.id)
+
+    new_products = (
+        Product(
+            name=" ".join(rng.sample(WORDS, 3)) + f" {number}",
+            slug=f"bench-product-{number}",
+            price=Decimal(rng.randint(1000, 200000)) / 100,
+            subcategory_id=rng.choice(subcategory_ids),
+        )
+        for number in range(1, products + 1)
+    )
+    for done, batch in enumerate(batched(new_products, batch_size), start=1):
+        with transaction.atomic():
+            Product.objects.bulk_create(batch, ignore_conflicts=True)
+        if progress is not None:
+            progress(f"Продукты: {min(done * batch_size, products)}/{products}")
+
+    product_ids = list(
+        Product.objects.filter(slug__startswith="bench-product-").order_by("id").values_list("id", flat=True)
+    )
+
+    User = get_user_model()
+    password = make_password(BENCH_PASSWORD)
+    usernames = [f"bench_user_{number}" for number in range(1, users + 1)]
+    User.objects.bulk_create(
+        [User(username=username, password=password) for username in usernames],
+        ignore_conflicts=True,
+    )
+    user_ids = list(User.objects.filter(username__in=usernames).values_list("id", flat=True))
+
+    Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    cart_ids = list(Cart.objects.filter(user_id__in=user_ids).order_by("id").values_list("id", flat=True))
+    lines = (
+        CartProduct(cart_id=cart_id, product_id=product_id, quantity=rng.randint(1, 5))
+        for cart_id in cart_ids
+        for product_id in rng.sample(product_ids, min(lines_per_cart, len(product_ids)))
+    )
+    for batch in batched(lines, batch_size):
+        with transaction.atomic():
+            CartProduct.objects.bulk_create(batch, ignore_conflicts=True)
+
+    bump_catalog_version()
+    product_cache.clear()
+    if is_listing_enabled():
+        refresh_product_listing(batch_size)
+    return {
+        "categories": categories,
+        "subcategories": len(subcategory_ids),
+        "products": len(product_ids),
+        "users": len(user_ids),
+        "carts": len(cart_ids),
+    }
@@ -0,0 +1,67 @@
+"""
+Нагрузочный сценарий Locust для запущенного сервера.
+
+Смесь просмотра каталога, добавления в корзину и "оформления" (просмотр
+корзины и ее очистка — отдельного эндпоинта заказа в API нет). Пользователи
+берутся из генератора данных (manage.py seed_store, bench_user_N).
+Locust ставится отдельно (pip install locust); пример прогона с сохранением JSON:
+
+locust -f store_app/benchmarks/locustfile.py --host http://localhost:8000 \
+    --headless -u 500 -r 50 -t 2m --json > bench/locust.json
+"""
+import os
+import random
+
+from locust import HttpUser, between, task
+
+from store_app.benchmarks.constants import BENCH_PASSWORD, WORDS
+
+BENCH_USERS = int(os.getenv("BENCH_USERS", 100))
+
+
+class ShopUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        username = f"bench_user_{random.randint(1, BENCH_USERS)}"
+        response = self.client.post(
+            "/api/v1/auth-token/", {"username": username, "password": BENCH_PASSWORD}, name="auth-token"
+        )
+        self.headers = {"Authorization": f"Token {response.json()['token']}"}
+        self.product_ids = []
+        self.categories = []
+
+    @task(6)
+    def browse(self):
+        if not self.categories:
+            response = self.client.get("/api/v1/categories/", name="categories")
+            self.categories = [category["slug"] for category in response.json()["results"]]
+
+        if self.categories and random.random() < 0.5:
+            path = f"/api/v1/products/?category={random.choice(self.categories)}&sort=price"
+            name = "products?category"
+        else:
+            path, name = f"/api/v1/products/?page={random.randint(1, 20)}", "products?page"
+        response = self.client.get(path, name=name)
+        if response.ok:
+            self.product_ids = [product["id"] for product in response.json()["results"]]
+
+    @task(2)
+    def search(self):
+        self.client.get(f"/api/v1/products/search/?q={random.choice(WORDS)}", name="products/search")
+
+    @task(3)
+    def add_to_cart(self):
+        if not self.product_ids:
+            return
+        self.client.post(
+            "/api/v1/cart/",
+            json={"product_id": random.choice(self.product_ids), "quantity": random.randint(1, 3)},
+            headers=self.headers,
+            name="cart:add",
+        )
+
+    @task(1)
+    def checkout(self):
+        self.client.get("/api/v1/cart/", headers=self.headers, name="cart")
+        self.client.delete("/api/v1/cart/?clear=true", headers=self.headers, name="cart:clear")
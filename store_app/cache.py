@@ -0,0 +1,54 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def get_catalog_cache():
+    """ Возвращает кеш, в котором хранится сериализованное дерево категорий """
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def get_catalog_version() -> int:
+    """
+    Возвращает текущую версию каталога (время последнего изменения в мс).
+
+    Версия входит в ключи закешированных ответов, поэтому ее смена
+    инвалидирует их все разом без перебора ключей. Если версии в кеше нет
+    (первый запуск или вытеснение), она атомарно инициализируется текущим временем.
+    """
+    cache = get_catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+async def aget_catalog_version() -> int:
+    """ Асинхронный вариант get_catalog_version для ASGI-вьюх """
+    cache = get_catalog_cache()
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+def get_categories_cache_key(version: int, url: str) -> str:
+    """ Ключ закешированного ответа со списком категорий для версии каталога и URL запроса """
+    url_hash = md5(url.encode("utf-8")).hexdigest()
+    return f"catalog:categories:{version}:{url_hash}"
+
+
+def bump_catalog_version() -> int:
+    """ Сдвигает версию каталога после изменения категорий или подкатегорий """
+    cache = get_catalog_cache()
+    previous = cache.get(CATALOG_VERSION_KEY) or 0
+    version = max(int(time.time() * 1000), previous + 1)
+    cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    return version
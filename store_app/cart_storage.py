@@ -0,0 +1,495 @@
+import threading
+import time
+from decimal import Decimal
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Cart, CartProduct, Product
+from .product_cache import attach_product_snapshots
+
+
+OP_ADD = "add"
+OP_SET = "set"
+OP_REMOVE = "remove"
+
+
+class BaseCartStorage:
+    """
+    Интерфейс хранилища корзин.
+
+    Строки корзины возвращаются как экземпляры CartProduct (для key-value
+    хранилищ — несохраненные), поэтому сериализаторы корзины не зависят
+    от выбранного бэкенда.
+    """
+
+    def add(self, user, product_id: int, quantity: Decimal) -> CartProduct:
+        """ Добавляет quantity к позиции корзины """
+        raise NotImplementedError
+
+    def set(self, user, product_id: int, quantity: Decimal) -> CartProduct | None:
+        """ Устанавливает количество товара; None, если товара нет в корзине """
+        raise NotImplementedError
+
+    def remove(self, user, product_id: int) -> bool:
+        """ Удаляет товар из корзины; False, если его там не было """
+        raise NotImplementedError
+
+    def clear(self, user) -> None:
+        """ Очищает корзину """
+        raise NotImplementedError
+
+    def apply(self, user, operations: list[dict]) -> None:
+        """ Применяет пакет операций {product_id, quantity, op} """
+        raise NotImplementedError
+
+    def get_lines(self, user) -> list[CartProduct]:
+        """ Строки корзины с product_name, product_price и line_total из кеша снимков продуктов """
+        raise NotImplementedError
+
+    def get_summary(self, user) -> dict:
+        """ Итоги корзины: total_quantity и total_cost """
+        raise NotImplementedError
+
+    # Асинхронные варианты для ASGI-вьюх. По умолчанию выполняют синхронный метод
+    # в потоке через sync_to_async; бэкенды переопределяют их нативными вызовами.
+
+    async def aadd(self, user, product_id: int, quantity: Decimal) -> CartProduct:
+        return await sync_to_async(self.add)(user, product_id, quantity)
+
+    async def aset(self, user, product_id: int, quantity: Decimal) -> CartProduct | None:
+        return await sync_to_async(self.set)(user, product_id, quantity)
+
+    async def aremove(self, user, product_id: int) -> bool:
+        return await sync_to_async(self.remove)(user, product_id)
+
+    async def aclear(self, user) -> None:
+        await sync_to_async(self.clear)(user)
+
+    async def aget_lines(self, user) -> list[CartProduct]:
+        return await sync_to_async(self.get_lines)(user)
+
+    async def aget_summary(self, user) -> dict:
+        return await sync_to_async(self.get_summary)(user)
+
+    @staticmethod
+    def merge_operations(current: dict, operations: list[dict]) -> dict:
+        """ Сворачивает пакет операций в итоговое количество по товарам (None — удалить) """
+        quantities = dict(current)
+        for operation in operations:
+            product_id = operation["product_id"]
+            if operation["op"] == OP_REMOVE:
+                quantities[product_id] = None
+            elif operation["op"] == OP_SET:
+                quantities[product_id] = operation["quantity"]
+            else:
+                quantities[product_id] = (quantities.get(product_id) or 0) + operation["quantity"]
+        return quantities
+
+
+class ORMCartStorage(BaseCartStorage):
+    """ Хранилище корзин в таблицах Cart/CartProduct (по умолчанию) """
+
+    def add(self, user, product_id, quantity):
+        cart, created = Cart.objects.get_or_create(user=user)
+        return CartProduct.objects.add_quantity(cart, product_id, quantity)
+
+    def set(self, user, product_id, quantity):
+        try:
+            line = CartProduct.objects.get(cart__user=user, product_id=product_id)
+        except CartProduct.DoesNotExist:
+            return None
+        line.quantity = quantity
+        line.save(update_fields=["quantity"])
+        return line
+
+    def remove(self, user, product_id):
+        deleted, _ = CartProduct.objects.filter(cart__user=user, product_id=product_id).delete()
+        return bool(deleted)
+
+    def clear(self, user):
+        CartProduct.objects.filter(cart__user=user).delete()
+
+    def apply(self, user, operations):
+        product_ids = {operation["product_id"] for operation in operations}
+
+        with transaction.atomic():
+            cart, created = Cart.objects.get_or_create(user=user)
+            lines = {
+                line.product_id: line
+                for line in CartProduct.objects.select_for_update().filter(cart=cart, product_id__in=product_ids)
+            }
+            current = {product_id: line.quantity for product_id, line in lines.items()}
+            quantities = self.merge_operations(current, operations)
+            # Новые строки, полученные только из add, может параллельно вставить другой
+            # запрос: их количество прибавляется, а не записывается поверх
+            overwritten = {operation["product_id"] for operation in operations if operation["op"] != OP_ADD}
+
+            to_add, to_create, to_update, to_delete = {}, [], [], []
+            for product_id, quantity in quantities.items():
+                line = lines.get(product_id)
+                if line is None:
+                    if quantity is None:
+                        continue
+                    if product_id in overwritten:
+                        to_create.append(CartProduct(cart=cart, product_id=product_id, quantity=quantity))
+                    else:
+                        to_add[product_id] = quantity
+                elif quantity is None:
+                    to_delete.append(line.id)
+                elif quantity != line.quantity:
+                    line.quantity = quantity
+                    to_update.append(line)
+
+            if to_add:
+                CartProduct.objects.add_quantities(cart, to_add)
+            if to_create:
+                CartProduct.objects.bulk_create(
+                    to_create,
+                    update_conflicts=True,
+                    unique_fields=["cart", "product"],
+                    update_fields=["quantity"]
+                )
+            if to_update:
+                CartProduct.objects.bulk_update(to_update, ["quantity"])
+            if to_delete:
+                CartProduct.objects.filter(id__in=to_delete).delete()
+
+    def get_lines(self, user):
+        return attach_product_snapshots(list(CartProduct.objects.filter(cart__user=user).order_by("id")))
+
+    def get_summary(self, user):
+        # Итоги — одним агрегатом по текущим ценам в БД; снимки нужны только для строк
+        return CartProduct.objects.filter(cart__user=user).summary()
+
+    async def aadd(self, user, product_id, quantity):
+        cart, created = await Cart.objects.aget_or_create(user=user)
+        # INSERT ... ON CONFLICT выполняется через сырой курсор, у которого нет async-API
+        return await sync_to_async(CartProduct.objects.add_quantity)(cart, product_id, quantity)
+
+    async def aset(self, user, product_id, quantity):
+        try:
+            line = await CartProduct.objects.aget(cart__user=user, product_id=product_id)
+        except CartProduct.DoesNotExist:
+            return None
+        line.quantity = quantity
+        await line.asave(update_fields=["quantity"])
+        return line
+
+    async def aremove(self, user, product_id):
+        deleted, _ = await CartProduct.objects.filter(cart__user=user, product_id=product_id).adelete()
+        return bool(deleted)
+
+    async def aclear(self, user):
+        await CartProduct.objects.filter(cart__user=user).adelete()
+
+    async def aget_lines(self, user):
+        lines = [line async for line in CartProduct.objects.filter(cart__user=user).order_by("id")]
+        # Снимки продуктов обычно отдаются из памяти; промахи догружаются одним запросом
+        return await sync_to_async(attach_product_snapshots)(lines)
+
+    async def aget_summary(self, user):
+        return await CartProduct.objects.filter(cart__user=user).asummary()
+
+
+class LocalKeyValueClient:
+    """
+    Потокобезопасная in-process замена Redis для тестов и локальной разработки.
+
+    Реализует только команды, которые использует KeyValueCartStorage,
+    с той же семантикой (значения — строки, TTL в секундах). Данные живут
+    в памяти одного процесса: воркеры не видят корзины друг друга, а при
+    перезапуске теряется все, что еще не сохранено flush_carts, поэтому
+    в production нужен Redis (CART_REDIS_URL или REDIS_URL).
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            self._alive(key)
+            bucket = self._data.setdefault(key, {})
+            value = int(bucket.get(field, 0)) + amount
+            bucket[field] = str(value)
+            return value
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self._lock:
+            self._alive(key)
+            bucket = self._data.setdefault(key, {})
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            added = len(set(items) - set(bucket))
+            bucket.update({str(k): str(v) for k, v in items.items()})
+            return added
+
+    def hexists(self, key, field):
+        with self._lock:
+            return self._alive(key) and str(field) in self._data[key]
+
+    def hdel(self, key, *fields):
+        with self._lock:
+            if not self._alive(key):
+                return 0
+            bucket = self._data[key]
+            removed = sum(1 for field in fields if bucket.pop(str(field), None) is not None)
+            if not bucket:
+                self.delete(key)
+            return removed
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._data[key]) if self._alive(key) else {}
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                removed += int(self._alive(key))
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            self._alive(key)
+            bucket = self._data.setdefault(key, {})
+            added = len(set(map(str, mapping)) - set(bucket))
+            bucket.update({str(member): float(score) for member, score in mapping.items()})
+            return added
+
+    def zrem(self, key, *members):
+        with self._lock:
+            if not self._alive(key):
+                return 0
+            bucket = self._data[key]
+            return sum(1 for member in members if bucket.pop(str(member), None) is not None)
+
+    def zscore(self, key, member):
+        with self._lock:
+            return self._data[key].get(str(member)) if self._alive(key) else None
+
+    def zrangebyscore(self, key, min, max):
+        with self._lock:
+            if not self._alive(key):
+                return []
+            items = sorted(self._data[key].items(), key=lambda item: item[1])
+            low, high = float(min), float(max)
+            return [member for member, score in items if low <= score <= high]
+
+    def pipeline(self, transaction=True):
+        return LocalKeyValuePipeline(self)
+
+
+class LocalKeyValuePipeline:
+    """ Аналог MULTI/EXEC: команды копятся и выполняются под одной блокировкой клиента """
+
+    def __init__(self, client: LocalKeyValueClient):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return command
+
+    def execute(self):
+        with self.client._lock:
+            results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.commands = []
+
+
+class KeyValueCartStorage(BaseCartStorage):
+    """
+    Хранилище корзин в key-value хранилище (Redis или LocalKeyValueClient).
+
+    Клиент выбирается так: явно переданный client (тесты), иначе Redis по url
+    (пакет redis), иначе LocalKeyValueClient в памяти процесса.
+
+    Каждая корзина — hash "<prefix>:<user_id>" вида {product_id: количество
+    в сотых долях}, целочисленный HINCRBY делает добавление атомарным
+    без погрешностей float. Ключ продлевается на ttl при каждом изменении.
+
+    flush() переносит корзину в PostgreSQL (write-behind). Измененные корзины
+    попадают в индекс — sorted set "<prefix>:index" со сроком истечения
+    в качестве score; flush_expiring() сохраняет корзины, которые скоро
+    истекут, и убирает из индекса сохраненные и уже истекшие.
+    """
+    scale = 100
+
+    def __init__(self, client=None, url: str | None = None, ttl: int = 7 * 24 * 60 * 60, prefix: str = "cart"):
+        if client is None:
+            if url:
+                import redis
+
+                client = redis.Redis.from_url(url, decode_responses=True)
+            else:
+                client = LocalKeyValueClient()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.index_key = f"{prefix}:index"
+
+    def get_key(self, user_id) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def to_units(self, quantity) -> int:
+        return int(Decimal(quantity) * self.scale)
+
+    def from_units(self, units) -> Decimal:
+        return (Decimal(int(units)) / self.scale).quantize(Decimal("0.01"))
+
+    def touch(self, user_id, pipe=None) -> None:
+        """ Продлевает ключ корзины и отмечает ее в индексе несохраненных """
+        client = pipe if pipe is not None else self.client
+        client.expire(self.get_key(user_id), self.ttl)
+        client.zadd(self.index_key, {str(user_id): time.time() + self.ttl})
+
+    def read(self, user_id) -> dict:
+        """ Возвращает {product_id: quantity} корзины """
+        raw = self.client.hgetall(self.get_key(user_id))
+        return {int(product_id): self.from_units(units) for product_id, units in raw.items()}
+
+    @staticmethod
+    def make_line(product_id, quantity) -> CartProduct:
+        return CartProduct(product_id=product_id, quantity=quantity)
+
+    def add(self, user, product_id, quantity):
+        units = self.client.hincrby(self.get_key(user.pk), str(product_id), self.to_units(quantity))
+        self.touch(user.pk)
+        return self.make_line(product_id, self.from_units(units))
+
+    def set(self, user, product_id, quantity):
+        key = self.get_key(user.pk)
+        if not self.client.hexists(key, str(product_id)):
+            return None
+        self.client.hset(key, str(product_id), self.to_units(quantity))
+        self.touch(user.pk)
+        return self.make_line(product_id, Decimal(quantity))
+
+    def remove(self, user, product_id):
+        removed = bool(self.client.hdel(self.get_key(user.pk), str(product_id)))
+        if removed:
+            self.touch(user.pk)
+        return removed
+
+    def clear(self, user):
+        self.client.delete(self.get_key(user.pk))
+        self.touch(user.pk)
+
+    def apply(self, user, operations):
+        """
+        Выполняет операции по порядку в одной транзакции MULTI/EXEC (HDEL, HSET,
+        HINCRBY) без предварительного чтения корзины, поэтому параллельные
+        изменения не теряются.
+        """
+        key = self.get_key(user.pk)
+        with self.client.pipeline(transaction=True) as pipe:
+            for operation in operations:
+                field = str(operation["product_id"])
+                if operation["op"] == OP_REMOVE:
+                    pipe.hdel(key, field)
+                elif operation["op"] == OP_SET:
+                    pipe.hset(key, field, self.to_units(operation["quantity"]))
+                else:
+                    pipe.hincrby(key, field, self.to_units(operation["quantity"]))
+            self.touch(user.pk, pipe)
+            pipe.execute()
+
+    def get_lines(self, user):
+        quantities = self.read(user.pk)
+        return attach_product_snapshots([
+            self.make_line(product_id, quantity)
+            for product_id, quantity in sorted(quantities.items())
+        ])
+
+    def get_summary(self, user):
+        # Корзина живет вне БД: итоги считаются по строкам со снимками продуктов
+        lines = self.get_lines(user)
+        return {
+            "total_quantity": sum((line.quantity for line in lines), Decimal(0)),
+            "total_cost": sum((line.line_total for line in lines), Decimal(0)),
+        }
+
+    def flush(self, user_id) -> bool:
+        """
+        Переносит корзину пользователя в Cart/CartProduct (write-behind) и убирает
+        ее из индекса, если она не менялась во время сохранения. False — сохранять
+        нечего: корзина не менялась или истекла до сохранения.
+        """
+        marker = self.client.zscore(self.index_key, str(user_id))
+        if marker is None:
+            return False
+        quantities = self.read(user_id)
+        if not quantities and float(marker) <= time.time():
+            # Корзина истекла — в БД остается ее последняя сохраненная версия
+            self.client.zrem(self.index_key, str(user_id))
+            return False
+
+        existing = set(Product.objects.filter(id__in=list(quantities)).values_list("id", flat=True))
+        with transaction.atomic():
+            cart, created = Cart.objects.get_or_create(user_id=user_id)
+            CartProduct.objects.filter(cart=cart).delete()
+            CartProduct.objects.bulk_create([
+                CartProduct(cart=cart, product_id=product_id, quantity=quantity)
+                for product_id, quantity in quantities.items()
+                if product_id in existing
+            ])
+
+        if self.client.zscore(self.index_key, str(user_id)) == marker:
+            self.client.zrem(self.index_key, str(user_id))
+        return True
+
+    def flush_due(self, max_score) -> int:
+        user_ids = self.client.zrangebyscore(self.index_key, "-inf", max_score)
+        return sum(self.flush(int(user_id)) for user_id in user_ids)
+
+    def flush_expiring(self, within: int) -> int:
+        """
+        Сохраняет корзины, которые истекут в ближайшие within секунд; возвращает их число.
+
+        Запускается периодически (flush_carts --expiring-within) с интервалом
+        меньше within, чтобы брошенные корзины попадали в БД до истечения ключа.
+        """
+        return self.flush_due(time.time() + within)
+
+    def flush_all(self) -> int:
+        """ Переносит в БД все несохраненные корзины; возвращает их число """
+        return self.flush_due("+inf")
+
+
+@lru_cache(maxsize=None)
+def get_cart_storage() -> BaseCartStorage:
+    """ Возвращает хранилище корзин, заданное настройкой CART_STORAGE """
+    config = getattr(settings, "CART_STORAGE", {})
+    backend = import_string(config.get("BACKEND", "store_app.cart_storage.ORMCartStorage"))
+    return backend(**config.get("OPTIONS", {}))
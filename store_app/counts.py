@@ -0,0 +1,177 @@
+import json
+from hashlib import md5
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def get_table_estimate(model, using: str) -> int | None:
+    """
+    Оценка числа строк таблицы из статистики планировщика (pg_class.reltuples).
+
+    Чтение одной строки каталога вместо полного прохода COUNT(*); точность —
+    на момент последнего ANALYZE/autovacuum. None — не PostgreSQL или
+    таблица еще не анализировалась (reltuples = -1).
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row is not None and row[0] >= 0 else None
+
+
+def get_plan_estimate(queryset) -> int | None:
+    """ Оценка числа строк произвольного запроса: Plan Rows из EXPLAIN (без выполнения) """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(queryset) -> int | None:
+    """
+    Оценка числа строк запроса: для всей таблицы — reltuples, для выборки
+    с фильтрами — оценка планировщика. None — оценки нет (не PostgreSQL,
+    срез или объединение запросов).
+    """
+    query = queryset.query
+    if query.combinator or query.is_sliced:
+        return None
+    if not query.has_filters() and not query.distinct:
+        return get_table_estimate(queryset.model, queryset.db)
+    return get_plan_estimate(queryset)
+
+
+def get_count_cache_key(queryset) -> str:
+    """ Ключ точного числа строк для комбинации фильтров (по SQL запроса и параметрам) """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = md5(f"{queryset.db}:{sql}:{params!r}".encode("utf-8")).hexdigest()
+    return f"count:{digest}"
+
+
+class EstimatedPage(Page):
+    """ Страница с оценочным числом строк: наличие следующей определяется выбранной лишней строкой """
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is None:
+            return super().has_next()
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для больших выборок не выполняет COUNT(*).
+
+    Если оценка (reltuples или EXPLAIN) не меньше ESTIMATED_COUNT_THRESHOLD,
+    число страниц строится по ней и count_is_estimated = True; меньшие
+    выборки считаются точно. С cache_counts точное число кешируется
+    по комбинации фильтров на COUNT_CACHE_TIMEOUT секунд.
+
+    Оценка может быть меньше реального числа строк, поэтому при
+    count_is_estimated номера страниц за оценкой не отклоняются, а страница
+    выбирается с одной лишней строкой: по ней решается, есть ли следующая.
+    """
+    cache_counts = False
+    count_is_estimated = False
+
+    def validate_number(self, number):
+        # count вычисляется первым: он выставляет count_is_estimated
+        if not self.count or not self.count_is_estimated:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimated:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedPage(*args, **kwargs)
+
+    def is_large_estimate(self, estimate: int | None) -> bool:
+        """ Оценка не меньше ESTIMATED_COUNT_THRESHOLD заменяет точный COUNT(*) """
+        if estimate is not None and estimate >= getattr(settings, "ESTIMATED_COUNT_THRESHOLD", 10000):
+            self.count_is_estimated = True
+            return True
+        return False
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+
+        cache_key = get_count_cache_key(self.object_list) if self.cache_counts else None
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        estimate = estimate_count(self.object_list)
+        if self.is_large_estimate(estimate):
+            return estimate
+
+        count = super().count
+        if cache_key is not None:
+            cache.set(cache_key, count, getattr(settings, "COUNT_CACHE_TIMEOUT", 30))
+        return count
+
+    async def acount(self) -> int:
+        """
+        Асинхронный count для ASGI-вьюх: кеш и точный COUNT(*) — через async-API
+        кеша и ORM. Оценке планировщика нужен сырой курсор без async-API, поэтому
+        только на PostgreSQL она выполняется в потоке. Результат заполняет count.
+        """
+        if "count" in self.__dict__:
+            return self.count
+
+        queryset = self.object_list
+        cache_key = get_count_cache_key(queryset) if self.cache_counts else None
+        count = await cache.aget(cache_key) if cache_key is not None else None
+        if count is None:
+            estimate = None
+            if connections[queryset.db].vendor == "postgresql":
+                estimate = await sync_to_async(estimate_count)(queryset)
+            if self.is_large_estimate(estimate):
+                count = estimate
+            else:
+                count = await queryset.acount()
+                if cache_key is not None:
+                    await cache.aset(cache_key, count, getattr(settings, "COUNT_CACHE_TIMEOUT", 30))
+        self.__dict__["count"] = count
+        return count
+
+
+class CachedCountPaginator(EstimatedCountPaginator):
+    cache_counts = True
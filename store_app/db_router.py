@@ -0,0 +1,156 @@
+import itertools
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Состояние маршрутизации текущего запроса: {"pinned": bool, "wrote": bool};
+# None вне запроса (команды, shell) — тогда чтение каталога всегда идет на реплики
+_request_state = ContextVar("replica_routing_state", default=None)
+
+PIN_COOKIE = "db_primary_pin"
+
+LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def pin_to_primary() -> None:
+    """ Направляет все дальнейшие чтения текущего запроса на основную базу """
+    state = _request_state.get()
+    if state is not None:
+        state["pinned"] = True
+
+
+class ReplicaRouter:
+    """
+    Роутер чтения каталога с реплик.
+
+    Чтения моделей каталога (replica_models) уходят на реплики из
+    DATABASE_REPLICAS: по кругу (REPLICA_SELECTION = "round_robin") или на
+    реплику с наименьшим отставанием ("least_lag", не больше REPLICA_MAX_LAG
+    секунд, иначе — основная база). Корзины, пользователи, токены и все
+    записи — на основной базе. После записи в модель каталога запрос
+    закрепляется за основной базой (read-your-writes), а
+    ReplicaPinningMiddleware продлевает закрепление на следующие запросы клиента.
+    """
+    replica_models = {"store_app.category", "store_app.subcategory", "store_app.product", "store_app.productlisting"}
+    lag_check_interval = 1.0
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._lag = {}
+
+    def get_replicas(self) -> list[str]:
+        return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+    def measure_lag(self, alias: str) -> float:
+        """ Отставание реплики в секундах; недоступная реплика — бесконечность """
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_QUERY)
+                return float(cursor.fetchone()[0])
+        except Exception:
+            return float("inf")
+
+    def get_lag(self, alias: str) -> float:
+        """ Отставание с кешированием на lag_check_interval, чтобы не опрашивать реплику на каждое чтение """
+        now = time.monotonic()
+        checked = self._lag.get(alias)
+        if checked is None or now - checked[0] > self.lag_check_interval:
+            checked = (now, self.measure_lag(alias))
+            self._lag[alias] = checked
+        return checked[1]
+
+    def choose_replica(self) -> str:
+        replicas = self.get_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+
+        if getattr(settings, "REPLICA_SELECTION", "round_robin") == "least_lag":
+            max_lag = getattr(settings, "REPLICA_MAX_LAG", 5)
+            lags = [(self.get_lag(alias), alias) for alias in replicas]
+            lag, alias = min(lags)
+            return alias if lag <= max_lag else DEFAULT_DB_ALIAS
+
+        return replicas[next(self._counter) % len(replicas)]
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in self.replica_models:
+            return DEFAULT_DB_ALIAS
+        state = _request_state.get()
+        if state is not None and state["pinned"]:
+            return DEFAULT_DB_ALIAS
+        return self.choose_replica()
+
+    def db_for_write(self, model, **hints):
+        # Закрепляют только записи каталога: корзины, токены (last_login) и кеш
+        # счетчиков читаются с основной базы и не влияют на чтения с реплик
+        state = _request_state.get()
+        if state is not None and model._meta.label_lower in self.replica_models:
+            state["pinned"] = state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in self.get_replicas()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Открывает состояние маршрутизации на время запроса.
+
+    Запрос с cookie закрепления читает только с основной базы; запрос,
+    выполнивший запись, ставит cookie на REPLICA_PIN_SECONDS, чтобы
+    следующие чтения клиента не увидели отстающую реплику.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = {"pinned": PIN_COOKIE in request.COOKIES, "wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.process_response(response, state)
+
+    async def __acall__(self, request):
+        state = {"pinned": PIN_COOKIE in request.COOKIES, "wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.process_response(response, state)
+
+    @staticmethod
+    def process_response(response, state):
+        if state["wrote"]:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,50 @@
+import csv
+from itertools import islice
+
+from .fast_serializers import ProductFastSerializer
+from .renderers import ORJSONRenderer
+
+
+CSV_COLUMNS = [
+    "id", "name", "slug", "price", "category", "subcategory",
+    "image_small", "image_medium", "image_large",
+]
+
+
+class Echo:
+    """ Псевдо-буфер для csv.writer: write() возвращает строку вместо записи """
+    def write(self, value):
+        return value
+
+
+def iter_product_rows(queryset, chunk_size: int = 2000):
+    """
+    Итерирует продукты в формате ProductSerializer пачками по chunk_size.
+
+    .iterator(chunk_size) на PostgreSQL читает через серверный курсор,
+    поэтому память не растет с размером каталога.
+    """
+    fast_serializer = ProductFastSerializer()
+    rows = fast_serializer.prepare(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from fast_serializer.serialize(chunk)
+
+
+def stream_ndjson(queryset, chunk_size: int = 2000):
+    renderer = ORJSONRenderer()
+    for row in iter_product_rows(queryset, chunk_size):
+        yield renderer.render(row) + b"\n"
+
+
+def stream_csv(queryset, chunk_size: int = 2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in iter_product_rows(queryset, chunk_size):
+        images = row["images"]
+        yield writer.writerow([
+            row["id"], row["name"], row["slug"], row["price"], row["category"], row["subcategory"],
+            images["small"] or "", images["medium"] or "", images["large"] or "",
+        ])
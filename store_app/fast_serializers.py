@@ -0,0 +1,155 @@
+from urllib.parse import urljoin
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+from .images import variant_urls
+from .models import SubCategory
+
+
+class MediaURLBuilder:
+    """
+    Строит URL файлов напрямую из имени в БД, минуя ImageFieldFile и storage.url.
+
+    Для FileSystemStorage повторяет его url() (urljoin с MEDIA_URL) с заранее
+    вычисленным префиксом; для других хранилищ делегирует им.
+    """
+
+    def __init__(self, storage=default_storage):
+        self.storage = storage
+        self.base_url = storage.base_url if isinstance(storage, FileSystemStorage) else None
+
+    def __call__(self, name):
+        if not name:
+            return None
+        if self.base_url is None:
+            return self.storage.url(name)
+        return urljoin(self.base_url, filepath_to_uri(name).lstrip("/"))
+
+
+class ProductFastSerializer:
+    """
+    Быстрая read-only сериализация продуктов из values_list без создания моделей.
+
+    Выдает те же словари, что и ProductSerializer, в том же порядке ключей.
+    """
+    value_fields = (
+        "id",
+        "name",
+        "slug",
+        "price",
+        "subcategory__category__name",
+        "subcategory__name",
+        "image_small",
+        "image_medium",
+        "image_large",
+        "image_variants",
+    )
+    price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def __init__(self, request=None):
+        self.request = request
+        self.media_url = MediaURLBuilder()
+
+    def prepare(self, queryset):
+        return queryset.values_list(*self.value_fields, named=True)
+
+    def serialize(self, rows) -> list[dict]:
+        price = self.price_field.to_representation
+        media_url = self.media_url
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "slug": row.slug,
+                "price": price(row.price),
+                "category": row.subcategory__category__name,
+                "subcategory": row.subcategory__name,
+                "images": {
+                    "small": media_url(row.image_small),
+                    "medium": media_url(row.image_medium),
+                    "large": media_url(row.image_large),
+                    "variants": variant_urls(row.image_variants, media_url),
+                },
+            }
+            for row in rows
+        ]
+
+
+class ProductListingFastSerializer(ProductFastSerializer):
+    """
+    Сериализация из денормализованной таблицы ProductListing: названия
+    и URL изображений уже готовы, поэтому строка выбирается без JOIN.
+    """
+    value_fields = ("id", "name", "slug", "price", "category_name", "subcategory_name", "images")
+
+    def serialize(self, rows) -> list[dict]:
+        price = self.price_field.to_representation
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "slug": row.slug,
+                "price": price(row.price),
+                "category": row.category_name,
+                "subcategory": row.subcategory_name,
+                "images": row.images,
+            }
+            for row in rows
+        ]
+
+
+class CategoryTreeFastSerializer:
+    """
+    Быстрая read-only сериализация дерева категорий: категории и подкатегории
+    читаются двумя запросами values_list, без prefetch и моделей.
+    Выдает те же словари, что и CategoriesWithSubcategoriesSerializer.
+    """
+    value_fields = ("id", "name", "slug", "image", "image_variants")
+
+    def __init__(self, request=None):
+        self.request = request
+        self.media_url = MediaURLBuilder()
+
+    def image_url(self, name):
+        url = self.media_url(name)
+        if url is not None and self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def prepare(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.value_fields, named=True)
+
+    def get_subcategory_rows(self, category_ids):
+        return SubCategory.objects.filter(category_id__in=list(category_ids)).values_list(
+            *self.value_fields, "category_id", named=True
+        )
+
+    def serialize(self, rows) -> list[dict]:
+        rows = list(rows)
+        return self.build(rows, self.get_subcategory_rows(row.id for row in rows))
+
+    def build(self, rows, subcategory_rows) -> list[dict]:
+        """ Собирает дерево из уже выбранных строк категорий и подкатегорий """
+        subcategories = {row.id: [] for row in rows}
+        for row in subcategory_rows:
+            subcategories[row.category_id].append({
+                "id": row.id,
+                "name": row.name,
+                "slug": row.slug,
+                "image": self.image_url(row.image),
+                "image_variants": variant_urls(row.image_variants, self.media_url),
+            })
+
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "slug": row.slug,
+                "image": self.image_url(row.image),
+                "image_variants": variant_urls(row.image_variants, self.media_url),
+                "subcategories": subcategories[row.id],
+            }
+            for row in rows
+        ]
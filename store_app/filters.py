@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .models import Product, ProductListing
+
+
+PRODUCT_SORT_FIELDS = {
+    "name": ("name", "price", "id"),
+    "-name": ("-name", "-price", "-id"),
+    "price": ("price", "name", "id"),
+    "-price": ("-price", "-name", "-id"),
+}
+
+PRICE_BUCKETS = [Decimal(0), Decimal(100), Decimal(500), Decimal(1000)]
+
+# Поля фильтров и фасетов для источников списка: продукты с JOIN и денормализованная таблица
+FILTER_LOOKUPS = {
+    Product: {
+        "category": "subcategory__category__slug",
+        "subcategory": "subcategory__slug",
+        "subcategory_name": "subcategory__name",
+    },
+    ProductListing: {
+        "category": "category_slug",
+        "subcategory": "subcategory_slug",
+        "subcategory_name": "subcategory_name",
+    },
+}
+
+
+def filter_products(queryset, filters: dict):
+    """
+    Применяет к продуктам провалидированные фильтры ProductFilterSerializer.
+
+    Фильтры по подкатегории и цене попадают в составные индексы
+    (subcategory_id, price) и (subcategory_id, name), slug'и — в индексы SlugField;
+    для ProductListing — в индексы (slug категории/подкатегории, price/name).
+    """
+    lookups = FILTER_LOOKUPS[queryset.model]
+    if filters.get("category"):
+        queryset = queryset.filter(**{lookups["category"]: filters["category"]})
+    if filters.get("subcategory"):
+        queryset = queryset.filter(**{lookups["subcategory"]: filters["subcategory"]})
+    if filters.get("min_price") is not None:
+        queryset = queryset.filter(price__gte=filters["min_price"])
+    if filters.get("max_price") is not None:
+        queryset = queryset.filter(price__lte=filters["max_price"])
+    if filters.get("sort"):
+        queryset = queryset.order_by(*PRODUCT_SORT_FIELDS[filters["sort"]])
+    return queryset
+
+
+def get_price_bucket_labels() -> list[str]:
+    labels = []
+    for index, lower in enumerate(PRICE_BUCKETS):
+        upper = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+        labels.append(f"{lower}-{upper}" if upper is not None else f"{lower}+")
+    return labels
+
+
+def get_product_facets(queryset) -> dict:
+    """
+    Считает фасеты по подкатегориям и ценовым диапазонам одним GROUP BY
+    по (подкатегория, диапазон цены); свертка по каждому измерению — в Python
+    над небольшим числом групп.
+    """
+    bucket = Case(
+        *[
+            When(price__gte=lower, then=Value(index))
+            for index, lower in reversed(list(enumerate(PRICE_BUCKETS)))
+        ],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+    lookups = FILTER_LOOKUPS[queryset.model]
+    slug, name = lookups["subcategory"], lookups["subcategory_name"]
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=bucket)
+        .values(slug, name, "price_bucket")
+        .annotate(count=Count("id"))
+    )
+
+    labels = get_price_bucket_labels()
+    subcategories, prices = {}, [0] * len(labels)
+    for row in rows:
+        facet = subcategories.setdefault(row[slug], {
+            "slug": row[slug],
+            "name": row[name],
+            "count": 0,
+        })
+        facet["count"] += row["count"]
+        prices[row["price_bucket"]] += row["count"]
+
+    return {
+        "subcategories": sorted(subcategories.values(), key=lambda facet: facet["name"]),
+        "price": [
+            {"range": label, "count": count}
+            for label, count in zip(labels, prices)
+        ],
+    }
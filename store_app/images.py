@@ -0,0 +1,153 @@
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+from .cache import bump_catalog_version
+from .models import Product
+from .product_cache import product_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VARIANT_SIZES = {"small": 200, "medium": 600, "large": 1200}
+
+# Формат -> (расширение, параметры сохранения Pillow)
+ENCODINGS = {
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "avif": ("avif", {"format": "AVIF", "quality": 60}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_variant_sizes() -> dict:
+    return getattr(settings, "IMAGE_VARIANT_SIZES", DEFAULT_VARIANT_SIZES)
+
+
+def get_encodings() -> dict:
+    """ Доступные кодировки: AVIF только если Pillow собран с его поддержкой """
+    return {
+        name: encoding
+        for name, encoding in ENCODINGS.items()
+        if name != "avif" or features.check("avif")
+    }
+
+
+def encode(image: Image.Image, params: dict) -> bytes:
+    if params["format"] == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, **params)
+    return buffer.getvalue()
+
+
+def build_variants(source_name: str, folder: str) -> dict:
+    """
+    Строит из исходного изображения варианты всех размеров во всех форматах.
+
+    Имена файлов содержат хеш содержимого, поэтому их можно кешировать
+    навсегда, а одинаковые варианты не записываются повторно.
+    Возвращает {"source": имя исходника, "sizes": {размер: {формат: имя файла}}}.
+    """
+    with default_storage.open(source_name, "rb") as source_file:
+        source = Image.open(source_file)
+        source.load()
+    # Фото с телефонов хранят поворот в EXIF Orientation: варианты сохраняются без EXIF,
+    # поэтому поворот применяется к пикселям
+    source = ImageOps.exif_transpose(source)
+
+    stem = PurePosixPath(source_name).stem
+    encodings = get_encodings()
+    sizes = {}
+    for size_name, max_side in get_variant_sizes().items():
+        image = source.copy()
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        sizes[size_name] = {}
+        for format_name, (extension, params) in encodings.items():
+            content = encode(image, params)
+            digest = hashlib.sha256(content).hexdigest()[:16]
+            name = f"{folder}/{stem}-{size_name}-{digest}.{extension}"
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(content))
+            sizes[size_name][format_name] = name
+    return {"source": source_name, "sizes": sizes}
+
+
+def variant_urls(variants: dict, url=None) -> dict:
+    """ {размер: {формат: URL}} по сохраненной карте вариантов """
+    url = url or default_storage.url
+    return {
+        size_name: {format_name: url(name) for format_name, name in formats.items()}
+        for size_name, formats in (variants or {}).get("sizes", {}).items()
+    }
+
+
+def process_instance(model, pk) -> None:
+    """ Задача воркера: строит варианты изображения объекта и сохраняет их через UPDATE """
+    try:
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None or not instance.image:
+            return
+
+        folder = f"variants/{model._meta.model_name}"
+        variants = build_variants(instance.image.name, folder)
+        updates = {"image_variants": variants}
+        is_product = isinstance(instance, Product)
+        if is_product:
+            # Продукты: JPEG-варианты заполняют прежние поля размеров
+            for size_name in ("small", "medium", "large"):
+                if size_name in variants["sizes"]:
+                    updates[f"image_{size_name}"] = variants["sizes"][size_name]["jpeg"]
+        # Условие по image защищает от гонки с повторной загрузкой во время обработки
+        if not model.objects.filter(pk=pk, image=instance.image.name).update(**updates):
+            return
+        # UPDATE в обход сигналов: кеши, которые сбрасывают сигналы, обновляются явно
+        if is_product:
+            # Импорт здесь: listing сам зависит от variant_urls этого модуля
+            from .listing import sync_products
+            product_cache.invalidate(pk)
+            sync_products([pk])
+        else:
+            bump_catalog_version()
+    except Exception:
+        logger.exception("Не удалось построить варианты изображения %s pk=%s", model._meta.label, pk)
+    finally:
+        if not getattr(settings, "IMAGE_PIPELINE_SYNC", False):
+            connection.close()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_PIPELINE_WORKERS", 2),
+                thread_name_prefix="image-pipeline",
+            )
+        return _executor
+
+
+def needs_variants(instance) -> bool:
+    return bool(instance.image) and (instance.image_variants or {}).get("source") != instance.image.name
+
+
+def schedule_variants(instance) -> None:
+    """ Ставит построение вариантов в пул воркеров после коммита транзакции """
+    if not getattr(settings, "IMAGE_PIPELINE_ENABLED", True) or not needs_variants(instance):
+        return
+
+    model, pk = type(instance), instance.pk
+    if getattr(settings, "IMAGE_PIPELINE_SYNC", False):
+        transaction.on_commit(lambda: process_instance(model, pk))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(process_instance, model, pk))
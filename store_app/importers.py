@@ -0,0 +1,250 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .images import schedule_variants
+from .listing import sync_products
+from .models import Product, SubCategory
+from .product_cache import product_cache
+
+
+PRODUCT_IMPORT_FIELDS = ["name", "price", "subcategory_id", "image_small", "image_medium", "image_large"]
+
+
+class ImportErrorRow(ValueError):
+    """ Строка файла импорта, которую нельзя загрузить """
+
+
+def iter_json_array(stream, buffer_size: int = 1 << 16):
+    """
+    Потоково читает JSON-массив объектов, не загружая файл целиком:
+    объекты по одному разбираются JSONDecoder.raw_decode из буфера.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    while True:
+        chunk = stream.read(buffer_size)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != "[":
+                    raise ImportErrorRow("Ожидался JSON-массив")
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item
+            position = end
+        buffer = buffer[position:]
+        if not chunk:
+            if buffer.strip():
+                raise ImportErrorRow("Незавершенный JSON-массив")
+            return
+
+
+def iter_records(stream, file_format: str):
+    """ Итерирует записи файла импорта в форматах json, ndjson и csv """
+    if file_format == "json":
+        yield from iter_json_array(stream)
+    elif file_format == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif file_format == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        raise ValueError(f"Неизвестный формат: {file_format}")
+
+
+class SubCategoryResolver:
+    """
+    Сопоставляет записи подкатегориям по карте в памяти, загруженной одним запросом.
+    Поддерживает pk (как в фикстурах), slug подкатегории и пару slug категории/подкатегории.
+    """
+
+    def __init__(self):
+        self.by_pk = set()
+        self.by_slugs = {}
+        self.by_slug = {}
+        ambiguous = set()
+        for pk, slug, category_slug in SubCategory.objects.values_list("id", "slug", "category__slug"):
+            self.by_pk.add(pk)
+            self.by_slugs[(category_slug, slug)] = pk
+            if slug in self.by_slug:
+                ambiguous.add(slug)
+            self.by_slug[slug] = pk
+        for slug in ambiguous:
+            del self.by_slug[slug]
+
+    def resolve(self, subcategory, category=None) -> int:
+        if isinstance(subcategory, int) or (isinstance(subcategory, str) and subcategory.isdigit()):
+            if int(subcategory) in self.by_pk:
+                return int(subcategory)
+        if category:
+            key = (category, subcategory)
+            if key in self.by_slugs:
+                return self.by_slugs[key]
+        elif subcategory in self.by_slug:
+            return self.by_slug[subcategory]
+        raise ImportErrorRow(f"Подкатегория не найдена: {category or ''}/{subcategory}")
+
+
+def normalize_record(record: dict, resolver: SubCategoryResolver) -> dict:
+    """ Приводит запись (плоскую или в формате фикстуры) к полям Product """
+    fields = record.get("fields", record) if isinstance(record, dict) else record
+    if not isinstance(fields, dict):
+        raise ImportErrorRow(f"Некорректная запись {record!r}: ожидался объект")
+    try:
+        slug = fields["slug"]
+        price = Decimal(str(fields["price"])).quantize(Decimal("0.01"))
+        return {
+            "slug": slug,
+            "name": fields["name"],
+            "price": price,
+            "subcategory_id": resolver.resolve(fields["subcategory"], fields.get("category")),
+            "image_small": fields.get("image_small") or "",
+            "image_medium": fields.get("image_medium") or "",
+            "image_large": fields.get("image_large") or "",
+        }
+    except (KeyError, InvalidOperation) as exc:
+        raise ImportErrorRow(f"Некорректная запись {fields!r}: {exc}")
+
+
+def split_changed(rows: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Делит пачку на новые и измененные строки одним запросом по slug;
+    неизмененные строки отбрасываются, чтобы повторный импорт их не трогал.
+    """
+    existing = {}
+    for row in Product.objects.filter(slug__in=[row["slug"] for row in rows]).values("slug", *PRODUCT_IMPORT_FIELDS):
+        for field in ("image_small", "image_medium", "image_large"):
+            row[field] = row[field] or ""
+        existing[row["slug"]] = row
+    created, updated = [], []
+    for row in rows:
+        current = existing.get(row["slug"])
+        if current is None:
+            created.append(row)
+        elif any(current[field] != row[field] for field in PRODUCT_IMPORT_FIELDS):
+            updated.append(row)
+    return created, updated
+
+
+def upsert_batch(rows: list[dict]) -> tuple[list[int], list[int]]:
+    """
+    Upsert пачки через bulk_create(update_conflicts=True) по уникальному slug.
+    Возвращает id созданных и id обновленных продуктов.
+    """
+    created, updated = split_changed(rows)
+    changed = created + updated
+    if not changed:
+        return [], []
+    Product.objects.bulk_create(
+        [Product(**row) for row in changed],
+        update_conflicts=True,
+        unique_fields=["slug"],
+        update_fields=PRODUCT_IMPORT_FIELDS,
+    )
+    # Не все СУБД возвращают id из INSERT ... ON CONFLICT: они читаются одним запросом по slug
+    ids = dict(Product.objects.filter(slug__in=[row["slug"] for row in changed]).values_list("slug", "id"))
+    return [ids[row["slug"]] for row in created], [ids[row["slug"]] for row in updated]
+
+
+def copy_upsert_batch(rows: list[dict]) -> tuple[list[int], list[int]]:
+    """
+    Upsert пачки через COPY во временную таблицу и INSERT ... ON CONFLICT DO UPDATE
+    с условием IS DISTINCT FROM, чтобы не переписывать неизмененные строки (только PostgreSQL).
+    Возвращает id созданных и id обновленных продуктов.
+    """
+    columns = ["slug", *PRODUCT_IMPORT_FIELDS]
+    data = io.StringIO()
+    writer = csv.writer(data)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+    data.seek(0)
+
+    table = Product._meta.db_table
+    column_list = ", ".join(columns)
+    # Во временной таблице только копируемые колонки: LIKE скопировал бы NOT NULL
+    # у id и image_variants без их значений по умолчанию
+    staging_columns = ", ".join(
+        f"{column} {Product._meta.get_field(column).db_type(connection)}" for column in columns
+    )
+    updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in PRODUCT_IMPORT_FIELDS)
+    changed = " OR ".join(f"{table}.{field} IS DISTINCT FROM EXCLUDED.{field}" for field in PRODUCT_IMPORT_FIELDS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS product_import_staging ({staging_columns}) ON COMMIT DELETE ROWS"
+        )
+        # FORCE_NOT_NULL: пустые поля CSV — пустые строки (как в ORM-пути), а не NULL
+        copy_sql = (
+            f"COPY product_import_staging ({column_list}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({column_list}))"
+        )
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, "copy_expert"):
+            raw_cursor.copy_expert(copy_sql, data)
+        else:
+            with raw_cursor.copy(copy_sql) as copy:
+                copy.write(data.getvalue())
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}, image_variants) "
+            f"SELECT {column_list}, '{{}}'::jsonb FROM product_import_staging "
+            f"ON CONFLICT (slug) DO UPDATE SET {updates} WHERE {changed} "
+            f"RETURNING id, (xmax = 0)"
+        )
+        results = cursor.fetchall()
+    created = [pk for pk, inserted in results if inserted]
+    updated = [pk for pk, inserted in results if not inserted]
+    return created, updated
+
+
+def import_products(records, batch_size: int = 5000, use_copy: bool = False, progress=None) -> dict:
+    """
+    Импортирует продукты из итератора записей пачками по batch_size.
+    Каждая пачка — отдельная транзакция; progress(stats) вызывается после каждой.
+    """
+    resolver = SubCategoryResolver()
+    upsert = copy_upsert_batch if use_copy else upsert_batch
+    stats = {"processed": 0, "created": 0, "updated": 0, "unchanged": 0}
+    records = iter(records)
+
+    while True:
+        batch = {}
+        for record in islice(records, batch_size):
+            row = normalize_record(record, resolver)
+            # Внутри пачки slug уникален: последняя запись побеждает
+            batch[row["slug"]] = row
+        if not batch:
+            return stats
+
+        with transaction.atomic():
+            created, updated = upsert(list(batch.values()))
+            # Upsert идет в обход сигналов: снимки продуктов, варианты изображений
+            # и строки списка продуктов обновляются явно, только для измененных строк
+            changed = created + updated
+            if changed:
+                for product in Product.objects.filter(id__in=changed).only("id", "image", "image_variants"):
+                    product_cache.invalidate(product.pk)
+                    schedule_variants(product)
+                sync_products(changed)
+        stats["processed"] += len(batch)
+        stats["created"] += len(created)
+        stats["updated"] += len(updated)
+        stats["unchanged"] += len(batch) - len(changed)
+        if progress is not None:
+            progress(stats)
@@ -0,0 +1,266 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Метрики текущего запроса; None вне запроса (команды, shell) — тогда запись не ведется
+_request_stats = ContextVar("request_stats", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class QueryBudgetExceeded(Exception):
+    """ Вьюха выполнила больше SQL-запросов, чем разрешает ее query_budget """
+
+
+def new_stats() -> dict:
+    return {
+        "db_queries": 0,
+        "db_time": 0.0,
+        "serialize": 0.0,
+        "render": 0.0,
+        # Число запросов к моменту вызова обработчика (после аутентификации и прав)
+        "handler_start_queries": None,
+    }
+
+
+def record_query(execute, sql, params, many, context):
+    """ execute_wrapper: считает запросы и время БД в метрики текущего запроса """
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats["db_queries"] += 1
+        stats["db_time"] += time.perf_counter() - started
+
+
+def install_query_recorder(connection) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def mark_handler_start() -> None:
+    """ Отмечает начало обработчика: бюджет не учитывает запросы аутентификации и проверки прав """
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["handler_start_queries"] = stats["db_queries"]
+
+
+@contextmanager
+def timed(metric: str):
+    """ Добавляет время блока к метрике текущего запроса (serialize, render) """
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats[metric] += time.perf_counter() - started
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """
+    Агрегаты по вьюхам в памяти процесса в текстовом формате Prometheus.
+
+    Метки — имя маршрута и метод (не путь), чтобы число рядов не росло
+    с параметрами URL. Каждый воркер отдает свои значения, суммирует их Prometheus.
+    """
+    counters = {
+        "db_queries": ("api_db_queries_total", "SQL-запросов выполнено"),
+        "db_time": ("api_db_duration_seconds_total", "Время выполнения SQL-запросов"),
+        "serialize": ("api_serialize_duration_seconds_total", "Время сериализации"),
+        "render": ("api_render_duration_seconds_total", "Время рендеринга ответа"),
+        "response_bytes": ("api_response_bytes_total", "Байт в телах ответов"),
+        "budget_exceeded": ("api_query_budget_exceeded_total", "Превышений бюджета запросов"),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._durations = {}
+        self._totals = {}
+
+    def observe(self, view: str, method: str, status_code: int, duration: float, values: dict) -> None:
+        labels = (view, method)
+        with self._lock:
+            key = (view, method, status_code)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            histogram = self._durations.setdefault(labels, [[0] * len(DURATION_BUCKETS), 0.0, 0])
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += duration
+            histogram[2] += 1
+
+            totals = self._totals.setdefault(labels, dict.fromkeys(self.counters, 0))
+            for name, value in values.items():
+                totals[name] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._durations.clear()
+            self._totals.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines += ["# HELP api_requests_total HTTP-запросов обработано", "# TYPE api_requests_total counter"]
+            for (view, method, status_code), count in sorted(self._requests.items()):
+                lines.append(
+                    f'api_requests_total{{view="{escape_label(view)}",method="{method}",status="{status_code}"}} {count}'
+                )
+
+            lines += ["# HELP api_request_duration_seconds Время обработки запроса",
+                      "# TYPE api_request_duration_seconds histogram"]
+            for (view, method), (buckets, total, count) in sorted(self._durations.items()):
+                labels = f'view="{escape_label(view)}",method="{method}"'
+                for bound, bucket in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {bucket}')
+                lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"api_request_duration_seconds_sum{{{labels}}} {total}")
+                lines.append(f"api_request_duration_seconds_count{{{labels}}} {count}")
+
+            for field, (name, description) in self.counters.items():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+                for (view, method), totals in sorted(self._totals.items()):
+                    lines.append(f'{name}{{view="{escape_label(view)}",method="{method}"}} {totals[field]}')
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class InstrumentedViewMixin:
+    """
+    DRF-миксин: отмечает начало обработчика (для бюджета запросов) и время рендеринга.
+
+    Бюджет объявляется на вьюхе как query_budget = {"get": 3} и считается
+    по запросам самого обработчика, без аутентификации и проверки прав.
+    """
+    query_budget = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        mark_handler_start()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        stats = _request_stats.get()
+        if stats is not None and hasattr(response, "add_post_render_callback"):
+            # Django рендерит ответ сразу после возврата из вьюхи
+            started = time.perf_counter()
+
+            def record_render(rendered):
+                stats["render"] += time.perf_counter() - started
+
+            response.add_post_render_callback(record_render)
+        return response
+
+
+def get_view_budget(request) -> int | None:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view_class = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+    return getattr(view_class, "query_budget", {}).get(request.method.lower())
+
+
+class RequestMetricsMiddleware:
+    """
+    Собирает по каждому запросу число SQL-запросов, время БД, сериализации
+    и рендеринга, размер ответа; отдает их в Server-Timing и в метрики
+    Prometheus (GET /api/v1/internal/metrics/) и проверяет бюджеты запросов:
+    QUERY_BUDGET_MODE = "warn" пишет предупреждение, "raise" (CI) — падает.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    @staticmethod
+    def start():
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        stats = new_stats()
+        return stats, _request_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        duration = time.perf_counter() - started
+        response_bytes = 0 if response.streaming else len(response.content)
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else "unmatched"
+        budget_exceeded = self.check_budget(request, view, stats)
+
+        request_metrics.observe(view, request.method, response.status_code, duration, {
+            "db_queries": stats["db_queries"],
+            "db_time": stats["db_time"],
+            "serialize": stats["serialize"],
+            "render": stats["render"],
+            "response_bytes": response_bytes,
+            "budget_exceeded": int(budget_exceeded),
+        })
+
+        if getattr(settings, "SERVER_TIMING_ENABLED", False):
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={stats["db_time"] * 1000:.2f};desc="{stats["db_queries"]} queries"',
+                f'serialize;dur={stats["serialize"] * 1000:.2f}',
+                f'render;dur={stats["render"] * 1000:.2f}',
+                f"total;dur={duration * 1000:.2f}",
+            ])
+        return response
+
+    @staticmethod
+    def check_budget(request, view: str, stats: dict) -> bool:
+        budget = get_view_budget(request)
+        if budget is None:
+            return False
+        start = stats["handler_start_queries"]
+        queries = stats["db_queries"] - (start or 0)
+        if queries <= budget:
+            return False
+
+        message = f"{request.method} {view}: {queries} SQL-запросов при бюджете {budget}"
+        if getattr(settings, "QUERY_BUDGET_MODE", "warn") == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return True
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.db import transaction
+
+from .fast_serializers import MediaURLBuilder
+from .images import variant_urls
+from .models import Category, Product, ProductListing, SubCategory
+
+LISTING_SOURCE_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "price",
+    "subcategory_id",
+    "subcategory__slug",
+    "subcategory__name",
+    "subcategory__category_id",
+    "subcategory__category__slug",
+    "subcategory__category__name",
+    "image_small",
+    "image_medium",
+    "image_large",
+    "image_variants",
+)
+
+LISTING_UPDATE_FIELDS = [
+    "name",
+    "slug",
+    "price",
+    "subcategory_id",
+    "subcategory_slug",
+    "subcategory_name",
+    "category_id",
+    "category_slug",
+    "category_name",
+    "images",
+]
+
+
+def is_listing_enabled() -> bool:
+    """ Читает ли ProductsView из ProductListing (и поддерживают ли ее сигналы) """
+    return getattr(settings, "PRODUCT_LISTING_ENABLED", False)
+
+
+def build_listing_rows(products) -> list[ProductListing]:
+    """ Строки ProductListing для продуктов одним запросом с JOIN категории и подкатегории """
+    media_url = MediaURLBuilder()
+    return [
+        ProductListing(
+            id=row.id,
+            name=row.name,
+            slug=row.slug,
+            price=row.price,
+            subcategory_id=row.subcategory_id,
+            subcategory_slug=row.subcategory__slug,
+            subcategory_name=row.subcategory__name,
+            category_id=row.subcategory__category_id,
+            category_slug=row.subcategory__category__slug,
+            category_name=row.subcategory__category__name,
+            images={
+                "small": media_url(row.image_small),
+                "medium": media_url(row.image_medium),
+                "large": media_url(row.image_large),
+                "variants": variant_urls(row.image_variants, media_url),
+            },
+        )
+        for row in products.values_list(*LISTING_SOURCE_FIELDS, named=True)
+    ]
+
+
+def upsert_listing_rows(rows: list[ProductListing]) -> None:
+    if rows:
+        ProductListing.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=LISTING_UPDATE_FIELDS,
+        )
+
+
+def sync_products(product_ids) -> None:
+    """ Пересобирает строки списка для продуктов; исчезнувшие продукты удаляются из списка """
+    if not is_listing_enabled():
+        return
+    product_ids = list(product_ids)
+    rows = build_listing_rows(Product.objects.filter(id__in=product_ids).order_by())
+    upsert_listing_rows(rows)
+    missing = set(product_ids) - {row.id for row in rows}
+    if missing:
+        ProductListing.objects.filter(id__in=missing).delete()
+
+
+def sync_subcategory(subcategory: SubCategory) -> None:
+    """ Переносит название, slug и категорию подкатегории во все ее строки одним UPDATE """
+    if not is_listing_enabled():
+        return
+    category = Category.objects.only("slug", "name").get(pk=subcategory.category_id)
+    ProductListing.objects.filter(subcategory_id=subcategory.pk).update(
+        subcategory_slug=subcategory.slug,
+        subcategory_name=subcategory.name,
+        category_id=category.pk,
+        category_slug=category.slug,
+        category_name=category.name,
+    )
+
+
+def sync_category(category: Category) -> None:
+    if not is_listing_enabled():
+        return
+    ProductListing.objects.filter(category_id=category.pk).update(
+        category_slug=category.slug,
+        category_name=category.name,
+    )
+
+
+def refresh_product_listing(batch_size: int = 5000, progress=None) -> dict:
+    """
+    Полностью пересобирает ProductListing: upsert всех продуктов пачками
+    по возрастанию id и удаление строк продуктов, которых больше нет.
+
+    Нужна после массовых операций в обход сигналов (bulk_create, update)
+    и периодически как страховка от расхождений; работает и при выключенном
+    PRODUCT_LISTING_ENABLED, чтобы таблицу можно было наполнить до включения.
+    """
+    synced, last_id = 0, 0
+    while True:
+        with transaction.atomic():
+            rows = build_listing_rows(Product.objects.filter(id__gt=last_id).order_by("id")[:batch_size])
+            upsert_listing_rows(rows)
+        if not rows:
+            break
+        synced += len(rows)
+        last_id = max(row.id for row in rows)
+        if progress is not None:
+            progress(f"Продуктов в списке: {synced}")
+
+    deleted, _ = ProductListing.objects.exclude(id__in=Product.objects.values("id")).delete()
+    return {"synced": synced, "deleted": deleted}
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store_app.benchmarks.api import compare_results, load_results, run_api_benchmark, save_results
+
+
+class Command(BaseCommand):
+    """
+    In-process бенчмарк API: p50/p95 и число SQL-запросов по сценариям.
+
+    Результат сохраняется в JSON (--output); с --baseline прогон сравнивается
+    с сохраненным и завершается ошибкой при регрессии, например:
+    python manage.py seed_store --products 100000
+    python manage.py bench_api --output bench/baseline.json
+    python manage.py bench_api --baseline bench/baseline.json --output bench/current.json
+    """
+    help = "Измеряет задержку и число запросов эндпоинтов и сравнивает с базовым прогоном"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--scenario", action="append", dest="scenarios", help="Запустить только эти сценарии")
+        parser.add_argument("--output", help="Куда сохранить результаты в JSON")
+        parser.add_argument("--baseline", help="JSON базового прогона для сравнения")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимый рост задержки, доля")
+        parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Минимальный значимый рост задержки, мс")
+
+    def handle(self, *args, **options):
+        results = run_api_benchmark(options["runs"], options["warmup"], options["scenarios"])
+        for name, result in results["scenarios"].items():
+            self.stdout.write(
+                f"{name:<18} p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms "
+                f"queries={result['queries']} status={result['status']}"
+            )
+
+        if options["output"]:
+            save_results(results, options["output"])
+
+        if options["baseline"]:
+            regressions = compare_results(
+                load_results(options["baseline"]), results, options["tolerance"], options["min_delta_ms"]
+            )
+            if regressions:
+                raise CommandError("Регрессии относительно базового прогона:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Регрессий относительно базового прогона нет"))
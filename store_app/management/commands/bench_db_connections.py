@@ -0,0 +1,85 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import ConnectionHandler
+
+
+def measure(connection, requests: int) -> dict:
+    """
+    Имитирует цикл запроса: close_if_unusable_or_obsolete() на старте
+    и в конце (как сигналы request_started/request_finished), между ними —
+    один SELECT 1. Отдельно замеряется время получения соединения.
+    """
+    totals, connects = [], []
+    for _ in range(requests):
+        started = time.perf_counter()
+        connection.close_if_unusable_or_obsolete()
+        connection.ensure_connection()
+        connected = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        connection.close_if_unusable_or_obsolete()
+        finished = time.perf_counter()
+        connects.append(connected - started)
+        totals.append(finished - started)
+
+    totals.sort()
+    return {
+        "connect_ms": sum(connects) / requests * 1000,
+        "p50_ms": totals[requests // 2] * 1000,
+        "p99_ms": totals[min(int(requests * 0.99), requests - 1)] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк стоимости соединения с PostgreSQL на запрос.
+
+    Сравнивает новое соединение на каждый запрос (CONN_MAX_AGE=0),
+    постоянные соединения с проверкой (CONN_MAX_AGE + CONN_HEALTH_CHECKS)
+    и пул psycopg 3 (OPTIONS["pool"]) на настройках базы default.
+    """
+    help = "Показывает долю установки соединения в задержке запроса для разных профилей БД"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        base = copy.deepcopy(settings.DATABASES[options["database"]])
+        if base["ENGINE"] != "django.db.backends.postgresql":
+            raise CommandError("Бенчмарк рассчитан на PostgreSQL")
+        base.setdefault("OPTIONS", {}).pop("pool", None)
+
+        profiles = {
+            "new": {**base, "CONN_MAX_AGE": 0},
+            "persistent": {**base, "CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True},
+            "pool": {
+                **base,
+                "CONN_MAX_AGE": 0,
+                "CONN_HEALTH_CHECKS": True,
+                "OPTIONS": {**base["OPTIONS"], "pool": {"min_size": 1, "max_size": 2}},
+            },
+        }
+        # Отдельные алиасы: пулы Django хранятся по алиасу на уровне класса бэкенда
+        connections = ConnectionHandler({
+            "default": base,
+            **{f"bench_{name}": config for name, config in profiles.items()},
+        })
+
+        for name in profiles:
+            connection = connections[f"bench_{name}"]
+            try:
+                measure(connection, min(10, options["requests"]))
+                result = measure(connection, options["requests"])
+            finally:
+                connection.close()
+                if name == "pool":
+                    connection.close_pool()
+            self.stdout.write(
+                f"{name:<11} connect={result['connect_ms']:.3f}ms "
+                f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms"
+            )
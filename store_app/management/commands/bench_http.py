@@ -0,0 +1,166 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def read_response(reader) -> tuple[int, bool]:
+    """ Читает HTTP/1.1-ответ (Content-Length или chunked); возвращает статус и признак Connection: close """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Соединение закрыто сервером")
+    status_code = int(status_line.split()[1])
+
+    # HTTP/1.0-серверы закрывают соединение после ответа
+    length, chunked, close = 0, False, status_line.startswith(b"HTTP/1.0")
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding":
+            chunked = "chunked" in value
+        elif name == "connection":
+            close = value == "close" or (close and value != "keep-alive")
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status_code, close
+
+
+async def worker(host, port, requests, deadline, latencies, stats):
+    """ Одно keep-alive соединение, отправляющее запросы по кругу до deadline """
+    reader = writer = None
+    index = 0
+    while time.perf_counter() < deadline:
+        request = requests[index % len(requests)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status_code, close = await read_response(reader)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            stats["errors"] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+
+        if latencies is not None:
+            latencies.append(time.perf_counter() - started)
+        if status_code >= 400:
+            stats["errors"] += 1
+        if close:
+            writer.close()
+            reader = writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(round(fraction * (len(values) - 1))), len(values) - 1)]
+
+
+async def run_load(url, paths, headers, concurrency, duration, warmup) -> dict:
+    """ Прогрев без учета, затем замер: RPS и перцентили задержек """
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    requests = [
+        (
+            f"GET {parts.path.rstrip('/')}{path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\nAccept: application/json\r\n{extra}\r\n"
+        ).encode("latin-1")
+        for path in paths
+    ]
+
+    stats = {"errors": 0}
+    if warmup:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(host, port, requests, deadline, None, stats) for _ in range(concurrency)))
+
+    stats, latencies = {"errors": 0}, []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(worker(host, port, requests, deadline, latencies, stats) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": stats["errors"],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный бенчмарк HTTP-сборок: RPS и p50/p99 при заданной конкурентности.
+
+    Сравнивает несколько запущенных серверов, например WSGI (gunicorn)
+    и ASGI-профиль (uvicorn, ASYNC_API_VIEWS=True):
+    python manage.py bench_http wsgi=http://localhost:8001 asgi=http://localhost:8002 --concurrency 512
+    Клиент — asyncio с keep-alive соединениями; при большой конкурентности
+    его лучше запускать на отдельной машине, чтобы не делить CPU с сервером.
+    """
+    help = "Сравнивает RPS и p99 серверов под высокой конкурентностью"
+
+    def add_arguments(self, parser):
+        parser.add_argument("targets", nargs="+", help="Серверы в виде имя=базовый URL")
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Путь запроса; можно указать несколько (по умолчанию продукты и категории)"
+        )
+        parser.add_argument("--token", help="Токен для эндпоинтов корзины (Authorization: Token ...)")
+        parser.add_argument("--concurrency", type=int, default=256)
+        parser.add_argument("--duration", type=float, default=15, help="Длительность замера, с")
+        parser.add_argument("--warmup", type=float, default=3, help="Длительность прогрева, с")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["targets"]:
+            name, separator, url = target.partition("=")
+            if not separator or not url.startswith("http://"):
+                raise CommandError(f"Ожидалось имя=http://host:port, получено: {target}")
+            targets.append((name, url))
+
+        paths = options["paths"] or ["/api/v1/products/", "/api/v1/categories/"]
+        headers = {"Authorization": f"Token {options['token']}"} if options["token"] else {}
+
+        results = {}
+        for name, url in targets:
+            results[name] = result = asyncio.run(run_load(
+                url, paths, headers, options["concurrency"], options["duration"], options["warmup"]
+            ))
+            self.stdout.write(
+                f"{name:<10} rps={result['rps']:<10.1f} p50={result['p50_ms']:.1f}ms "
+                f"p99={result['p99_ms']:.1f}ms requests={result['requests']} errors={result['errors']}"
+            )
+
+        if len(results) > 1:
+            base_name, base = next(iter(results.items()))
+            for name, result in list(results.items())[1:]:
+                self.stdout.write(
+                    f"{name} vs {base_name}: rps x{result['rps'] / max(base['rps'], 1e-9):.2f}, "
+                    f"p99 x{result['p99_ms'] / max(base['p99_ms'], 1e-9):.2f}"
+                )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from store_app.fast_serializers import CategoryTreeFastSerializer, ProductFastSerializer
+from store_app.models import Category, Product
+from store_app.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class Command(BaseCommand):
+    """ Бенчмарк рендереров: размер ответа и CPU на ответ для страницы продуктов и дерева категорий """
+    help = "Сравнивает JSONRenderer, ORJSONRenderer и MessagePackRenderer по байтам и времени"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=30, help="Размер страницы продуктов")
+        parser.add_argument("--runs", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get("/"))
+        products = ProductFastSerializer(request)
+        categories = CategoryTreeFastSerializer(request)
+        payloads = {
+            "products": {"results": products.serialize(
+                products.prepare(Product.objects.select_related("subcategory__category")[:options["rows"]])
+            )},
+            "categories": {"results": categories.serialize(categories.prepare(Category.objects.all()))},
+        }
+        renderers = [JSONRenderer(), ORJSONRenderer(), MessagePackRenderer()]
+
+        for name, data in payloads.items():
+            for renderer in renderers:
+                size = len(renderer.render(data))
+                started = time.process_time()
+                for _ in range(options["runs"]):
+                    renderer.render(data)
+                cpu_us = (time.process_time() - started) / options["runs"] * 1_000_000
+                self.stdout.write(
+                    f"{name:<10} {type(renderer).__name__:<20} bytes={size:<8} cpu={cpu_us:.1f}us"
+                )
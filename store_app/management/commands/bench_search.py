@@ -0,0 +1,64 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store_app.benchmarks.constants import WORDS
+from store_app.models import Category, SubCategory, Product
+from store_app.search import get_product_search
+
+
+class Command(BaseCommand):
+    """ Бенчмарк поиска продуктов: p50/p95 времени поискового запроса """
+    help = "Измеряет задержку поиска продуктов; при необходимости генерирует каталог"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Сколько синтетических продуктов добавить перед замером")
+        parser.add_argument("--runs", type=int, default=200, help="Количество поисковых запросов")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"], options["batch_size"])
+
+        search = get_product_search()
+        queries = [random.choice(WORDS) for _ in range(options["runs"] // 2)]
+        # Запросы с опечаткой проверяют ветку pg_trgm
+        queries += [word[:-1] + "ы" for word in random.choices(WORDS, k=options["runs"] - len(queries))]
+
+        timings = []
+        base = Product.objects.select_related("subcategory__category")
+        for query in queries:
+            started = time.perf_counter()
+            list(search.search(base, query)[:30])
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"{type(search).__name__}: products={Product.objects.count()} runs={len(timings)} "
+            f"p50={statistics.median(timings):.2f}ms p95={p95:.2f}ms max={timings[-1]:.2f}ms"
+        )
+
+    def seed(self, count, batch_size):
+        category, _ = Category.objects.get_or_create(
+            name="Бенчмарк", defaults={"slug": "benchmark", "image": "categories/test.jpg"}
+        )
+        subcategory, _ = SubCategory.objects.get_or_create(
+            name="Бенчмарк", defaults={"slug": "benchmark", "image": "subcategories/test.jpg", "category": category}
+        )
+        offset = Product.objects.count()
+        for start in range(0, count, batch_size):
+            with transaction.atomic():
+                Product.objects.bulk_create([
+                    Product(
+                        name=" ".join(random.sample(WORDS, 3)) + f" {offset + number}",
+                        slug=f"bench-{offset + number}",
+                        price=random.randint(10, 2000),
+                        subcategory=subcategory,
+                    )
+                    for number in range(start, min(start + batch_size, count))
+                ])
+            self.stdout.write(f"Сгенерировано {min(start + batch_size, count)}/{count}")
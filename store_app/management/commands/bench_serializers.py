@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from store_app.fast_serializers import ProductFastSerializer
+from store_app.models import Product
+from store_app.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    """ Микробенчмарк сериализации страницы продуктов: ProductSerializer против быстрого пути """
+    help = "Сравнивает время сериализации продуктов DRF-сериализатором и ProductFastSerializer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=30, help="Размер страницы")
+        parser.add_argument("--runs", type=int, default=200)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.select_related("subcategory__category")[:options["rows"]]
+        renderer = JSONRenderer()
+
+        def drf():
+            return renderer.render(ProductSerializer(queryset.all(), many=True).data)
+
+        def fast():
+            fast_serializer = ProductFastSerializer()
+            return renderer.render(fast_serializer.serialize(fast_serializer.prepare(queryset.all())))
+
+        if drf() != fast():
+            self.stderr.write(self.style.ERROR("Вывод сериализаторов различается"))
+            return
+
+        results = {}
+        for name, func in (("ProductSerializer", drf), ("ProductFastSerializer", fast)):
+            timings = []
+            for _ in range(options["runs"]):
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+            self.stdout.write(f"{name}: rows={options['rows']} median={results[name]:.3f}ms")
+
+        speedup = results["ProductSerializer"] / results["ProductFastSerializer"]
+        self.stdout.write(self.style.SUCCESS(f"Ускорение: x{speedup:.2f}"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store_app.cart_storage import KeyValueCartStorage, get_cart_storage
+
+
+class Command(BaseCommand):
+    """ Переносит корзины из key-value хранилища в PostgreSQL (write-behind) """
+    help = "Сохраняет корзины из key-value хранилища в таблицы Cart/CartProduct"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="ID пользователя, корзину которого нужно сохранить")
+        parser.add_argument(
+            "--expiring-within",
+            type=int,
+            help="Сохранить только корзины, которые истекут в ближайшие N секунд (для периодического запуска)",
+        )
+
+    def handle(self, *args, **options):
+        storage = get_cart_storage()
+        if not isinstance(storage, KeyValueCartStorage):
+            raise CommandError("Текущее хранилище корзин не key-value: корзины уже в БД")
+
+        if options["user"] is not None:
+            storage.flush(options["user"])
+            self.stdout.write(self.style.SUCCESS(f"Корзина пользователя {options['user']} сохранена"))
+            return
+
+        if options["expiring_within"] is not None:
+            count = storage.flush_expiring(options["expiring_within"])
+        else:
+            count = storage.flush_all()
+        self.stdout.write(self.style.SUCCESS(f"Сохранено корзин: {count}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from store_app.images import needs_variants, process_instance
+from store_app.models import Category, SubCategory, Product
+
+
+class Command(BaseCommand):
+    """ Строит варианты изображений для уже загруженных категорий, подкатегорий и продуктов """
+    help = "Генерирует размеры и WebP/AVIF-варианты для изображений без актуальных вариантов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Перестроить варианты для всех изображений")
+
+    def handle(self, *args, **options):
+        for model in (Category, SubCategory, Product):
+            processed = 0
+            for instance in model.objects.exclude(image="").exclude(image=None).iterator():
+                if options["force"] or needs_variants(instance):
+                    process_instance(model, instance.pk)
+                    processed += 1
+            self.stdout.write(f"{model._meta.verbose_name_plural}: обработано {processed}")
@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from store_app.importers import ImportErrorRow, import_products, iter_records
+
+
+class Command(BaseCommand):
+    """ Потоковый импорт продуктов из JSON/CSV/NDJSON с идемпотентным upsert по slug """
+    help = "Импортирует продукты пачками; повторный импорт меняет только измененные строки"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу с продуктами")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=["json", "ndjson", "csv"],
+            help="Формат файла (по умолчанию — по расширению)"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Загружать пачки через COPY во временную таблицу (только PostgreSQL)"
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Файл не найден: {path}")
+
+        file_format = options["file_format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("json", "ndjson", "csv"):
+            raise CommandError(f"Не удалось определить формат файла: {path}")
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy поддерживается только на PostgreSQL")
+
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Обработано {stats['processed']} "
+                f"(создано {stats['created']}, обновлено {stats['updated']}, без изменений {stats['unchanged']}), "
+                f"{stats['processed'] / elapsed:.0f} строк/с"
+            )
+
+        with path.open(encoding="utf-8", newline="") as stream:
+            try:
+                stats = import_products(
+                    iter_records(stream, file_format),
+                    batch_size=options["batch_size"],
+                    use_copy=options["copy"],
+                    progress=progress,
+                )
+            except ImportErrorRow as exc:
+                raise CommandError(str(exc))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Импорт завершен за {elapsed:.1f} с: создано {stats['created']}, "
+            f"обновлено {stats['updated']}, без изменений {stats['unchanged']}"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from store_app.listing import refresh_product_listing
+
+
+class Command(BaseCommand):
+    """
+    Пересборка денормализованного списка продуктов (ProductListing).
+
+    Запускается периодически (cron, например раз в час) и после массовых
+    операций в обход сигналов; перед включением PRODUCT_LISTING_ENABLED
+    наполняет таблицу.
+    """
+    help = "Пересобирает таблицу списка продуктов из продуктов, подкатегорий и категорий"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        stats = refresh_product_listing(batch_size=options["batch_size"], progress=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Строк обновлено: {stats['synced']}, удалено: {stats['deleted']}"
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from store_app.benchmarks.constants import BENCH_PASSWORD
+from store_app.benchmarks.data import seed_store
+
+
+class Command(BaseCommand):
+    """ Генератор данных для бенчмарков и нагрузочного тестирования """
+    help = "Детерминированно создает категории, подкатегории, продукты, пользователей и корзины"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--subcategories", type=int, default=5, help="Подкатегорий в каждой категории")
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=100, help="Пользователей bench_user_N с корзинами")
+        parser.add_argument("--lines-per-cart", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0, help="Зерно генератора случайных чисел")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        stats = seed_store(
+            categories=options["categories"],
+            subcategories=options["subcategories"],
+            products=options["products"],
+            users=options["users"],
+            lines_per_cart=options["lines_per_cart"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            progress=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            " ".join(f"{name}={value}" for name, value in stats.items()) + f" (пароль: {BENCH_PASSWORD})"
+        ))
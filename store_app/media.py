@@ -0,0 +1,130 @@
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+# Имена вида name-<16 hex>.ext генерирует пайплайн изображений: содержимое по такому URL не меняется
+HASHED_NAME_RE = re.compile(r"-([0-9a-f]{16})\.[A-Za-z0-9]+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def get_cache_control(path: str) -> str:
+    if HASHED_NAME_RE.search(path):
+        return "public, max-age=31536000, immutable"
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def get_etag(path: str, stat) -> str:
+    """
+    Строгий ETag: для имен с хешем — хеш содержимого из имени (не меняется
+    при копировании и новом деплое), для остальных — размер и mtime
+    """
+    match = HASHED_NAME_RE.search(path)
+    if match:
+        return quote_etag(match.group(1))
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def parse_range(header: str, size: int):
+    """ Разбирает одиночный диапазон bytes=start-end; None — диапазон не применим """
+    match = RANGE_RE.match(header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if start == "" and end == "":
+        return None
+    if start == "":
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def iter_file_range(path, start: int, length: int):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path: str):
+    """
+    Отдает файлы из MEDIA_ROOT со строгим ETag, Last-Modified и Cache-Control.
+
+    MEDIA_SERVE_MODE:
+    - "x-accel" — только заголовки, тело отдает nginx по X-Accel-Redirect
+      (location MEDIA_ACCEL_REDIRECT_PREFIX с internal);
+    - "sendfile" — FileResponse, который WSGI-сервер с wsgi.file_wrapper
+      (gunicorn, uwsgi) передает через os.sendfile без копирования в Python.
+    Range-запросы обрабатываются в режиме sendfile; nginx делает это сам.
+    """
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Файл не найден")
+    if not full_path.is_file():
+        raise Http404("Файл не найден")
+
+    stat = full_path.stat()
+    etag = get_etag(path, stat)
+    last_modified = int(stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified["Cache-Control"] = get_cache_control(path)
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(str(full_path))
+    content_type = content_type or "application/octet-stream"
+
+    if getattr(settings, "MEDIA_SERVE_MODE", "sendfile") == "x-accel":
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+        # Percent-encoding: иначе Django закодирует не-ASCII имя в MIME (=?utf-8?...?=), и nginx его не найдет
+        response["X-Accel-Redirect"] = quote(prefix.rstrip("/") + "/" + path.lstrip("/"))
+    else:
+        byte_range = None
+        range_header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        if range_header and (if_range is None or if_range == etag):
+            byte_range = parse_range(range_header, stat.st_size)
+            if byte_range is None and RANGE_RE.match(range_header.strip()):
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+
+        if byte_range is None:
+            response = FileResponse(open(full_path, "rb"), content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                iter_file_range(full_path, start, length), status=206, content_type=content_type
+            )
+            response["Content-Length"] = str(length)
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = get_cache_control(path)
+    return response
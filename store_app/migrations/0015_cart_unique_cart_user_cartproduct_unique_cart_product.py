@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    """ Сливает дубли корзин пользователя и позиций корзины перед добавлением ограничений """
+    Cart = apps.get_model('store_app', 'Cart')
+    CartProduct = apps.get_model('store_app', 'CartProduct')
+
+    duplicate_users = (
+        Cart.objects.values('user').annotate(carts=Count('id'), keep=Min('id')).filter(carts__gt=1)
+    )
+    for row in duplicate_users:
+        extra_carts = Cart.objects.filter(user=row['user']).exclude(id=row['keep'])
+        CartProduct.objects.filter(cart__in=extra_carts).update(cart=row['keep'])
+        extra_carts.delete()
+
+    duplicate_lines = (
+        CartProduct.objects.values('cart', 'product')
+        .annotate(lines=Count('id'), keep=Min('id'), total=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for row in duplicate_lines:
+        lines = CartProduct.objects.filter(cart=row['cart'], product=row['product'])
+        lines.exclude(id=row['keep']).delete()
+        lines.update(quantity=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store_app', '0014_product_product_name_price_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user',), name='unique_cart_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartproduct',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='unique_cart_product'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:00
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_search_objects(apps, schema_editor):
+    """ Триггер поддержки search_vector и GIN-индексы (только PostgreSQL) """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE TRIGGER store_app_product_search_vector_update "
+        "BEFORE INSERT OR UPDATE OF name ON store_app_product "
+        "FOR EACH ROW EXECUTE FUNCTION "
+        "tsvector_update_trigger(search_vector, 'pg_catalog.russian', name)"
+    )
+    schema_editor.execute(
+        "UPDATE store_app_product SET search_vector = to_tsvector('pg_catalog.russian', name)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX product_search_vector_gin ON store_app_product USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX product_name_trgm_gin ON store_app_product USING gin (name gin_trgm_ops)"
+    )
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS product_name_trgm_gin")
+    schema_editor.execute("DROP INDEX IF EXISTS product_search_vector_gin")
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS store_app_product_search_vector_update ON store_app_product"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store_app', '0016_product_subcategory_price_name_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
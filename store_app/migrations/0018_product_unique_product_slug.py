@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:00
+
+from itertools import count
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def rename_duplicate_slugs(apps, schema_editor):
+    """
+    Делает slug продуктов уникальными перед добавлением ограничения: первый
+    по id продукт сохраняет slug, остальные получают суффикс -<id>. Продукты
+    не сливаются — на них могут ссылаться корзины.
+    """
+    Product = apps.get_model('store_app', 'Product')
+    max_length = Product._meta.get_field('slug').max_length
+
+    duplicates = (
+        Product.objects.values('slug').annotate(products=Count('id'), keep=Min('id')).filter(products__gt=1)
+    )
+    for row in duplicates:
+        for product in Product.objects.filter(slug=row['slug']).exclude(id=row['keep']).only('id', 'slug'):
+            for attempt in count():
+                suffix = f"-{product.id}" if attempt == 0 else f"-{product.id}-{attempt}"
+                slug = f"{row['slug'][:max_length - len(suffix)]}{suffix}"
+                if not Product.objects.filter(slug=slug).exists():
+                    break
+            Product.objects.filter(id=product.id).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store_app', '0017_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_slugs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('slug',), name='unique_product_slug'),
+        ),
+    ]
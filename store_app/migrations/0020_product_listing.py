@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store_app', '0019_product_image_image_variants_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID продукта')),
+                ('name', models.CharField(max_length=100, verbose_name='Название продукта')),
+                ('slug', models.SlugField(db_index=False)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена продукта')),
+                ('subcategory_id', models.BigIntegerField(db_index=True)),
+                ('subcategory_slug', models.SlugField(db_index=False)),
+                ('subcategory_name', models.CharField(max_length=50)),
+                ('category_id', models.BigIntegerField(db_index=True)),
+                ('category_slug', models.SlugField(db_index=False)),
+                ('category_name', models.CharField(max_length=50)),
+                ('images', models.JSONField(default=dict, verbose_name='URL изображений')),
+            ],
+            options={
+                'verbose_name': 'Строка списка продуктов',
+                'verbose_name_plural': 'Список продуктов',
+                'ordering': ['name', 'price'],
+                'indexes': [
+                    models.Index(fields=['name', 'price', 'id'], name='listing_name_price_id_idx'),
+                    models.Index(fields=['subcategory_slug', 'price'], name='listing_subcategory_price_idx'),
+                    models.Index(fields=['subcategory_slug', 'name'], name='listing_subcategory_name_idx'),
+                    models.Index(fields=['category_slug', 'price'], name='listing_category_price_idx'),
+                    models.Index(fields=['category_slug', 'name'], name='listing_category_name_idx'),
+                ],
+            },
+        ),
+    ]
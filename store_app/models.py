@@ -1,5 +1,8 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
 
 
 class Category(models.Model):
@@ -16,6 +19,12 @@ class Category(models.Model):
         null=False,
         verbose_name="Изображение категории"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Варианты изображения"
+    )
 
     class Meta:
         verbose_name = "Категория"
@@ -40,6 +49,12 @@ class SubCategory(models.Model):
         null=False,
         verbose_name="Изображение подкатегории"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Варианты изображения"
+    )
     category = models.ForeignKey(
         Category,
         on_delete=models.CASCADE,
@@ -67,6 +82,18 @@ class Product(models.Model):
         decimal_places=2,
         verbose_name="Цена продукта"
     )
+    image = models.ImageField(
+        upload_to="images/",
+        null=True,
+        blank=True,
+        verbose_name="Исходное изображение"
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Варианты изображения"
+    )
     image_small = models.ImageField(
         upload_to="images/",
         null=True,
@@ -87,11 +114,59 @@ class Product(models.Model):
         on_delete=models.CASCADE,
         related_name="products"
     )
+    # Заполняется триггером PostgreSQL (см. миграцию 0017), там же GIN-индексы
+    # по search_vector и по name с gin_trgm_ops
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
         ordering = ["name", "price"]
+        constraints = [
+            models.UniqueConstraint(fields=["slug"], name="unique_product_slug"),
+        ]
+        indexes = [
+            models.Index(fields=["name", "price", "id"], name="product_name_price_id_idx"),
+            models.Index(fields=["subcategory", "price"], name="product_subcategory_price_idx"),
+            models.Index(fields=["subcategory", "name"], name="product_subcategory_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.price}"
+
+
+class ProductListing(models.Model):
+    """
+    Денормализованная строка списка продуктов (read model для ProductsView).
+
+    Хранит названия и slug категории и подкатегории и готовые URL изображений,
+    поэтому список читается из одной таблицы без JOIN. id совпадает с id
+    продукта; строки поддерживаются сигналами (store_app.listing) и
+    пересобираются командой refresh_product_listing.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID продукта")
+    name = models.CharField(max_length=100, verbose_name="Название продукта")
+    slug = models.SlugField(db_index=False)
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена продукта")
+    subcategory_id = models.BigIntegerField(db_index=True)
+    subcategory_slug = models.SlugField(db_index=False)
+    subcategory_name = models.CharField(max_length=50)
+    category_id = models.BigIntegerField(db_index=True)
+    category_slug = models.SlugField(db_index=False)
+    category_name = models.CharField(max_length=50)
+    images = models.JSONField(default=dict, verbose_name="URL изображений")
+
+    class Meta:
+        verbose_name = "Строка списка продуктов"
+        verbose_name_plural = "Список продуктов"
+        ordering = ["name", "price"]
+        indexes = [
+            models.Index(fields=["name", "price", "id"], name="listing_name_price_id_idx"),
+            models.Index(fields=["subcategory_slug", "price"], name="listing_subcategory_price_idx"),
+            models.Index(fields=["subcategory_slug", "name"], name="listing_subcategory_name_idx"),
+            models.Index(fields=["category_slug", "price"], name="listing_category_price_idx"),
+            models.Index(fields=["category_slug", "name"], name="listing_category_name_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name}: {self.price}"
@@ -111,11 +186,110 @@ class Cart(models.Model):
     class Meta:
         verbose_name = "Корзина"
         verbose_name_plural = "Корзины"
+        constraints = [
+            models.UniqueConstraint(fields=["user"], name="unique_cart_user"),
+        ]
 
     def __str__(self):
         return f"Корзина пользователя с ID: {self.user}"
 
 
+class CartProductQuerySet(models.QuerySet):
+    """ Запросы к товарам корзины с подсчетом сумм на стороне БД """
+    line_total_expression = ExpressionWrapper(
+        F("quantity") * F("product__price"),
+        output_field=DecimalField(max_digits=20, decimal_places=4)
+    )
+
+    def summary_aggregates(self) -> dict:
+        zero = Value(0, output_field=DecimalField(max_digits=20, decimal_places=4))
+        return {
+            "total_quantity": Coalesce(Sum("quantity"), zero),
+            "total_cost": Coalesce(Sum(self.line_total_expression), zero),
+        }
+
+    def summary(self) -> dict:
+        """ Считает общее количество и стоимость товаров одним агрегирующим запросом """
+        return self.aggregate(**self.summary_aggregates())
+
+    async def asummary(self) -> dict:
+        return await self.aaggregate(**self.summary_aggregates())
+
+    def add_quantity(self, cart, product_id: int, quantity) -> "CartProduct":
+        """
+        Атомарно добавляет quantity к позиции корзины одним запросом.
+
+        На PostgreSQL и SQLite используется INSERT ... ON CONFLICT DO UPDATE
+        по уникальной паре (cart, product), поэтому параллельные добавления
+        не теряют обновлений и не создают дублей.
+        """
+        line, = self.add_quantities(cart, {product_id: quantity})
+        return line
+
+    def add_quantities(self, cart, quantities: dict) -> list["CartProduct"]:
+        """
+        Атомарно добавляет количества {product_id: quantity} к позициям корзины.
+
+        Один многострочный INSERT ... ON CONFLICT DO UPDATE SET
+        quantity = quantity + EXCLUDED.quantity: строка, вставленная
+        параллельным запросом, увеличивается, а не перезаписывается.
+        """
+        if not quantities:
+            return []
+        db = router.db_for_write(self.model)
+        connection = connections[db]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            return [
+                self._add_quantity_fallback(cart, product_id, quantity)
+                for product_id, quantity in quantities.items()
+            ]
+
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        cart_column = qn(opts.get_field("cart").column)
+        product_column = qn(opts.get_field("product").column)
+        quantity_column = qn(opts.get_field("quantity").column)
+        values = ", ".join(["(%s, %s, %s)"] * len(quantities))
+        sql = (
+            f"INSERT INTO {table} ({cart_column}, {product_column}, {quantity_column}) "
+            f"VALUES {values} "
+            f"ON CONFLICT ({cart_column}, {product_column}) "
+            f"DO UPDATE SET {quantity_column} = {table}.{quantity_column} + EXCLUDED.{quantity_column} "
+            f"RETURNING {qn(opts.pk.column)}, {product_column}, {quantity_column}"
+        )
+        params = [
+            value
+            for product_id, quantity in quantities.items()
+            for value in (cart.pk, product_id, quantity)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        return [
+            self.model(
+                pk=pk,
+                cart=cart,
+                product_id=product_id,
+                quantity=opts.get_field("quantity").to_python(total),
+            )
+            for pk, product_id, total in rows
+        ]
+
+    def _add_quantity_fallback(self, cart, product_id: int, quantity) -> "CartProduct":
+        """ Инкремент через UPDATE ... SET quantity = quantity + n для остальных СУБД """
+        lines = self.filter(cart=cart, product_id=product_id)
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            if not lines.update(quantity=F("quantity") + quantity):
+                try:
+                    with transaction.atomic(using=router.db_for_write(self.model)):
+                        return self.create(cart=cart, product_id=product_id, quantity=quantity)
+                except IntegrityError:
+                    lines.update(quantity=F("quantity") + quantity)
+            return lines.get()
+
+
 class CartProduct(models.Model):
     """ Модель связи продукта и корзины """
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -126,6 +300,11 @@ class CartProduct(models.Model):
         verbose_name="Количество"
     )
 
+    objects = CartProductQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Товар в корзине"
         verbose_name_plural = "Товары в корзине"
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"], name="unique_cart_product"),
+        ]
@@ -1,9 +1,178 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from decimal import Decimal, InvalidOperation
 
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-class CategoryPagination(PageNumberPagination):
+from .counts import CachedCountPaginator
+from .filters import PRODUCT_SORT_FIELDS
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Постраничная пагинация без COUNT(*) по большим выборкам.
+
+    Число строк берется из оценки планировщика PostgreSQL, если она не меньше
+    ESTIMATED_COUNT_THRESHOLD (тогда count_is_estimated = true в ответе);
+    точные числа кешируются по комбинации фильтров на COUNT_CACHE_TIMEOUT секунд.
+    """
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["count_is_estimated"] = self.page.paginator.count_is_estimated
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_estimated"] = {
+            "type": "boolean",
+            "description": "count — оценка планировщика, а не точное число",
+        }
+        return response_schema
+
+
+class CategoryPagination(EstimatedCountPagination):
     page_size = 10
 
 
-class ProductPagination(PageNumberPagination):
-    page_size = 30
\ No newline at end of file
+class ProductPagination(EstimatedCountPagination):
+    page_size = 30
+
+
+class ProductCursorPagination(BasePagination):
+    """
+    Keyset-пагинация продуктов в порядке выбранной сортировки (?sort=,
+    по умолчанию (name, price, id)); id в конце порядка делает ключ уникальным.
+
+    Не выполняет COUNT(*) и OFFSET: каждая страница выбирается условием
+    "строго после/до ключа" по составному индексу, поэтому страница N
+    стоит столько же, сколько первая. Курсоры непрозрачные (base64 от JSON).
+    """
+    page_size = 30
+    cursor_query_param = "cursor"
+    page_query_param = "page"
+    invalid_cursor_message = "Неверный курсор"
+    default_ordering = PRODUCT_SORT_FIELDS["name"]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position = self.decode_cursor(request)
+        return self.set_page(list(self.get_page_queryset(queryset, position)), position)
+
+    def get_ordering(self, queryset) -> tuple:
+        """ Порядок из filter_products (одна из PRODUCT_SORT_FIELDS) или порядок по умолчанию """
+        ordering = tuple(queryset.query.order_by)
+        return ordering if ordering in PRODUCT_SORT_FIELDS.values() else self.default_ordering
+
+    def get_page_queryset(self, queryset, position):
+        """ Запрос страницы: page_size + 1 строк после/до ключа курсора """
+        key, reverse = position or (None, False)
+        ordering = self.get_ordering(queryset)
+
+        if reverse:
+            queryset = queryset.order_by(*(
+                field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+            ))
+        else:
+            queryset = queryset.order_by(*ordering)
+
+        if key is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, key, reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results: list, position) -> list:
+        """ Отрезает лишнюю строку и вычисляет наличие соседних страниц """
+        key, reverse = position or (None, False)
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = key is not None
+
+        self.page = results
+        return results
+
+    @staticmethod
+    def get_keyset_filter(ordering, key: dict, reverse: bool) -> Q:
+        """
+        Условие "кортеж полей ordering после key" (до key при обратном обходе):
+        (a > ka) OR (a = ka AND b > kb) OR (a = ka AND b = kb AND c > kc),
+        где > заменяется на < для полей по убыванию.
+        """
+        condition, prefix = Q(), {}
+        for field in ordering:
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            op = "lt" if descending != reverse else "gt"
+            condition |= Q(**prefix, **{f"{name}__{op}": key[name]})
+            prefix[name] = key[name]
+
+        # Первое условие дублирует ведущую колонку индекса,
+        # чтобы планировщик мог начать range-скан с нужного значения.
+        leading = ordering[0]
+        bound = "lte" if leading.startswith("-") != reverse else "gte"
+        return Q(**{f"{leading.lstrip('-')}__{bound}": key[leading.lstrip("-")]}) & condition
+
+    def decode_cursor(self, request):
+        """ Разбирает курсор из query-параметров; None — первая страница """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            key = {"name": str(payload["n"]), "price": Decimal(payload["p"]), "id": int(payload["i"])}
+            reverse = bool(payload.get("r", False))
+        except (TypeError, ValueError, KeyError, InvalidOperation, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return key, reverse
+
+    @staticmethod
+    def encode_cursor(obj, reverse: bool) -> str:
+        payload = {"n": obj.name, "p": str(obj.price), "i": obj.id}
+        if reverse:
+            payload["r"] = True
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def get_link(self, obj, reverse: bool) -> str:
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
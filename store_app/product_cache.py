@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Product
+
+
+def get_image_url(field):
+    """ Возвращает URL изображения или None, если файл не задан """
+    if field and hasattr(field, 'url'):
+        return field.url
+    return None
+
+
+def get_image_urls(product: Product) -> dict:
+    """ URL изображений продукта по размерам: общий формат для ProductSerializer и снимков корзины """
+    return {
+        "small": get_image_url(product.image_small),
+        "medium": get_image_url(product.image_medium),
+        "large": get_image_url(product.image_large),
+    }
+
+
+class ProductSnapshotCache:
+    """
+    Ограниченный LRU-кеш снимков продуктов в памяти процесса.
+
+    Снимок — словарь с name, price и URL изображений. Позволяет гидрировать
+    строки корзины одним multi-get вместо JOIN с таблицей продуктов.
+    Записи сбрасываются сигналом при сохранении/удалении продукта в этом
+    процессе, а ttl ограничивает устаревание данных в остальных воркерах.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_snapshot(product: Product) -> dict:
+        return {
+            "name": product.name,
+            "price": product.price,
+            "images": get_image_urls(product),
+        }
+
+    def get_many(self, product_ids) -> dict:
+        """ Возвращает {product_id: снимок}; промахи догружаются одним запросом """
+        now = time.monotonic()
+        found, missing = {}, []
+
+        with self._lock:
+            for product_id in set(product_ids):
+                entry = self._entries.get(product_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(product_id)
+                    found[product_id] = entry[1]
+                else:
+                    missing.append(product_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            loaded = {
+                product.pk: self.make_snapshot(product)
+                for product in Product.objects.filter(id__in=missing).only(
+                    "name", "price", "image_small", "image_medium", "image_large"
+                )
+            }
+            with self._lock:
+                for product_id, snapshot in loaded.items():
+                    self._entries[product_id] = (now + self.ttl, snapshot)
+                    self._entries.move_to_end(product_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, product_id) -> None:
+        with self._lock:
+            self._entries.pop(product_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+            }
+
+
+product_cache = ProductSnapshotCache(
+    maxsize=getattr(settings, "PRODUCT_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "PRODUCT_CACHE_TTL", 60),
+)
+
+
+def attach_product_snapshots(lines):
+    """
+    Проставляет строкам корзины product_name, product_price и line_total
+    из кеша снимков. Строки с удаленными продуктами отбрасываются.
+    """
+    snapshots = product_cache.get_many(line.product_id for line in lines)
+    hydrated = []
+    for line in lines:
+        snapshot = snapshots.get(line.product_id)
+        if snapshot is None:
+            continue
+        line.product_name = snapshot["name"]
+        line.product_price = snapshot["price"]
+        line.line_total = line.quantity * snapshot["price"]
+        hydrated.append(line)
+    return hydrated
@@ -0,0 +1,54 @@
+"""
+Плагин pytest: проверка постоянства числа SQL-запросов (защита от N+1).
+
+Тест, запросивший фикстуру scaling_endpoint, параметризуется всеми
+эндпоинтами из store_app.query_guard.scaling_endpoints; фикстура
+assert_constant_queries прогоняет сценарий на --query-guard-sizes строк
+(по умолчанию 1, 10, 100) и при росте числа запросов падает с отчетом
+о растущих запросах и стеками вызовов в коде проекта.
+"""
+from functools import partial
+
+import pytest
+
+from store_app import query_guard
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("query-guard", "Проверка постоянства числа SQL-запросов")
+    group.addoption(
+        "--query-guard-sizes",
+        default="1,10,100",
+        help="Число строк в прогонах через запятую (по умолчанию 1,10,100)",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "query_guard: проверка постоянства числа SQL-запросов")
+
+
+def pytest_generate_tests(metafunc):
+    if "scaling_endpoint" in metafunc.fixturenames:
+        endpoints = query_guard.scaling_endpoints
+        metafunc.parametrize("scaling_endpoint", list(endpoints.values()), ids=list(endpoints))
+
+
+@pytest.fixture
+def query_guard_sizes(request) -> tuple:
+    return tuple(int(size) for size in request.config.getoption("query_guard_sizes").split(","))
+
+
+@pytest.fixture
+def query_guard_reset():
+    """ Сброс кешей перед каждым замером; conftest проекта может переопределить """
+    from django.core.cache import caches
+
+    def reset():
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+    return reset
+
+
+@pytest.fixture
+def assert_constant_queries(db, query_guard_sizes, query_guard_reset):
+    return partial(query_guard.assert_constant_queries, sizes=query_guard_sizes, reset=query_guard_reset)
@@ -0,0 +1,183 @@
+import os
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import reverse
+
+# Кадров стека в отчете на один запрос и из них — ближайших к запросу кадров библиотек
+STACK_LIMIT = 10
+ORIGIN_FRAMES = 3
+
+# Эндпоинты, которые проверяет плагин pytest (store_app.pytest_query_guard)
+scaling_endpoints = {}
+
+
+class QueryCountGrowth(AssertionError):
+    """ Число SQL-запросов эндпоинта растет вместе с числом строк (N+1) """
+
+
+def normalize_sql(sql: str) -> str:
+    """ Приводит запрос к шаблону: списки IN (%s, %s, ...) и литералы схлопываются """
+    sql = re.sub(r"\((?:\s*%s\s*,)+\s*%s\s*\)", "(...)", sql)
+    sql = re.sub(r"'[^']*'", "?", sql)
+    return re.sub(r"\b\d+\b", "?", sql)
+
+
+def is_project_frame(frame) -> bool:
+    path = Path(frame.filename)
+    return path.is_relative_to(settings.BASE_DIR) and "site-packages" not in path.parts
+
+
+def is_internal_frame(frame, wrappers: set) -> bool:
+    """ Кадры бэкенда БД, execute_wrapper'ов и самого рекордера """
+    return (
+        frame.filename == __file__
+        or (frame.filename, frame.name) in wrappers
+        or f"{os.sep}django{os.sep}db{os.sep}" in frame.filename
+    )
+
+
+def get_query_stack(connection) -> traceback.StackSummary:
+    """
+    Стек запроса для отчета: кадры кода проекта и ближайшие к запросу кадры
+    библиотек (например, шаблон админки, вызвавший __str__), без внутренностей ORM.
+    """
+    wrappers = {
+        (wrapper.__code__.co_filename, wrapper.__code__.co_name)
+        for wrapper in connection.execute_wrappers if hasattr(wrapper, "__code__")
+    }
+    frames = [frame for frame in traceback.extract_stack() if not is_internal_frame(frame, wrappers)]
+    origin = frames[-ORIGIN_FRAMES:]
+    return traceback.StackSummary.from_list(
+        [frame for frame in frames if is_project_frame(frame) or frame in origin][-STACK_LIMIT:]
+    )
+
+
+class QueryRecorder:
+    """
+    Записывает SQL-запросы вместе со стеком вызова в коде проекта.
+
+    Подключается к соединениям через execute_wrapper, поэтому DEBUG не нужен.
+    По стеку в отчете видно, какая строка кода породила запрос.
+    """
+
+    def __init__(self, using=(DEFAULT_DB_ALIAS,)):
+        self.using = using
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, get_query_stack(context["connection"])))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.using:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._stack.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def counts(self) -> Counter:
+        return Counter(normalize_sql(sql) for sql, stack in self.queries)
+
+    def last_stack(self, statement: str):
+        """ Стек последнего запроса по шаблону: первые часто приходят из аутентификации и т.п. """
+        return next(stack for sql, stack in reversed(self.queries) if normalize_sql(sql) == statement)
+
+
+def format_growth_report(runs: list) -> str:
+    """ Текст отчета: число запросов по размерам и растущие запросы со стеками """
+    lines = [
+        "Число SQL-запросов растет с числом строк: "
+        + ", ".join(f"{size} -> {len(recorder)}" for size, recorder in runs)
+    ]
+    (first_size, first), (last_size, last) = runs[0], runs[-1]
+    first_counts, last_counts = first.counts(), last.counts()
+    for statement, count in last_counts.most_common():
+        if count <= first_counts[statement]:
+            continue
+        lines += [
+            "",
+            f"x{first_counts[statement]} при {first_size}, x{count} при {last_size}: {statement}",
+            "".join(last.last_stack(statement).format()).rstrip(),
+        ]
+    return "\n".join(lines)
+
+
+def assert_constant_queries(run, populate, sizes=(1, 10, 100), reset=None, using=(DEFAULT_DB_ALIAS,)):
+    """
+    Проверяет, что run() выполняет одно и то же число запросов при любом объеме данных.
+
+    populate(start, stop) добавляет строки с номерами [start, stop), так что
+    перед замером размера size в базе size строк. Перед каждым замером
+    вызывается reset() (сброс кешей), а первый прогон — разогревочный:
+    ленивые кеши процесса (ContentType и т.п.) не должны попадать в разницу.
+    """
+    previous = 0
+    runs = []
+    for size in sizes:
+        populate(previous, size)
+        previous = size
+        if not runs:
+            if reset is not None:
+                reset()
+            run()
+        if reset is not None:
+            reset()
+        with QueryRecorder(using) as recorder:
+            run()
+        runs.append((size, recorder))
+
+    if len({len(recorder) for size, recorder in runs}) > 1:
+        raise QueryCountGrowth(format_growth_report(runs))
+    return len(runs[0][1])
+
+
+class ScalingEndpoint:
+    """ Эндпоинт для проверки постоянства числа запросов: запрос и наполнение данными """
+
+    def __init__(self, name: str, url: str, populate, method: str = "get", params=None, data=None):
+        self.name = name
+        self.url = url
+        self.populate = populate
+        self.method = method
+        self.params = params
+        self.data = data
+
+    def __repr__(self):
+        return f"<ScalingEndpoint {self.name}>"
+
+    def request(self, client):
+        path = reverse(self.url)
+        if self.method == "get":
+            response = client.get(path, self.params)
+        else:
+            response = getattr(client, self.method)(path, self.data, format="json")
+        if response.status_code >= 400:
+            raise AssertionError(f"{self.method.upper()} {path}: статус {response.status_code}")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+
+def register_scaling_endpoint(name: str, url: str, method: str = "get", params=None, data=None):
+    """
+    Декоратор: регистрирует populate(client, start, stop) как наполнение эндпоинта.
+
+    populate добавляет строки [start, stop), которые попадают в ответ эндпоинта
+    url (имя маршрута), и при необходимости аутентифицирует client.
+    """
+    def decorator(populate):
+        scaling_endpoints[name] = ScalingEndpoint(name, url, populate, method, params, data)
+        return populate
+    return decorator
@@ -0,0 +1,45 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections, router
+from django.db.models import F, Q
+
+from .models import Product
+
+
+SEARCH_CONFIG = "russian"
+
+
+class PostgresProductSearch:
+    """
+    Полнотекстовый поиск по Product.search_vector с добором опечаток через pg_trgm.
+
+    Оба условия (@@ по GIN-индексу search_vector и % по GIN-индексу name
+    gin_trgm_ops) индексируемые, результаты ранжируются SearchRank,
+    а при равном ранге — по похожести названия.
+    """
+    def search(self, queryset, query: str):
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(Q(search_vector=search_query) | Q(name__trigram_similar=query))
+            .annotate(
+                rank=SearchRank(F("search_vector"), search_query),
+                similarity=TrigramSimilarity("name", query),
+            )
+            .order_by("-rank", "-similarity", "id")
+        )
+
+
+class SimpleProductSearch:
+    """ Запасной поиск для SQLite (тесты): все слова запроса должны входить в название """
+    def search(self, queryset, query: str):
+        condition = Q()
+        for term in query.split():
+            condition &= Q(name__icontains=term)
+        return queryset.filter(condition).order_by("name", "id")
+
+
+def get_product_search():
+    """ Выбирает движок поиска по СУБД, на которой хранятся продукты """
+    connection = connections[router.db_for_read(Product)]
+    if connection.vendor == "postgresql":
+        return PostgresProductSearch()
+    return SimpleProductSearch()
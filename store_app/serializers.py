@@ -1,22 +1,35 @@
 from rest_framework import serializers
 
-from .models import Category, SubCategory, Product, CartProduct, Cart
+from .cart_storage import OP_ADD, OP_SET, OP_REMOVE, get_cart_storage
+from .filters import PRODUCT_SORT_FIELDS
+from .images import variant_urls
+from .models import Category, SubCategory, Product, CartProduct
+from .product_cache import get_image_urls, product_cache
 
 
+class ImageVariantsField(serializers.ReadOnlyField):
+    """ Карта вариантов изображения {размер: {формат: URL}} """
+    def to_representation(self, value):
+        return variant_urls(value)
+
 
 class SubCategorySerializer(serializers.ModelSerializer):
     """ Сериализатор для подкатегорий """
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = SubCategory
-        fields = ["id", "name", "slug", "image"]
+        fields = ["id", "name", "slug", "image", "image_variants"]
 
 
 class CategoriesWithSubcategoriesSerializer(serializers.ModelSerializer):
     """ Сериализатор для категорий с подкатегориями """
     subcategories = SubCategorySerializer(many=True, read_only=True)
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Category
-        fields = ["id", "name", "slug", "image", "subcategories"]
+        fields = ["id", "name", "slug", "image", "image_variants", "subcategories"]
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -30,25 +43,43 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "slug", "price", "category", "subcategory", "images"]
 
     def get_images(self, obj: Product):
-        """ Возвращает словарь с URL изображений разных размеров """
+        """
+        Возвращает словарь с URL изображений разных размеров и, в variants,
+        URL сгенерированных вариантов во всех форматах (jpeg/webp/avif)
+        """
+        return {**get_image_urls(obj), "variants": variant_urls(obj.image_variants)}
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """ Валидирует query-параметры фильтрации и сортировки списка продуктов """
+    category = serializers.SlugField(required=False)
+    subcategory = serializers.SlugField(required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    sort = serializers.ChoiceField(choices=list(PRODUCT_SORT_FIELDS), required=False)
+    facets = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        min_price, max_price = attrs.get("min_price"), attrs.get("max_price")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError("min_price не может быть больше max_price")
+        return attrs
 
-        def get_image_url(field):
-            if field and hasattr(field, 'url'):
-                return field.url
-            return None
 
-        return {
-            "small": get_image_url(obj.image_small),
-            "medium": get_image_url(obj.image_medium),
-            "large": get_image_url(obj.image_large),
-        }
+class ProductSearchSerializer(serializers.Serializer):
+    """ Валидирует параметры поиска продуктов """
+    q = serializers.CharField(min_length=2, max_length=100, trim_whitespace=True)
 
 
 class CartProductSerializer(serializers.ModelSerializer):
-    """ Сериализатор для продуктов в корзине """
-    product_name = serializers.CharField(source="product.name", read_only=True)
+    """
+    Сериализатор для продуктов в корзине.
+
+    product_name и product_price берутся из кеша снимков продуктов
+    (см. attach_product_snapshots), а не через JOIN с таблицей продуктов.
+    """
+    product_name = serializers.CharField(read_only=True)
     product_price = serializers.DecimalField(
-        source="product.price",
         max_digits=10,
         decimal_places=2,
         read_only=True
@@ -58,6 +89,14 @@ class CartProductSerializer(serializers.ModelSerializer):
         fields = ["id", "product", "quantity", "product_name", "product_price"]
 
 
+class CartProductLineSerializer(CartProductSerializer):
+    """ Сериализатор строки корзины со стоимостью позиции quantity * price """
+    line_total = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+
+    class Meta(CartProductSerializer.Meta):
+        fields = CartProductSerializer.Meta.fields + ["line_total"]
+
+
 class AddToCartSerializer(serializers.ModelSerializer):
     """ Сериализатор для добавления продуктов в корзину"""
     product_id = serializers.IntegerField(write_only=True)
@@ -72,18 +111,56 @@ class AddToCartSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Количество должно быть больше 0")
         return value
 
+    @staticmethod
+    def validate_product_id(value):
+        # Снимок продукта нужен и для ответа, поэтому проверка обычно не стоит запроса
+        if not product_cache.get_many([value]):
+            raise serializers.ValidationError("Продукт не найден")
+        return value
+
     def create(self, validated_data):
         user = self.context["request"].user
-        cart, created = Cart.objects.get_or_create(user=user)
         product_id = validated_data["product_id"]
         quantity = validated_data["quantity"]
 
-        product_cart, created = CartProduct.objects.get_or_create(
-            cart=cart,
-            product_id=product_id,
-            defaults={"quantity": quantity}
-        )
-        if not created:
-            product_cart.quantity += quantity
-            product_cart.save()
-        return product_cart
+        return get_cart_storage().add(user, product_id, quantity)
+
+
+class CartBatchOperationSerializer(serializers.Serializer):
+    """ Одна операция пакетного изменения корзины """
+    product_id = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    op = serializers.ChoiceField(choices=[OP_ADD, OP_SET, OP_REMOVE], default=OP_ADD)
+
+    def validate(self, attrs):
+        if attrs["op"] != OP_REMOVE:
+            quantity = attrs.get("quantity")
+            if quantity is None:
+                raise serializers.ValidationError({"quantity": "Обязательное поле"})
+            if quantity <= 0:
+                raise serializers.ValidationError({"quantity": "Количество должно быть больше 0"})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Сериализатор пакетного изменения корзины.
+
+    Все product_id проверяются одним запросом с IN, операции применяются
+    хранилищем корзин (для ORM — в одной транзакции через bulk_create/bulk_update
+    и один DELETE).
+    """
+    operations = CartBatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        product_ids = {operation["product_id"] for operation in operations}
+        existing = set(Product.objects.filter(id__in=product_ids).values_list("id", flat=True))
+        missing = sorted(product_ids - existing)
+        if missing:
+            raise serializers.ValidationError(f"Продукты не найдены: {missing}")
+        return operations
+
+    def save(self):
+        user = self.context["request"].user
+        get_cart_storage().apply(user, self.validated_data["operations"])
+        return user
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .cache import bump_catalog_version
+from .cart_storage import get_cart_storage
+from .images import schedule_variants
+from .instrumentation import install_query_recorder
+from .listing import sync_category, sync_products, sync_subcategory
+from .models import Category, SubCategory, Product
+from .product_cache import product_cache
+from .token_cache import token_cache
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SubCategory)
+def invalidate_catalog_cache(sender, **kwargs):
+    """ Инвалидирует кеш дерева категорий при изменении категорий и подкатегорий """
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_snapshot(sender, instance, **kwargs):
+    """ Сбрасывает снимок продукта в кеше процесса при его изменении """
+    product_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def sync_product_listing(sender, instance, **kwargs):
+    """ Обновляет строку продукта в денормализованном списке (удаленный продукт — удаляет) """
+    sync_products([instance.pk])
+
+
+@receiver(post_save, sender=SubCategory)
+def sync_subcategory_listing(sender, instance, created=False, **kwargs):
+    """ Переносит название и категорию подкатегории в строки ее продуктов """
+    if not created:
+        sync_subcategory(instance)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_listing(sender, instance, created=False, **kwargs):
+    """ Переносит название и slug категории в строки ее продуктов """
+    if not created:
+        sync_category(instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token_user(sender, instance, **kwargs):
+    """ Сбрасывает снимок пользователя удаленного токена в кеше аутентификации """
+    token_cache.invalidate(instance.key)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created=False, update_fields=None, **kwargs):
+    """ Сбрасывает кеш аутентификации при изменении пользователя (деактивация, права) """
+    if created or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    token_cache.invalidate_user(instance.pk, Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Product)
+def build_image_variants(sender, instance, **kwargs):
+    """ Запускает построение вариантов изображения после загрузки нового исходника """
+    schedule_variants(instance)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """ Подключает подсчет SQL-запросов для метрик запроса к каждому новому соединению """
+    install_query_recorder(connection)
+
+
+@receiver(setting_changed)
+def reset_cart_storage(setting, **kwargs):
+    """ Пересоздает хранилище корзин при изменении настройки CART_STORAGE (в тестах) """
+    if setting == "CART_STORAGE":
+        get_cart_storage.cache_clear()
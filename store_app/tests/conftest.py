@@ -1,12 +1,39 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from store_app.models import Category, SubCategory, Product
+from store_app.product_cache import product_cache
+from store_app.token_cache import token_cache
 
 from rest_framework.test import APIClient
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def disable_image_pipeline(settings):
+    """Отключает генерацию вариантов изображений, чтобы тесты не писали в media/"""
+    settings.IMAGE_PIPELINE_ENABLED = False
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    """Превышение query_budget вьюхи роняет тест"""
+    settings.QUERY_BUDGET_MODE = "raise"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищает кеши между тестами"""
+    cache.clear()
+    product_cache.clear()
+    token_cache.clear()
+    yield
+    cache.clear()
+    product_cache.clear()
+    token_cache.clear()
+
+
 @pytest.fixture
 def user(db):
     """Создаёт тестового пользователя"""
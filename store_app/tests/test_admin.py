@@ -0,0 +1,107 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.urls import reverse
+
+from store_app import counts
+from store_app.models import Product
+
+User = get_user_model()
+
+
+@pytest.fixture
+def admin_client(client, db):
+    admin = User.objects.create_superuser(username="admin", password="adminpass1")
+    client.force_login(admin)
+    return client
+
+
+@pytest.mark.django_db
+def test_product_changelist_filters(admin_client, product, subcategory):
+    """ Тест фильтров по ценовому диапазону и slug категории вместо списков всех значений """
+    Product.objects.create(name="Сыр", slug="syr", price=700, subcategory=subcategory)
+    url = reverse("admin:store_app_product_changelist")
+
+    response = admin_client.get(url, {"price_range": "0"})
+    assert [item.slug for item in response.context["cl"].result_list] == [product.slug]
+
+    response = admin_client.get(url, {"category": "other-category"})
+    assert response.context["cl"].result_count == 0
+
+    response = admin_client.get(url, {"category": subcategory.category.slug, "price_range": "2"})
+    assert [item.slug for item in response.context["cl"].result_list] == ["syr"]
+    assert "500-1000" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_performance_mode_uses_estimated_count(admin_client, product, settings, monkeypatch):
+    """ Тест режима производительности: число строк из оценки планировщика, без полного COUNT(*) """
+    monkeypatch.setattr(counts, "get_table_estimate", lambda model, using: 1_000_000)
+    settings.ADMIN_PERFORMANCE_MODE = True
+    url = reverse("admin:store_app_product_changelist")
+
+    response = admin_client.get(url)
+    changelist = response.context["cl"]
+    assert changelist.result_count == 1_000_000
+    assert changelist.show_full_result_count is False
+
+    response = admin_client.get(url, {"price_range": "0"})
+    assert response.context["cl"].result_count == 1
+
+    settings.ADMIN_PERFORMANCE_MODE = False
+    response = admin_client.get(url)
+    assert response.context["cl"].result_count == 1
+    assert response.context["cl"].show_full_result_count is True
+
+
+@pytest.mark.django_db
+def test_estimated_count_threshold(product, settings, monkeypatch):
+    """ Тест порога: маленькие таблицы и фильтры считаются точно """
+    monkeypatch.setattr(counts, "get_table_estimate", lambda model, using: 500)
+    assert counts.EstimatedCountPaginator(Product.objects.all(), 10).count == 1
+
+    settings.ESTIMATED_COUNT_THRESHOLD = 100
+    assert counts.EstimatedCountPaginator(Product.objects.all(), 10).count == 500
+    assert counts.EstimatedCountPaginator(Product.objects.filter(price__gt=0), 10).count == 1
+
+
+@pytest.mark.django_db
+def test_subcategory_autocomplete(admin_client, subcategory):
+    """ Тест автодополнения подкатегории в форме продукта вместо списка всех подкатегорий """
+    response = admin_client.get(reverse("admin:autocomplete"), {
+        "app_label": "store_app", "model_name": "product", "field_name": "subcategory", "term": "Мол",
+    })
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"id": str(subcategory.id), "text": str(subcategory)}]
+
+
+@pytest.mark.django_db
+def test_estimated_count_undercount(product, settings, monkeypatch):
+    """ Тест заниженной оценки: страницы за оценкой доступны, следующая определяется по лишней строке """
+    for index in range(2):
+        Product.objects.create(
+            name=f"Продукт {index}", slug=f"product-{index}", price=10, subcategory=product.subcategory
+        )
+    settings.ESTIMATED_COUNT_THRESHOLD = 1
+    monkeypatch.setattr(counts, "get_table_estimate", lambda model, using: 1)
+    paginator = counts.EstimatedCountPaginator(Product.objects.order_by("id"), 1)
+
+    assert paginator.num_pages == 1
+    assert paginator.page(1).has_next() is True
+    assert paginator.page(3).object_list[0].slug == "product-1"
+    assert paginator.page(3).has_next() is False
+    with pytest.raises(EmptyPage):
+        paginator.page(4)
+
+
+@pytest.mark.django_db
+def test_cached_count_async(product):
+    """ Тест асинхронного count: точное число считается и кешируется так же, как в синхронном пути """
+    paginator = counts.CachedCountPaginator(Product.objects.all(), 10)
+
+    assert async_to_sync(paginator.acount)() == 1
+    assert paginator.count == 1
+    assert cache.get(counts.get_count_cache_key(Product.objects.all())) == 1
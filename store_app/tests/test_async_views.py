@@ -0,0 +1,106 @@
+import json
+
+import msgpack
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from store_app.async_views import AsyncCartView
+from store_app.instrumentation import QueryBudgetExceeded
+from store_app.views import CategoriesView, ProductsView
+
+pytestmark = pytest.mark.urls("store_app.async_urls")
+
+
+def async_request(method, path, **kwargs):
+    """ Выполняет запрос через ASGI-обработчик и возвращает ответ """
+    return async_to_sync(getattr(AsyncClient(), method))(path, **kwargs)
+
+
+def sync_data(view, path):
+    """ Ответ синхронной DRF-вьюхи на тот же запрос, для сравнения """
+    response = view.as_view()(APIRequestFactory().get(path))
+    return json.loads(response.render().content)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?facets=true&sort=-price", "?pagination=cursor"])
+def test_async_products_match_sync(product, query):
+    """ Тест совпадения ответа async-списка продуктов с ProductsView """
+    response = async_request("get", reverse("products") + query)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == sync_data(ProductsView, reverse("products") + query)
+
+
+@pytest.mark.django_db
+def test_async_products_msgpack(product):
+    """ Тест выбора рендерера по Accept: MessagePack с теми же данными, что у ProductsView """
+    response = async_request("get", reverse("products"), headers={"Accept": "application/msgpack"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/msgpack"
+    assert "Accept" in response["Vary"]
+    assert msgpack.unpackb(response.content) == sync_data(ProductsView, reverse("products"))
+
+    response = async_request("get", reverse("products"), headers={"Accept": "text/csv"})
+    assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+
+@pytest.mark.django_db
+def test_async_products_invalid_page(product):
+    """ Тест ошибок пагинации и фильтров в async-списке продуктов """
+    assert async_request("get", reverse("products") + "?page=5").status_code == status.HTTP_404_NOT_FOUND
+    assert async_request("get", reverse("products") + "?min_price=-1").status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_async_categories_cached_with_etag(category, subcategory):
+    """ Тест async-списка категорий: совпадение с CategoriesView и ответ 304 """
+    response = async_request("get", reverse("categories"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == sync_data(CategoriesView, reverse("categories"))
+
+    response = async_request("get", reverse("categories"), headers={"If-None-Match": response["ETag"]})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_async_cart(user, product):
+    """ Тест async-корзины: аутентификация по токену, добавление, итоги, удаление """
+    url = reverse("cart")
+    assert async_request("get", url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    headers = {"Authorization": f"Token {Token.objects.create(user=user).key}"}
+    body = json.dumps({"product_id": product.id, "quantity": 2})
+    response = async_request("post", url, data=body, content_type="application/json", headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["quantity"] == "2.00"
+
+    async_request("post", url, data=body, content_type="application/json", headers=headers)
+    response = async_request("get", url, headers=headers)
+    assert response.json()["total_quantity"] == 4.0
+    assert response.json()["total_cost"] == pytest.approx(4 * 89.99)
+
+    body = json.dumps({"product_id": product.id, "quantity": 1})
+    response = async_request("put", url, data=body, content_type="application/json", headers=headers)
+    assert response.json()["quantity"] == "1.00"
+
+    response = async_request("delete", f"{url}?product_id={product.id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert async_request("get", url, headers=headers).json()["products"] == []
+
+
+@pytest.mark.django_db
+def test_async_query_budget(user, monkeypatch):
+    """ Тест бюджета запросов async-вьюх: проверяет тот же RequestMetricsMiddleware """
+    monkeypatch.setattr(AsyncCartView, "query_budget", {"get": 0})
+    headers = {"Authorization": f"Token {Token.objects.create(user=user).key}"}
+
+    with pytest.raises(QueryBudgetExceeded):
+        async_request("get", reverse("cart"), headers=headers)
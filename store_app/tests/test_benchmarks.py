@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from store_app.benchmarks.api import compare_results
+from store_app.benchmarks.data import seed_store
+from store_app.models import CartProduct, Product, SubCategory
+
+
+@pytest.mark.django_db
+def test_seed_store_is_idempotent():
+    """ Тест генератора данных: объемы и отсутствие дублей при повторном запуске """
+    stats = seed_store(categories=2, subcategories=2, products=50, users=3, lines_per_cart=4)
+    seed_store(categories=2, subcategories=2, products=50, users=3, lines_per_cart=4)
+
+    assert stats == {"categories": 2, "subcategories": 4, "products": 50, "users": 3, "carts": 3}
+    assert SubCategory.objects.count() == 4
+    assert Product.objects.count() == 50
+    assert CartProduct.objects.count() == 12
+
+
+def test_compare_results():
+    """ Тест сравнения прогонов: рост запросов и задержки выше допуска — регрессия """
+    baseline = {"scenarios": {"cart": {"queries": 3, "p50_ms": 10.0, "p95_ms": 20.0}}}
+    same = {"scenarios": {"cart": {"queries": 3, "p50_ms": 11.0, "p95_ms": 20.5}}}
+    slower = {"scenarios": {"cart": {"queries": 4, "p50_ms": 15.0, "p95_ms": 20.0}}}
+
+    assert compare_results(baseline, same) == []
+    assert compare_results(baseline, slower) == ["cart: SQL-запросов 3 -> 4", "cart: p50_ms 10.00 -> 15.00"]
+
+
+@pytest.mark.django_db
+def test_bench_api_command(tmp_path, settings):
+    """ Тест in-process бенчмарка: JSON с результатами и падение при регрессии """
+    settings.ALLOWED_HOSTS = ["testserver"]
+    seed_store(categories=1, subcategories=1, products=40, users=1)
+    output = tmp_path / "current.json"
+
+    call_command("bench_api", runs=2, warmup=1, scenario=["products", "cart"], output=str(output))
+    results = json.loads(output.read_text())
+    assert set(results["scenarios"]) == {"products", "cart"}
+    assert results["scenarios"]["cart"]["status"] == [200]
+
+    results["scenarios"]["cart"]["queries"] -= 1
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(results))
+    with pytest.raises(CommandError, match="cart: SQL-запросов"):
+        call_command("bench_api", runs=2, warmup=1, scenario=["cart"], baseline=str(baseline))
@@ -1,7 +1,14 @@
+import threading
+from decimal import Decimal
+
 import pytest
 from rest_framework import status
+from rest_framework.test import APIClient
+from django.db import connection
 from django.urls import reverse
 
+from store_app.models import Cart, Product, CartProduct
+
 
 @pytest.mark.django_db
 def test_add_product_to_cart(api_client, user, product):
@@ -46,3 +53,114 @@ def test_remove_product_from_cart(api_client, user, product):
 
     assert response.status_code == status.HTTP_200_OK
 
+
+
+@pytest.mark.django_db
+def test_get_cart_totals(api_client, user, product, subcategory, django_assert_num_queries):
+    """ Тест подсчета итогов корзины в БД и фиксированного числа запросов """
+    api_client.force_authenticate(user=user)
+    url = reverse("cart")
+    other = Product.objects.create(name="Кефир", slug="kefir", price=50, subcategory=subcategory)
+    api_client.post(url, {"product_id": product.id, "quantity": 2}, format="json")
+    api_client.post(url, {"product_id": other.id, "quantity": 3}, format="json")
+
+    # Строки корзины и агрегат итогов; снимки продуктов уже в кеше после добавления
+    with django_assert_num_queries(2):
+        response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["products"]) == 2
+    assert response.data["products"][0]["line_total"] == "179.98"
+    assert response.data["total_quantity"] == Decimal("5")
+    assert response.data["total_cost"] == pytest.approx(329.98)
+
+
+@pytest.mark.django_db
+def test_cart_totals_use_current_prices(api_client, user, product):
+    """ Тест итогов по текущим ценам в БД, даже если снимок продукта в кеше процесса устарел """
+    api_client.force_authenticate(user=user)
+    url = reverse("cart")
+    api_client.post(url, {"product_id": product.id, "quantity": 2}, format="json")
+    # Цена изменена в обход сигналов: снимок в кеше процесса устарел
+    Product.objects.filter(id=product.id).update(price=100)
+
+    response = api_client.get(url)
+
+    assert response.data["total_cost"] == pytest.approx(200)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_add_to_cart(user, product):
+    """ Стресс-тест: параллельные добавления одного товара не теряют обновлений и не создают дублей """
+    threads_count, adds_per_thread = 8, 5
+    url = reverse("cart")
+    errors = []
+
+    def hammer():
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            for _ in range(adds_per_thread):
+                response = client.post(url, {"product_id": product.id, "quantity": 1}, format="json")
+                if response.status_code != status.HTTP_201_CREATED:
+                    errors.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=hammer) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert CartProduct.objects.filter(cart__user=user, product=product).count() == 1
+    assert CartProduct.objects.get(cart__user=user).quantity == threads_count * adds_per_thread
+
+
+@pytest.mark.django_db
+def test_cart_batch_operations(api_client, user, product, subcategory):
+    """ Тест пакетного изменения корзины: add/set/remove в одном запросе """
+    api_client.force_authenticate(user=user)
+    kefir = Product.objects.create(name="Кефир", slug="kefir", price=50, subcategory=subcategory)
+    api_client.post(reverse("cart"), {"product_id": product.id, "quantity": 1}, format="json")
+
+    data = {"operations": [
+        {"product_id": kefir.id, "quantity": 2, "op": "add"},
+        {"product_id": kefir.id, "quantity": 1, "op": "add"},
+        {"product_id": product.id, "op": "remove"},
+    ]}
+    response = api_client.post(reverse("cart-batch"), data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [line["product"] for line in response.data["products"]] == [kefir.id]
+    assert response.data["total_quantity"] == Decimal("3")
+    assert response.data["total_cost"] == pytest.approx(150)
+
+
+@pytest.mark.django_db
+def test_cart_batch_unknown_product(api_client, user, product):
+    """ Тест отклонения всего пакета при неизвестном product_id """
+    api_client.force_authenticate(user=user)
+    data = {"operations": [
+        {"product_id": product.id, "quantity": 1, "op": "set"},
+        {"product_id": 999999, "quantity": 1, "op": "add"},
+    ]}
+    response = api_client.post(reverse("cart-batch"), data, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not CartProduct.objects.filter(cart__user=user).exists()
+
+
+@pytest.mark.django_db
+def test_add_quantities_increments_concurrent_lines(user, product, subcategory):
+    """ Тест пакетного upsert: строка, вставленная параллельно, увеличивается, а не перезаписывается """
+    kefir = Product.objects.create(name="Кефир", slug="kefir", price=50, subcategory=subcategory)
+    cart = Cart.objects.create(user=user)
+    # Строку вставил параллельный запрос уже после того, как пакет прочитал корзину
+    CartProduct.objects.create(cart=cart, product=product, quantity=2)
+
+    lines = CartProduct.objects.add_quantities(cart, {product.id: Decimal("1.5"), kefir.id: Decimal("3")})
+
+    assert {line.product_id: line.quantity for line in lines} == {product.id: Decimal("3.5"), kefir.id: 3}
+    assert dict(CartProduct.objects.values_list("product_id", "quantity")) == {product.id: Decimal("3.5"), kefir.id: 3}
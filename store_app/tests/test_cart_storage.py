@@ -0,0 +1,103 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from store_app.cart_storage import get_cart_storage
+from store_app.models import CartProduct
+
+
+@pytest.fixture
+def kv_storage(settings):
+    """Переключает корзины на key-value хранилище в памяти процесса"""
+    settings.CART_STORAGE = {"BACKEND": "store_app.cart_storage.KeyValueCartStorage"}
+    return get_cart_storage()
+
+
+@pytest.mark.django_db
+def test_kv_cart_operations(api_client, user, product, kv_storage):
+    """ Тест операций с корзиной через key-value хранилище без записи в таблицы корзин """
+    api_client.force_authenticate(user=user)
+    url = reverse("cart")
+
+    api_client.post(url, {"product_id": product.id, "quantity": 2}, format="json")
+    response = api_client.post(url, {"product_id": product.id, "quantity": 1}, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["quantity"] == "3.00"
+    assert response.data["product_name"] == product.name
+
+    response = api_client.get(url)
+    assert response.data["total_quantity"] == Decimal("3")
+    assert response.data["products"][0]["line_total"] == "269.97"
+
+    response = api_client.put(url, {"product_id": product.id, "quantity": 5}, format="json")
+    assert response.data["quantity"] == "5.00"
+
+    response = api_client.delete(f"{url}?product_id={product.id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert api_client.get(url).data["products"] == []
+    assert not CartProduct.objects.exists()
+
+
+@pytest.mark.django_db
+def test_kv_cart_flush(api_client, user, product, kv_storage):
+    """ Тест переноса корзины из key-value хранилища в БД командой flush_carts """
+    api_client.force_authenticate(user=user)
+    api_client.post(reverse("cart"), {"product_id": product.id, "quantity": 4}, format="json")
+
+    call_command("flush_carts")
+
+    line = CartProduct.objects.get(cart__user=user)
+    assert line.product_id == product.id
+    assert line.quantity == 4
+
+
+@pytest.mark.django_db
+def test_kv_cart_rejects_unknown_product(api_client, user, kv_storage):
+    """ Тест проверки продукта при добавлении: несуществующий product_id не попадает в корзину """
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post(reverse("cart"), {"product_id": 999999, "quantity": 1}, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "product_id" in response.data
+    assert kv_storage.read(user.pk) == {}
+
+
+@pytest.mark.django_db
+def test_kv_cart_concurrent_batches(user, product, kv_storage):
+    """ Тест атомарности пакета: параллельные add не теряют обновлений """
+    operations = [{"product_id": product.id, "quantity": Decimal("1.5"), "op": "add"}]
+    threads = [
+        threading.Thread(target=lambda: [kv_storage.apply(user, operations) for _ in range(20)])
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert kv_storage.read(user.pk) == {product.id: Decimal("240.00")}
+
+
+@pytest.mark.django_db
+def test_kv_cart_flush_expiring(user, product, kv_storage, django_user_model):
+    """ Тест сохранения корзин до истечения: истекающие сохраняются, истекшие и сохраненные уходят из индекса """
+    other = django_user_model.objects.create_user(username="other_user", password="testpass1")
+    kv_storage.add(user, product.id, Decimal("2"))
+    kv_storage.add(other, product.id, Decimal("1"))
+    # Корзина other истекла до сохранения
+    kv_storage.client.delete(kv_storage.get_key(other.pk))
+    kv_storage.client.zadd(kv_storage.index_key, {str(other.pk): time.time() - 1})
+
+    assert kv_storage.flush_expiring(60) == 0
+    assert kv_storage.client.zrangebyscore(kv_storage.index_key, "-inf", "+inf") == [str(user.pk)]
+
+    assert kv_storage.flush_expiring(kv_storage.ttl) == 1
+    assert CartProduct.objects.get(cart__user=user).quantity == 2
+    assert not CartProduct.objects.filter(cart__user=other).exists()
+    assert kv_storage.client.zrangebyscore(kv_storage.index_key, "-inf", "+inf") == []
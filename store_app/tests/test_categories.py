@@ -14,4 +14,38 @@ def test_get_categories_with_subcategories(user, category, subcategory, api_clie
     assert response.status_code == status.HTTP_200_OK
     assert len(response.data["results"]) > 0
     assert response.data["results"][0]["name"] == category.name
-    assert len(response.data['results'][0]['subcategories']) > 0
\ No newline at end of file
+    assert len(response.data['results'][0]['subcategories']) > 0
+
+@pytest.mark.django_db
+def test_categories_cached_and_invalidated(category, subcategory, api_client, django_assert_num_queries):
+    """ Тест кеширования дерева категорий и его инвалидации при изменении подкатегории """
+    url = reverse("categories")
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+    with django_assert_num_queries(0):
+        cached = api_client.get(url)
+    assert cached.data == response.data
+
+    subcategory.name = "Кефир"
+    subcategory.save()
+
+    response = api_client.get(url)
+    assert response.data["results"][0]["subcategories"][0]["name"] == "Кефир"
+
+
+@pytest.mark.django_db
+def test_categories_conditional_get(category, api_client):
+    """ Тест ответа 304 по ETag и смены ETag после изменения категории """
+    url = reverse("categories")
+    response = api_client.get(url)
+    etag = response["ETag"]
+    assert response["Last-Modified"]
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    category.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
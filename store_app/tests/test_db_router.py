@@ -0,0 +1,100 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from store_app.db_router import PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter
+from store_app.models import Cart, Product, ProductListing
+
+
+@pytest.fixture
+def replicas(settings):
+    """Включает роутер с двумя репликами (алиасы только выбираются, соединения не открываются)"""
+    settings.DATABASE_ROUTERS = ["store_app.db_router.ReplicaRouter"]
+    settings.DATABASE_REPLICAS = ["replica_1", "replica_2"]
+    return settings
+
+
+def test_catalog_reads_round_robin(replicas):
+    """ Тест распределения чтений каталога по репликам и чтения корзин с основной базы """
+    assert [Product.objects.all().db for _ in range(4)] == ["replica_1", "replica_2", "replica_1", "replica_2"]
+    assert Cart.objects.all().db == "default"
+    assert router.db_for_write(Product) == "default"
+
+
+def test_product_listing_reads_from_replicas(replicas):
+    """ Тест: read model списка продуктов читается с реплик, а ее обновление закрепляет запрос """
+    assert ProductListing.objects.all().db.startswith("replica_")
+
+    def view(request):
+        router.db_for_write(ProductListing)
+        return HttpResponse(ProductListing.objects.all().db)
+
+    response = ReplicaPinningMiddleware(view)(RequestFactory().post("/"))
+    assert response.content == b"default"
+    assert PIN_COOKIE in response.cookies
+
+
+def test_catalog_reads_least_lag(replicas, monkeypatch):
+    """ Тест выбора реплики с наименьшим отставанием и отката на основную базу """
+    replicas.REPLICA_SELECTION = "least_lag"
+    lags = {"replica_1": 3.0, "replica_2": 0.5}
+    monkeypatch.setattr(ReplicaRouter, "measure_lag", lambda self, alias: lags[alias])
+    assert Product.objects.all().db == "replica_2"
+
+    lags.update(replica_1=float("inf"), replica_2=60.0)
+    monkeypatch.setattr(ReplicaRouter, "lag_check_interval", -1)
+    assert Product.objects.all().db == "default"
+
+
+def test_read_your_writes_pinning(replicas):
+    """ Тест закрепления запроса за основной базой после записи и cookie для следующих запросов """
+    seen = []
+
+    def view(request):
+        seen.append(Product.objects.all().db)
+        router.db_for_write(Product)
+        seen.append(Product.objects.all().db)
+        return HttpResponse()
+
+    response = ReplicaPinningMiddleware(view)(RequestFactory().post("/"))
+    assert seen == ["replica_1", "default"]
+    assert response.cookies[PIN_COOKIE]["max-age"] == 5
+
+    seen.clear()
+    request = RequestFactory().get("/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    ReplicaPinningMiddleware(view)(request)
+    assert seen == ["default", "default"]
+    assert Product.objects.all().db.startswith("replica_")
+
+
+def test_non_catalog_writes_do_not_pin(replicas):
+    """ Тест: записи корзин и пользователей не закрепляют запрос за основной базой """
+    seen = []
+
+    def view(request):
+        router.db_for_write(Cart)
+        router.db_for_write(get_user_model())
+        seen.append(Product.objects.all().db)
+        return HttpResponse()
+
+    response = ReplicaPinningMiddleware(view)(RequestFactory().post("/"))
+    assert seen[0].startswith("replica_")
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_pinning_async(replicas):
+    """ Тест закрепления в async-режиме middleware """
+    seen = []
+
+    async def view(request):
+        router.db_for_write(Product)
+        seen.append(Product.objects.all().db)
+        return HttpResponse()
+
+    response = async_to_sync(ReplicaPinningMiddleware(view))(RequestFactory().post("/"))
+    assert seen == ["default"]
+    assert PIN_COOKIE in response.cookies
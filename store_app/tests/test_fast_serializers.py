@@ -0,0 +1,43 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from store_app.fast_serializers import CategoryTreeFastSerializer, ProductFastSerializer
+from store_app.models import Category, Product, SubCategory
+from store_app.serializers import CategoriesWithSubcategoriesSerializer, ProductSerializer
+
+
+@pytest.mark.django_db
+def test_product_fast_serializer_parity(product, subcategory):
+    """ Тест побайтового совпадения JSON быстрого сериализатора продуктов с ProductSerializer """
+    Product.objects.create(
+        name="Молоко 3,2%",
+        slug="moloko-3-2",
+        price="120.5",
+        subcategory=subcategory,
+        image_small="products/milk/small.jpg",
+        image_medium="products/молоко средн.jpg",
+        image_large="/products/milk/large.jpg",
+    )
+    queryset = Product.objects.select_related("subcategory__category")
+    fast_serializer = ProductFastSerializer()
+
+    expected = JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+    actual = JSONRenderer().render(fast_serializer.serialize(fast_serializer.prepare(queryset)))
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_category_fast_serializer_parity(category, subcategory):
+    """ Тест побайтового совпадения JSON быстрого сериализатора дерева категорий """
+    other = Category.objects.create(name="Колбасные изделия", slug="kolbasnye", image="")
+    SubCategory.objects.create(name="Сосиски", slug="sosiski", image="subcategories/sosiski.jpg", category=other)
+    request = Request(APIRequestFactory().get("/api/v1/categories/"))
+    queryset = Category.objects.prefetch_related("subcategories").all()
+    fast_serializer = CategoryTreeFastSerializer(request)
+
+    serializer = CategoriesWithSubcategoriesSerializer(queryset, many=True, context={"request": request})
+    expected = JSONRenderer().render(serializer.data)
+    actual = JSONRenderer().render(fast_serializer.serialize(fast_serializer.prepare(queryset)))
+    assert actual == expected
@@ -0,0 +1,98 @@
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from store_app.models import Category, Product, SubCategory
+from store_app.product_cache import product_cache
+
+
+@pytest.fixture
+def image_pipeline(settings, tmp_path):
+    """Включает синхронную генерацию вариантов с media во временном каталоге"""
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMAGE_PIPELINE_ENABLED = True
+    settings.IMAGE_PIPELINE_SYNC = True
+    settings.IMAGE_VARIANT_SIZES = {"small": 50, "large": 300}
+
+
+def make_upload(name="milk.png", size=(640, 480)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, (200, 30, 30, 255)).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@pytest.mark.django_db
+def test_product_image_variants(image_pipeline, subcategory, api_client, django_capture_on_commit_callbacks):
+    """ Тест генерации вариантов из одного исходника и их выдачи в images.variants """
+    with django_capture_on_commit_callbacks(execute=True):
+        product = Product.objects.create(
+            name="Молоко", slug="moloko", price=80, subcategory=subcategory, image=make_upload()
+        )
+    product.refresh_from_db()
+
+    sizes = product.image_variants["sizes"]
+    assert set(sizes) == {"small", "large"}
+    assert {"jpeg", "webp"} <= set(sizes["small"])
+    assert product.image_small.name == sizes["small"]["jpeg"]
+    assert Image.open(product.image_large.path).size == (300, 225)
+
+    images = api_client.get(reverse("products")).data["results"][0]["images"]
+    assert images["small"].endswith(".jpg")
+    assert images["variants"]["small"]["webp"].startswith("/media/variants/product/milk-small-")
+
+
+@pytest.mark.django_db
+def test_image_variants_apply_exif_orientation(image_pipeline, subcategory, django_capture_on_commit_callbacks):
+    """ Тест: поворот из EXIF Orientation применяется к вариантам """
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повернуть на 90° по часовой стрелке
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 300), (200, 30, 30)).save(buffer, format="JPEG", exif=exif)
+    upload = SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product = Product.objects.create(name="Сыр", slug="syr", price=80, subcategory=subcategory, image=upload)
+    product.refresh_from_db()
+
+    assert Image.open(product.image_large.path).size == (150, 300)
+
+
+@pytest.mark.django_db
+def test_image_variants_skipped_when_up_to_date(image_pipeline, subcategory, django_capture_on_commit_callbacks):
+    """ Тест: сохранение без смены исходника не перестраивает варианты """
+    with django_capture_on_commit_callbacks(execute=True):
+        product = Product.objects.create(
+            name="Молоко", slug="moloko", price=80, subcategory=subcategory, image=make_upload()
+        )
+    product.refresh_from_db()
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        product.price = 90
+        product.save()
+    assert callbacks == []
+
+
+@pytest.mark.django_db
+def test_image_variants_refresh_cached_responses(image_pipeline, api_client, django_capture_on_commit_callbacks):
+    """ Тест: UPDATE с вариантами сдвигает версию каталога и сбрасывает снимок продукта """
+    with django_capture_on_commit_callbacks() as callbacks:
+        category = Category.objects.create(name="Молочная продукция", slug="moloko", image=make_upload())
+    assert api_client.get(reverse("categories")).data["results"][0]["image_variants"] == {}
+
+    for callback in callbacks:
+        callback()
+    assert set(api_client.get(reverse("categories")).data["results"][0]["image_variants"]) == {"small", "large"}
+
+    subcategory = SubCategory.objects.create(name="Молоко", slug="moloko", image="x.jpg", category=category)
+    with django_capture_on_commit_callbacks() as callbacks:
+        product = Product.objects.create(
+            name="Молоко", slug="moloko", price=80, subcategory=subcategory, image=make_upload()
+        )
+    assert product_cache.get_many([product.id])[product.id]["images"]["small"] is None
+
+    for callback in callbacks:
+        callback()
+    assert product_cache.get_many([product.id])[product.id]["images"]["small"].endswith(".jpg")
@@ -0,0 +1,110 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from store_app import importers
+from store_app.importers import import_products
+from store_app.models import Product
+from store_app.product_cache import product_cache
+
+
+@pytest.mark.django_db
+def test_import_products_idempotent(tmp_path, subcategory, capsys):
+    """ Тест потокового импорта JSON: повторный импорт не меняет строки, измененные обновляются """
+    records = [
+        {"model": "store_app.product", "pk": 10, "fields": {
+            "name": "Молоко 2.5%", "slug": "moloko-2-5", "subcategory": subcategory.id, "price": "89.99",
+            "image_small": "products/milk/small.jpg",
+        }},
+        {"name": "Молоко 3.2%", "slug": "moloko-3-2", "category": "molochnaya-produkciya",
+         "subcategory": "moloko", "price": 95},
+    ]
+    path = tmp_path / "products.json"
+    path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+
+    call_command("import_products", str(path), batch_size=1)
+    assert Product.objects.count() == 2
+    assert Product.objects.get(slug="moloko-3-2").subcategory == subcategory
+
+    call_command("import_products", str(path))
+    assert "без изменений 2" in capsys.readouterr().out
+
+    records[1]["price"] = 99
+    path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    call_command("import_products", str(path))
+    assert "обновлено 1" in capsys.readouterr().out
+    assert Product.objects.get(slug="moloko-3-2").price == 99
+
+
+@pytest.mark.django_db
+def test_import_products_csv(tmp_path, subcategory):
+    """ Тест импорта CSV с подкатегорией по slug """
+    path = tmp_path / "products.csv"
+    path.write_text("name,slug,price,subcategory\nКефир,kefir,50.00,moloko\n", encoding="utf-8")
+
+    call_command("import_products", str(path))
+
+    product = Product.objects.get(slug="kefir")
+    assert product.subcategory == subcategory
+    assert product.image_small.name == ""
+
+
+@pytest.mark.django_db
+def test_import_products_invalidates_snapshots(product):
+    """ Тест импорта в обход сигналов: снимок измененного продукта сбрасывается в кеше процесса """
+    assert product_cache.get_many([product.id])[product.id]["price"] == Decimal("89.99")
+
+    import_products([{"name": product.name, "slug": product.slug, "subcategory": product.subcategory_id, "price": 120}])
+
+    assert product_cache.get_many([product.id])[product.id]["price"] == 120
+
+
+@pytest.mark.django_db
+def test_import_products_skips_unchanged_rows(product, monkeypatch):
+    """ Тест: повторный импорт неизмененных строк не обновляет read model и не ставит варианты изображений """
+    synced = []
+    monkeypatch.setattr(importers, "sync_products", synced.extend)
+    record = {"name": product.name, "slug": product.slug, "subcategory": product.subcategory_id, "price": "89.99"}
+
+    stats = import_products([record, {**record, "slug": "kefir", "name": "Кефир"}])
+    assert (stats["created"], stats["unchanged"]) == (1, 1)
+    assert synced == [Product.objects.get(slug="kefir").id]
+
+    synced.clear()
+    import_products([record])
+    assert synced == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("line", ['["kefir", 50]', '"kefir"', '{"fields": [1, 2]}'])
+def test_import_products_rejects_non_object_records(tmp_path, subcategory, line):
+    """ Тест: записи-массивы и скаляры отклоняются как некорректные, а не падают с AttributeError """
+    path = tmp_path / "products.ndjson"
+    path.write_text(line + "\n", encoding="utf-8")
+
+    with pytest.raises(CommandError, match="ожидался объект"):
+        call_command("import_products", str(path))
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="COPY есть только в PostgreSQL")
+@pytest.mark.django_db
+def test_import_products_copy(product, subcategory):
+    """ Тест импорта через COPY: новые строки вставляются, измененные обновляются, остальные не трогаются """
+    records = [
+        {"name": product.name, "slug": product.slug, "subcategory": subcategory.id, "price": str(product.price)},
+        {"name": "Кефир", "slug": "kefir", "subcategory": "moloko", "price": "50.00"},
+    ]
+
+    stats = import_products(records, use_copy=True)
+    assert (stats["created"], stats["updated"], stats["unchanged"]) == (1, 0, 1)
+    kefir = Product.objects.get(slug="kefir")
+    assert kefir.image_variants == {}
+    assert kefir.image_small.name == ""
+
+    records[1]["price"] = "55.00"
+    stats = import_products(records, use_copy=True)
+    assert (stats["created"], stats["updated"], stats["unchanged"]) == (0, 1, 1)
+    assert Product.objects.get(slug="kefir").price == 55
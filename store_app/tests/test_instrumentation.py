@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from store_app.instrumentation import QueryBudgetExceeded, request_metrics
+from store_app.views import CartView
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    request_metrics.clear()
+
+
+@pytest.mark.django_db
+def test_server_timing_and_metrics(api_client, product, user, settings):
+    """ Тест заголовка Server-Timing и метрик Prometheus по вьюхе """
+    settings.SERVER_TIMING_ENABLED = True
+    response = api_client.get(reverse("products"))
+
+    timing = response["Server-Timing"]
+    assert 'db;dur=' in timing and 'desc="2 queries"' in timing
+    assert "serialize;dur=" in timing and "render;dur=" in timing
+
+    user.is_staff = True
+    user.save()
+    api_client.force_authenticate(user=user)
+    metrics = api_client.get(reverse("metrics")).content.decode()
+
+    assert 'api_requests_total{view="products",method="GET",status="200"} 1' in metrics
+    assert 'api_db_queries_total{view="products",method="GET"} 2' in metrics
+    assert f'api_response_bytes_total{{view="products",method="GET"}} {len(response.content)}' in metrics
+    assert 'api_request_duration_seconds_count{view="products",method="GET"} 1' in metrics
+
+
+@pytest.mark.django_db
+def test_query_budget(api_client, user, product, monkeypatch, settings, caplog):
+    """ Тест бюджета запросов: исключение в режиме raise и предупреждение в режиме warn """
+    api_client.force_authenticate(user=user)
+    monkeypatch.setattr(CartView, "query_budget", {"get": 0})
+
+    with pytest.raises(QueryBudgetExceeded):
+        api_client.get(reverse("cart"))
+
+    settings.QUERY_BUDGET_MODE = "warn"
+    with caplog.at_level(logging.WARNING, logger="store_app.instrumentation"):
+        response = api_client.get(reverse("cart"))
+    assert response.status_code == status.HTTP_200_OK
+    assert "GET cart" in caplog.text
@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    """Создает файлы в MEDIA_ROOT во временном каталоге"""
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / "products").mkdir()
+    (tmp_path / "products" / "small.jpg").write_bytes(b"0123456789")
+    (tmp_path / "products" / "small-0123456789abcdef.webp").write_bytes(b"webp")
+    (tmp_path / "products" / "молоко.jpg").write_bytes(b"milk")
+    return tmp_path
+
+
+def test_media_full_and_conditional(client, media_file):
+    """ Тест отдачи файла со строгим ETag и ответа 304 """
+    response = client.get("/media/products/small.jpg")
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"0123456789"
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Cache-Control"] == "public, max-age=3600"
+    assert not response["ETag"].startswith("W/")
+
+    response = client.get("/media/products/small.jpg", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+def test_media_hashed_immutable(client, media_file):
+    """ Тест immutable-кеширования файлов с хешем в имени """
+    response = client.get("/media/products/small-0123456789abcdef.webp")
+    assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+    # ETag — хеш содержимого из имени: не зависит от mtime копии файла
+    assert response["ETag"] == '"0123456789abcdef"'
+
+
+def test_media_range(client, media_file):
+    """ Тест Range-запросов """
+    response = client.get("/media/products/small.jpg", HTTP_RANGE="bytes=2-5")
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 2-5/10"
+    assert b"".join(response.streaming_content) == b"2345"
+
+    response = client.get("/media/products/small.jpg", HTTP_RANGE="bytes=-3")
+    assert b"".join(response.streaming_content) == b"789"
+
+    response = client.get("/media/products/small.jpg", HTTP_RANGE="bytes=20-")
+    assert response.status_code == 416
+
+
+def test_media_x_accel(client, media_file, settings):
+    """ Тест режима X-Accel-Redirect и защиты от выхода за MEDIA_ROOT """
+    settings.MEDIA_SERVE_MODE = "x-accel"
+    response = client.get("/media/products/small.jpg")
+
+    assert response["X-Accel-Redirect"] == "/protected-media/products/small.jpg"
+    assert response.content == b""
+
+    response = client.get("/media/products/молоко.jpg")
+    assert response["X-Accel-Redirect"] == "/protected-media/products/%D0%BC%D0%BE%D0%BB%D0%BE%D0%BA%D0%BE.jpg"
+    assert client.get("/media/../settings.py").status_code == 404
@@ -0,0 +1,44 @@
+import pytest
+from django.urls import reverse
+
+from store_app.models import Product
+from store_app.product_cache import ProductSnapshotCache
+
+
+@pytest.mark.django_db
+def test_product_cache_lru_eviction(product, subcategory, django_assert_num_queries):
+    """ Тест multi-get из кеша снимков и вытеснения самой старой записи """
+    kefir = Product.objects.create(name="Кефир", slug="kefir", price=50, subcategory=subcategory)
+    cache = ProductSnapshotCache(maxsize=1)
+
+    with django_assert_num_queries(1):
+        snapshots = cache.get_many([product.id])
+    assert snapshots[product.id]["name"] == product.name
+
+    with django_assert_num_queries(0):
+        cache.get_many([product.id])
+
+    cache.get_many([kefir.id])
+    assert cache.stats()["size"] == 1
+    with django_assert_num_queries(1):
+        cache.get_many([product.id])
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+@pytest.mark.django_db
+def test_cart_reads_product_from_cache(api_client, user, product):
+    """ Тест чтения цен корзины из кеша снимков и сброса снимка при изменении цены """
+    api_client.force_authenticate(user=user)
+    url = reverse("cart")
+    api_client.post(url, {"product_id": product.id, "quantity": 2}, format="json")
+
+    response = api_client.get(url)
+    assert response.data["products"][0]["product_price"] == "89.99"
+
+    product.price = 100
+    product.save()
+
+    response = api_client.get(url)
+    assert response.data["products"][0]["product_price"] == "100.00"
+    assert response.data["products"][0]["line_total"] == "200.00"
@@ -0,0 +1,101 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from store_app.importers import import_products
+from store_app.models import Category, Product, ProductListing, SubCategory
+
+
+@pytest.fixture
+def listing_enabled(settings):
+    settings.PRODUCT_LISTING_ENABLED = True
+
+
+@pytest.fixture
+def catalog(db, subcategory, category):
+    other = SubCategory.objects.create(name="Сосиски", slug="sosiski", image="subcategories/test.jpg", category=category)
+    Product.objects.create(
+        name="Молоко 2,5%", slug="moloko-2-5", price=89.99, subcategory=subcategory,
+        image_small="products/milk/small.jpg", image_variants={"sizes": {"small": {"jpeg": "variants/milk.jpg"}}},
+    )
+    Product.objects.create(name="Молоко 3,2%", slug="moloko-3-2", price=120, subcategory=subcategory)
+    Product.objects.create(name="Сосиски", slug="sosiski", price=350, subcategory=other)
+    return other
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"category": "molochnaya-produkciya", "sort": "-price", "facets": "true"},
+    {"subcategory": "moloko", "min_price": 100},
+    {"pagination": "cursor"},
+])
+@pytest.mark.django_db
+def test_listing_matches_product_join(api_client, catalog, settings, params):
+    """ Тест read model: список из ProductListing совпадает со списком из продуктов с JOIN """
+    url = reverse("products")
+    expected = api_client.get(url, params).json()
+
+    settings.PRODUCT_LISTING_ENABLED = True
+    call_command("refresh_product_listing")
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(url, params)
+
+    assert response.json() == expected
+    assert not any("JOIN" in query["sql"] for query in captured.captured_queries)
+
+
+@pytest.mark.django_db
+def test_listing_synced_by_signals(listing_enabled, catalog, subcategory, category):
+    """ Тест инкрементальной синхронизации: продукт, подкатегория и категория обновляют строки списка """
+    product = Product.objects.get(slug="moloko-2-5")
+    row = ProductListing.objects.get(id=product.id)
+    assert (row.category_name, row.subcategory_name) == (category.name, subcategory.name)
+    assert row.images["small"] == "/media/products/milk/small.jpg"
+    assert row.images["variants"]["small"]["jpeg"] == "/media/variants/milk.jpg"
+
+    product.price = 95
+    product.subcategory = catalog
+    product.save()
+    row.refresh_from_db()
+    assert (row.price, row.subcategory_slug) == (95, "sosiski")
+
+    subcategory.name = "Молоко и сливки"
+    subcategory.save()
+    assert ProductListing.objects.get(slug="moloko-3-2").subcategory_name == "Молоко и сливки"
+
+    other_category = Category.objects.create(name="Мясо", slug="myaso", image="categories/test.jpg")
+    catalog.category = other_category
+    catalog.save()
+    assert set(ProductListing.objects.filter(category_slug="myaso").values_list("slug", flat=True)) == {
+        "moloko-2-5", "sosiski"
+    }
+
+    other_category.name = "Мясная продукция"
+    other_category.save()
+    assert ProductListing.objects.get(slug="sosiski").category_name == "Мясная продукция"
+
+    product.delete()
+    assert not ProductListing.objects.filter(id=product.id).exists()
+
+    catalog.delete()
+    assert list(ProductListing.objects.values_list("slug", flat=True)) == ["moloko-3-2"]
+
+
+@pytest.mark.django_db
+def test_refresh_product_listing(catalog, settings, capsys):
+    """ Тест пересборки: продукты в обход сигналов попадают в список, строки удаленных — удаляются """
+    assert not ProductListing.objects.exists()
+    ProductListing.objects.create(
+        id=10_000, name="Удален", slug="deleted", price=1, subcategory_id=catalog.id, subcategory_slug="x",
+        subcategory_name="x", category_id=catalog.category_id, category_slug="x", category_name="x",
+    )
+
+    call_command("refresh_product_listing", batch_size=2)
+    assert "Строк обновлено: 3, удалено: 1" in capsys.readouterr().out
+    assert ProductListing.objects.count() == 3
+
+    settings.PRODUCT_LISTING_ENABLED = True
+    import_products([{"name": "Молоко 1%", "slug": "moloko-1", "subcategory": catalog.id, "price": 70}])
+    assert ProductListing.objects.get(slug="moloko-1").subcategory_name == catalog.name
@@ -1,7 +1,15 @@
+import csv
+import io
+import json
+
 import pytest
 from django.urls import reverse
 from rest_framework import status
 
+from store_app import counts
+from store_app.filters import PRODUCT_SORT_FIELDS
+from store_app.models import Product, SubCategory
+
 
 @pytest.mark.django_db
 def test_get_products(api_client, product, subcategory):
@@ -15,3 +23,163 @@ def test_get_products(api_client, product, subcategory):
     assert response.data["results"][0]["price"] == str(product.price)
     assert response.data["results"][0]["subcategory"] == subcategory.name
     assert response.data["results"][0]["category"] == subcategory.category.name
+
+
+@pytest.mark.django_db
+def test_get_products_cursor_pagination(api_client, subcategory):
+    """ Тест keyset-пагинации продуктов: проход вперед и назад по курсорам """
+    Product.objects.bulk_create([
+        Product(name=f"Продукт {i // 2:02d}", slug=f"product-{i}", price=10 + i % 2, subcategory=subcategory)
+        for i in range(45)
+    ])
+    url = reverse("products")
+
+    first = api_client.get(url, {"pagination": "cursor"})
+    assert first.status_code == status.HTTP_200_OK
+    assert "count" not in first.data
+    assert first.data["previous"] is None
+    assert len(first.data["results"]) == 30
+
+    second = api_client.get(first.data["next"])
+    assert second.status_code == status.HTTP_200_OK
+    assert second.data["next"] is None
+    assert len(second.data["results"]) == 15
+
+    ids = [row["id"] for row in first.data["results"] + second.data["results"]]
+    expected = list(Product.objects.order_by("name", "price", "id").values_list("id", flat=True))
+    assert ids == expected
+
+    back = api_client.get(second.data["previous"])
+    assert [row["id"] for row in back.data["results"]] == expected[:30]
+    assert back.data["previous"] is None
+
+
+@pytest.mark.parametrize("sort", ["name", "-name", "price", "-price"])
+@pytest.mark.django_db
+def test_get_products_cursor_pagination_sort(api_client, subcategory, sort):
+    """ Тест keyset-пагинации с сортировкой: страницы по курсорам идут в порядке ?sort= """
+    Product.objects.bulk_create([
+        Product(name=f"Продукт {i % 7}", slug=f"product-{i}", price=10 + i % 3, subcategory=subcategory)
+        for i in range(45)
+    ])
+    url = reverse("products")
+    expected = list(Product.objects.order_by(*PRODUCT_SORT_FIELDS[sort]).values_list("id", flat=True))
+
+    first = api_client.get(url, {"pagination": "cursor", "sort": sort})
+    second = api_client.get(first.data["next"])
+    assert [row["id"] for row in first.data["results"] + second.data["results"]] == expected
+    assert second.data["next"] is None
+
+    back = api_client.get(second.data["previous"])
+    assert [row["id"] for row in back.data["results"]] == expected[:30]
+
+
+@pytest.mark.django_db
+def test_get_products_exact_count_is_cached(api_client, product, subcategory, django_assert_num_queries):
+    """ Тест кеша точного числа строк: COUNT выполняется один раз на комбинацию фильтров """
+    url = reverse("products")
+
+    with django_assert_num_queries(2):
+        first = api_client.get(url, {"subcategory": subcategory.slug})
+    assert first.data["count"] == 1
+    assert first.data["count_is_estimated"] is False
+
+    with django_assert_num_queries(1):
+        api_client.get(url, {"subcategory": subcategory.slug, "page": 1})
+    with django_assert_num_queries(2):
+        api_client.get(url, {"subcategory": subcategory.slug, "min_price": 1})
+
+
+@pytest.mark.django_db
+def test_get_products_estimated_count(api_client, product, settings, monkeypatch):
+    """ Тест оценки планировщика: выше порога count берется из оценки и помечается приблизительным """
+    monkeypatch.setattr(counts, "get_table_estimate", lambda model, using: 2_000_000)
+    monkeypatch.setattr(counts, "get_plan_estimate", lambda queryset: 500)
+    url = reverse("products")
+
+    response = api_client.get(url)
+    assert response.data["count"] == 2_000_000
+    assert response.data["count_is_estimated"] is True
+    # Следующая страница определяется по выбранным строкам, а не по оценке
+    assert response.data["next"] is None
+    assert [item["id"] for item in response.data["results"]] == [product.id]
+
+    response = api_client.get(url, {"min_price": 1})
+    assert response.data["count"] == 1
+    assert response.data["count_is_estimated"] is False
+
+    settings.ESTIMATED_COUNT_THRESHOLD = 100
+    response = api_client.get(url, {"min_price": 2})
+    assert response.data["count"] == 500
+    assert response.data["count_is_estimated"] is True
+
+
+@pytest.mark.django_db
+def test_get_products_invalid_cursor(api_client):
+    """ Тест ответа на поврежденный курсор """
+    response = api_client.get(reverse("products"), {"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_get_products_filters_and_facets(api_client, product, subcategory, category):
+    """ Тест фильтров по slug и цене, сортировки и фасетов списка продуктов """
+    sausages = SubCategory.objects.create(name="Сосиски", slug="sosiski", image="subcategories/test.jpg", category=category)
+    Product.objects.create(name="Сосиски молочные", slug="sosiski-molochnye", price=250, subcategory=sausages)
+    Product.objects.create(name="Молоко 3,2%", slug="moloko-3-2", price=120, subcategory=subcategory)
+    url = reverse("products")
+
+    response = api_client.get(url, {"subcategory": "moloko", "min_price": 100})
+    assert [row["name"] for row in response.data["results"]] == ["Молоко 3,2%"]
+
+    response = api_client.get(url, {"category": category.slug, "sort": "-price", "facets": "true"})
+    assert [row["price"] for row in response.data["results"]] == ["250.00", "120.00", "89.99"]
+    facets = response.data["facets"]
+    assert {facet["slug"]: facet["count"] for facet in facets["subcategories"]} == {"moloko": 2, "sosiski": 1}
+    assert [bucket["count"] for bucket in facets["price"]] == [1, 2, 0, 0]
+
+
+@pytest.mark.django_db
+def test_get_products_invalid_filters(api_client):
+    """ Тест валидации параметров фильтрации """
+    response = api_client.get(reverse("products"), {"sort": "slug"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = api_client.get(reverse("products"), {"min_price": 10, "max_price": 5})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_search_products(api_client, product, subcategory):
+    """ Тест поиска продуктов с выдачей в формате ProductSerializer """
+    Product.objects.create(name="Кефир 1%", slug="kefir-1", price=70, subcategory=subcategory)
+    response = api_client.get(reverse("products-search"), {"q": "Молоко"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [row["name"] for row in response.data["results"]] == [product.name]
+    assert response.data["results"][0]["category"] == subcategory.category.name
+
+    response = api_client.get(reverse("products-search"), {"q": "М"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_export_products(api_client, user, product):
+    """ Тест потоковой выгрузки каталога в NDJSON и CSV только для персонала """
+    url = reverse("products-export")
+    api_client.force_authenticate(user=user)
+    assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    user.is_staff = True
+    user.save()
+    listed = api_client.get(reverse("products")).json()["results"]
+
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == listed
+
+    response = api_client.get(url, {"output": "csv"})
+    rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert rows[0]["name"] == product.name
+    assert rows[0]["price"] == "89.99"
@@ -0,0 +1,171 @@
+from functools import partial
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from store_app import query_guard
+from store_app.models import Cart, CartProduct, Category, Product, SubCategory
+from store_app.product_cache import product_cache
+from store_app.query_guard import QueryCountGrowth, QueryRecorder, register_scaling_endpoint
+from store_app.token_cache import token_cache
+
+User = get_user_model()
+
+
+@pytest.fixture
+def query_guard_reset():
+    """ Сбрасывает те же кеши, что и clear_cache, перед каждым замером """
+    from django.core.cache import cache
+
+    def reset():
+        cache.clear()
+        product_cache.clear()
+        token_cache.clear()
+    return reset
+
+
+def get_category() -> Category:
+    category, _ = Category.objects.get_or_create(
+        slug="guard-category", defaults={"name": "Проверка запросов", "image": "categories/test.jpg"}
+    )
+    return category
+
+
+def get_subcategory() -> SubCategory:
+    subcategory, _ = SubCategory.objects.get_or_create(
+        slug="guard-subcategory",
+        defaults={"name": "Проверка запросов", "image": "subcategories/test.jpg", "category": get_category()},
+    )
+    return subcategory
+
+
+def create_products(start: int, stop: int) -> list[Product]:
+    subcategory = get_subcategory()
+    return [
+        Product.objects.create(
+            name=f"Молоко {number}", slug=f"guard-product-{number}", price=50 + number, subcategory=subcategory
+        )
+        for number in range(start, stop)
+    ]
+
+
+def login_admin(client) -> None:
+    admin, _ = User.objects.get_or_create(username="guard_admin", defaults={"is_staff": True, "is_superuser": True})
+    client.force_login(admin)
+    client.force_authenticate(user=admin)
+
+
+@register_scaling_endpoint("categories", "categories")
+def populate_categories(client, start, stop):
+    for number in range(start, stop):
+        category = Category.objects.create(
+            name=f"Категория {number}", slug=f"guard-category-{number}", image="categories/test.jpg"
+        )
+        SubCategory.objects.create(
+            name=f"Подкатегория {number}", slug=f"guard-subcategory-{number}",
+            image="subcategories/test.jpg", category=category,
+        )
+
+
+@register_scaling_endpoint("products", "products")
+@register_scaling_endpoint("products-cursor", "products", params={"pagination": "cursor"})
+@register_scaling_endpoint("products-search", "products-search", params={"q": "молоко"})
+@register_scaling_endpoint(
+    "products-filtered", "products", params={"category": "guard-category", "sort": "price", "facets": "true"}
+)
+def populate_products(client, start, stop):
+    create_products(start, stop)
+
+
+@register_scaling_endpoint("products-export", "products-export")
+@register_scaling_endpoint("admin-products", "admin:store_app_product_changelist")
+@register_scaling_endpoint(
+    "admin-products-filtered", "admin:store_app_product_changelist",
+    params={"category": "guard-category", "price_range": "0"},
+)
+def populate_products_as_admin(client, start, stop):
+    login_admin(client)
+    create_products(start, stop)
+
+
+@register_scaling_endpoint("admin-product-add", "admin:store_app_product_add")
+@register_scaling_endpoint(
+    "admin-subcategory-autocomplete", "admin:autocomplete",
+    params={"app_label": "store_app", "model_name": "product", "field_name": "subcategory", "term": "Подкатегория"},
+)
+@register_scaling_endpoint("admin-subcategories", "admin:store_app_subcategory_changelist")
+def populate_subcategories_as_admin(client, start, stop):
+    login_admin(client)
+    category = get_category()
+    for number in range(start, stop):
+        SubCategory.objects.create(
+            name=f"Подкатегория {number}", slug=f"guard-subcategory-{number}",
+            image="subcategories/test.jpg", category=category,
+        )
+
+
+@register_scaling_endpoint("cart", "cart")
+def populate_cart(client, start, stop):
+    user, _ = User.objects.get_or_create(username="guard_user")
+    client.force_authenticate(user=user)
+    cart, _ = Cart.objects.get_or_create(user=user)
+    CartProduct.objects.bulk_create(
+        CartProduct(cart=cart, product=product, quantity=1) for product in create_products(start, stop)
+    )
+
+
+@register_scaling_endpoint("admin-carts", "admin:store_app_cart_changelist")
+@register_scaling_endpoint(
+    "admin-cart-autocomplete", "admin:autocomplete",
+    params={"app_label": "store_app", "model_name": "cartproduct", "field_name": "cart", "term": "guard_user"},
+)
+@register_scaling_endpoint("admin-cart-products", "admin:store_app_cartproduct_changelist")
+def populate_carts_as_admin(client, start, stop):
+    login_admin(client)
+    for product in create_products(start, stop):
+        cart = Cart.objects.create(user=User.objects.create(username=f"guard_user_{product.slug}"))
+        CartProduct.objects.create(cart=cart, product=product, quantity=1)
+
+
+@pytest.mark.django_db
+def test_endpoint_queries_do_not_grow(scaling_endpoint, api_client, assert_constant_queries):
+    """ Число SQL-запросов эндпоинта не зависит от числа строк в базе """
+    assert_constant_queries(
+        partial(scaling_endpoint.request, api_client),
+        partial(scaling_endpoint.populate, api_client),
+    )
+
+
+@pytest.mark.django_db
+def test_growth_report_shows_offending_query(subcategory):
+    """ Тест отчета: растущий запрос попадает в отчет вместе со строкой кода, которая его выполнила """
+    def populate(start, stop):
+        for number in range(start, stop):
+            SubCategory.objects.create(
+                name=f"Подкатегория {number}", slug=f"n-plus-one-{number}",
+                image="subcategories/test.jpg", category=subcategory.category,
+            )
+
+    def run():
+        return [str(item) for item in SubCategory.objects.all()]
+
+    with pytest.raises(QueryCountGrowth) as error:
+        query_guard.assert_constant_queries(run, populate, sizes=(1, 10, 100))
+
+    report = str(error.value)
+    assert "1 -> 3, 10 -> 12, 100 -> 102" in report
+    assert 'FROM "store_app_category"' in report
+    assert "in __str__" in report and "in run" in report
+
+
+@pytest.mark.django_db
+def test_query_recorder_stacks(product):
+    """ Тест записи запросов: шаблон без литералов и стек без внутренностей ORM """
+    with QueryRecorder() as recorder:
+        list(Product.objects.filter(id__in=[1, 2, 3]))
+
+    (sql, stack), = recorder.queries
+    statement, = recorder.counts()
+    assert "IN (...)" in statement
+    assert all("django/db/" not in frame.filename for frame in stack)
+    assert stack[-1].name == "test_query_recorder_stacks"
@@ -0,0 +1,48 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from store_app.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+def test_orjson_renderer_matches_json_renderer():
+    """ Тест совпадения вывода ORJSONRenderer и стандартного JSONRenderer """
+    pytest.importorskip("orjson")
+    data = {
+        "products": [{"id": 1, "name": "Молоко 2,5%", "price": "89.99", "images": {"small": None}}],
+        "total_quantity": Decimal("5.00"),
+        "total_cost": 329.98,
+        "note": "строка\u2028разделитель",
+        "created_at": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        "updated": date(2026, 1, 2),
+    }
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_msgpack_renderer_matches_json_types():
+    """ Тест: Decimal и даты в MessagePack представлены так же, как в JSON """
+    msgpack = pytest.importorskip("msgpack")
+    data = {"total_quantity": Decimal("5.00"), "created_at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}
+
+    assert msgpack.unpackb(MessagePackRenderer().render(data)) == {
+        "total_quantity": 5.0,
+        "created_at": "2026-01-02T03:04:05Z",
+    }
+
+
+@pytest.mark.django_db
+def test_products_msgpack_negotiation(api_client, product):
+    """ Тест выбора MessagePack по заголовку Accept """
+    msgpack = pytest.importorskip("msgpack")
+    url = reverse("products")
+
+    response = api_client.get(url, HTTP_ACCEPT="application/msgpack")
+
+    assert response["Content-Type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content, raw=False)
+    assert data["results"][0]["name"] == product.name
+    assert data["results"][0]["price"] == "89.99"
+    assert data == api_client.get(url, HTTP_ACCEPT="application/json").json()
@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from store_app.token_cache import TokenUserCache, build_user, make_user_snapshot, token_cache
+
+
+@pytest.fixture
+def token_client(api_client, user):
+    """Клиент с заголовком Authorization: Token"""
+    token = Token.objects.create(user=user)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return api_client
+
+
+def get_cart_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("cart"))
+    assert response.status_code == status.HTTP_200_OK
+    return [query["sql"] for query in queries.captured_queries]
+
+
+@pytest.mark.django_db
+def test_cart_request_skips_auth_queries(token_client):
+    """ Тест: повторный запрос корзины аутентифицируется без запросов Token/User """
+    first = get_cart_queries(token_client)
+    second = get_cart_queries(token_client)
+
+    assert any("authtoken_token" in sql for sql in first)
+    assert not any("authtoken_token" in sql or "auth_user" in sql for sql in second)
+    assert len(second) == len(first) - 1
+    assert token_cache.stats()["hits"] == 1
+    assert token_cache.stats()["misses"] == 1
+
+
+@pytest.mark.django_db
+def test_token_cache_invalidated(token_client, user):
+    """ Тест сброса кеша при деактивации пользователя и удалении токена """
+    get_cart_queries(token_client)
+    user.is_active = False
+    user.save()
+    assert token_client.get(reverse("cart")).status_code == status.HTTP_401_UNAUTHORIZED
+
+    user.is_active = True
+    user.save()
+    get_cart_queries(token_client)
+    Token.objects.filter(user=user).get().delete()
+    assert token_client.get(reverse("cart")).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_login_warms_token_cache(api_client, user):
+    """ Тест прогрева кеша при получении токена """
+    response = api_client.post(reverse("auth-token"), {"username": "test_user", "password": "testpass1"})
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+
+    assert not any("authtoken_token" in sql for sql in get_cart_queries(api_client))
+
+
+def test_token_cache_lru_and_shared():
+    """ Тест вытеснения из LRU и догрузки из общего кеша """
+    cache = TokenUserCache(maxsize=1, shared_alias="default")
+    cache.set("a", {"id": 1})
+    cache.set("b", {"id": 2})
+
+    assert cache.stats()["size"] == 1
+    assert cache.get("a") == {"id": 1}
+    assert cache.get("missing") is None
+    assert cache.stats()["shared_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    cache.invalidate_user(1)
+    assert cache.get("a") is None
+
+
+def test_token_cache_invalidation_reaches_other_workers():
+    """ Тест: сброс в одном воркере очищает первый уровень другого через поколение в общем кеше """
+    worker, other = TokenUserCache(shared_alias="default"), TokenUserCache(shared_alias="default")
+    other.generation_check_interval = 0
+    worker.set("a", {"id": 1})
+    assert other.get("a") == {"id": 1}
+
+    worker.invalidate_user(1, ["a"])
+    assert other.get("a") is None
+
+
+@pytest.mark.django_db
+def test_snapshot_user_cannot_be_saved(user):
+    """ Тест: неполного пользователя из снимка нельзя сохранить или удалить """
+    snapshot_user = build_user(make_user_snapshot(user))
+
+    with pytest.raises(ValueError):
+        snapshot_user.save()
+    with pytest.raises(ValueError):
+        snapshot_user.delete()
+    user.refresh_from_db()
+    assert user.check_password("testpass1")
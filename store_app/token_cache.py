@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+# Поля пользователя в снимке: достаточно для проверок прав и запросов по user_id
+USER_SNAPSHOT_FIELDS = ("id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+
+
+def make_user_snapshot(user) -> dict:
+    return {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS if hasattr(user, field)}
+
+
+def _prohibit_write(*args, **kwargs):
+    raise ValueError(
+        "Пользователь восстановлен из снимка кеша токенов и содержит не все поля; "
+        "загрузите его из БД (refresh_from_db) перед сохранением"
+    )
+
+
+def build_user(snapshot: dict):
+    """
+    Восстанавливает пользователя из снимка без запроса к БД.
+
+    Снимок содержит только USER_SNAPSHOT_FIELDS, поэтому save() и delete()
+    запрещены: иначе сохранение затерло бы пароль и остальные поля пустыми значениями.
+    """
+    user = get_user_model()(**snapshot)
+    user._state.adding = False
+    user.save = user.delete = _prohibit_write
+    return user
+
+
+class TokenUserCache:
+    """
+    Кеш "ключ токена -> снимок пользователя" для аутентификации без запросов к БД.
+
+    Первый уровень — ограниченный LRU в памяти процесса с ttl, второй
+    (необязательный) — общий кеш Django по алиасу shared_alias, чтобы промах
+    в одном воркере не шел в БД, если токен уже видел другой. Записи
+    сбрасываются сигналами при удалении токена и изменении пользователя.
+    Сброс сдвигает поколение в общем кеше; остальные воркеры сверяют его не
+    чаще раза в generation_check_interval секунд и при смене очищают свой
+    первый уровень. Без общего кеша сброс доходит только до текущего
+    процесса, и устаревание в остальных ограничено ttl.
+    """
+    key_prefix = "auth:token:"
+    generation_key = "auth:token:generation"
+    generation_check_interval = 1.0
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60, shared_alias: str | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked = float("-inf")
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _generation_due(self) -> bool:
+        return time.monotonic() - self._generation_checked >= self.generation_check_interval
+
+    def _apply_generation(self, generation) -> None:
+        """ Очищает первый уровень, если поколение в общем кеше сменилось """
+        with self._lock:
+            self._generation_checked = time.monotonic()
+            if generation != self._generation:
+                self._generation = generation
+                self._entries.clear()
+
+    def _get_local(self, key: str) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            return None
+
+    def _set_local(self, key: str, snapshot: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _record_shared(self, key: str, snapshot: dict | None) -> dict | None:
+        if snapshot is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.shared_hits += 1
+        self._set_local(key, snapshot)
+        return snapshot
+
+    def get(self, key: str) -> dict | None:
+        """ Снимок пользователя по ключу токена; None — промах на обоих уровнях """
+        shared = self.shared
+        if shared is not None and self._generation_due():
+            self._apply_generation(shared.get(self.generation_key))
+        snapshot = self._get_local(key)
+        if snapshot is not None:
+            return snapshot
+        return self._record_shared(key, shared.get(self.key_prefix + key) if shared else None)
+
+    async def aget(self, key: str) -> dict | None:
+        shared = self.shared
+        if shared is not None and self._generation_due():
+            self._apply_generation(await shared.aget(self.generation_key))
+        snapshot = self._get_local(key)
+        if snapshot is not None:
+            return snapshot
+        return self._record_shared(key, await shared.aget(self.key_prefix + key) if shared else None)
+
+    def set(self, key: str, snapshot: dict) -> None:
+        self._set_local(key, snapshot)
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, snapshot, timeout=self.ttl)
+
+    async def aset(self, key: str, snapshot: dict) -> None:
+        self._set_local(key, snapshot)
+        if self.shared is not None:
+            await self.shared.aset(self.key_prefix + key, snapshot, timeout=self.ttl)
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self.shared
+        if shared is not None and keys:
+            shared.delete_many([self.key_prefix + key for key in keys])
+            shared.add(self.generation_key, 0, timeout=None)
+            generation = shared.incr(self.generation_key)
+            # Свои записи уже сброшены выше: новое поколение не должно очищать весь LRU
+            with self._lock:
+                self._generation = generation
+
+    def invalidate_user(self, user_id, keys=()) -> None:
+        """ Сбрасывает все записи пользователя: известные ключи и найденные в LRU """
+        with self._lock:
+            local_keys = [key for key, (expires, snapshot) in self._entries.items() if snapshot.get("id") == user_id]
+        self.invalidate(*set(keys) | set(local_keys))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+            self._generation_checked = float("-inf")
+            self.hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.shared_hits) / requests if requests else 0.0,
+            }
+
+
+token_cache = TokenUserCache(
+    maxsize=getattr(settings, "TOKEN_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "TOKEN_CACHE_TTL", 60),
+    shared_alias=getattr(settings, "TOKEN_CACHE_ALIAS", None),
+)
@@ -1,10 +1,27 @@
 from django.urls import path
 
-from .views import CategoriesView, ProductsView, CartView, AuthTokenView
+from .views import (
+    CategoriesView,
+    ProductsView,
+    ProductSearchView,
+    ProductExportView,
+    CartView,
+    CartBatchView,
+    AuthTokenView,
+    ProductCacheStatsView,
+    TokenCacheStatsView,
+    MetricsView
+)
 
 urlpatterns = [
     path('categories/', CategoriesView.as_view(), name='categories'),
     path('products/', ProductsView.as_view(), name='products'),
+    path('products/search/', ProductSearchView.as_view(), name='products-search'),
+    path('products/export/', ProductExportView.as_view(), name='products-export'),
     path('cart/', CartView.as_view(), name='cart'),
-    path('auth-token/', AuthTokenView.as_view(), name='auth-token')
+    path('cart/batch/', CartBatchView.as_view(), name='cart-batch'),
+    path('auth-token/', AuthTokenView.as_view(), name='auth-token'),
+    path('internal/product-cache/', ProductCacheStatsView.as_view(), name='product-cache-stats'),
+    path('internal/token-cache/', TokenCacheStatsView.as_view(), name='token-cache-stats'),
+    path('internal/metrics/', MetricsView.as_view(), name='metrics')
 ]
\ No newline at end of file
@@ -1,64 +1,259 @@
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
 from rest_framework.generics import ListAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework import status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from .models import Category, Product, Cart, CartProduct
+from .cart_storage import get_cart_storage
+from .models import Category, Product, ProductListing
 from .serializers import (
     CategoriesWithSubcategoriesSerializer,
     ProductSerializer,
     AddToCartSerializer,
-    CartProductSerializer
+    CartProductSerializer,
+    CartProductLineSerializer,
+    CartBatchSerializer,
+    ProductFilterSerializer,
+    ProductSearchSerializer
 )
-from .pagination import CategoryPagination, ProductPagination
+from .cache import get_catalog_cache, get_catalog_version, get_categories_cache_key
+from .product_cache import attach_product_snapshots, product_cache
+from .token_cache import make_user_snapshot, token_cache
+from .instrumentation import InstrumentedViewMixin, request_metrics, timed
+from .export import stream_csv, stream_ndjson
+from .fast_serializers import CategoryTreeFastSerializer, ProductFastSerializer, ProductListingFastSerializer
+from .filters import PRODUCT_SORT_FIELDS, filter_products, get_product_facets
+from .listing import is_listing_enabled
+from .search import get_product_search
+from .pagination import CategoryPagination, ProductPagination, ProductCursorPagination
 
 
-class CategoriesView(ListAPIView):
+class FastListMixin:
+    """
+    Отдает список через быстрый read-only сериализатор (values_list вместо моделей).
+    Пагинация и фильтрация остаются стандартными; fast_serializer_class = None
+    возвращает обычный путь через serializer_class.
+    """
+    fast_serializer_class = None
+
+    def get_fast_serializer_class(self):
+        return self.fast_serializer_class
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        fast_serializer_class = self.get_fast_serializer_class()
+        if fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        fast_serializer = fast_serializer_class(request)
+        queryset = fast_serializer.prepare(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with timed("serialize"):
+                data = fast_serializer.serialize(page)
+            return self.get_paginated_response(data)
+        with timed("serialize"):
+            data = fast_serializer.serialize(queryset)
+        return Response(data)
+
+
+class CategoriesView(InstrumentedViewMixin, FastListMixin, ListAPIView):
     """ Возвращает список категорий с подкатегориями """
     permission_classes = [AllowAny]
     queryset = Category.objects.prefetch_related("subcategories").all()
     serializer_class = CategoriesWithSubcategoriesSerializer
+    fast_serializer_class = CategoryTreeFastSerializer
     pagination_class = CategoryPagination
+    # Оценка числа строк и COUNT (при промахе кеша счетчиков), категории
+    # и подкатегории; при попадании в кеш ответа — ни одного
+    query_budget = {"get": 4}
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Отдает дерево категорий из кеша с версионированием.
+
+        Ключ кеша содержит версию каталога, которая сдвигается сигналами
+        при сохранении/удалении категорий и подкатегорий. ETag и Last-Modified
+        строятся из той же версии, что позволяет клиентам получать 304.
+        """
+        version = get_catalog_version()
+        etag = quote_etag(f"categories-{version}")
+        last_modified = version // 1000
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = get_catalog_cache()
+        cache_key = get_categories_cache_key(version, request.build_absolute_uri())
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, timeout=settings.CATALOG_CACHE_TIMEOUT)
 
+        response = Response(data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
 
-class ProductsView(ListAPIView):
+
+class ProductsView(InstrumentedViewMixin, FastListMixin, ListAPIView):
     """ Возвращает список продуктов с категорией, подкатегорией и изображениями """
     permission_classes = [AllowAny]
     queryset = Product.objects.select_related("subcategory__category")
     serializer_class = ProductSerializer
+    fast_serializer_class = ProductFastSerializer
+    pagination_class = ProductPagination
+    cursor_pagination_class = ProductCursorPagination
+    # Оценка числа строк, COUNT (маленькие выборки при промахе кеша счетчиков)
+    # и страница; фасеты — еще один GROUP BY
+    query_budget = {"get": 4}
+
+    @property
+    def paginator(self):
+        """
+        Постраничная пагинация по умолчанию; keyset-режим включается
+        параметром ?pagination=cursor или наличием ?cursor=
+        """
+        if not hasattr(self, "_paginator"):
+            request = getattr(self, "request", None)
+            params = request.query_params if request is not None else {}
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_filters(self) -> dict:
+        if not hasattr(self, "_filters"):
+            serializer = ProductFilterSerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._filters = serializer.validated_data
+        return self._filters
+
+    def get_queryset(self):
+        """ При PRODUCT_LISTING_ENABLED список читается из ProductListing без JOIN """
+        queryset = ProductListing.objects.all() if is_listing_enabled() else super().get_queryset()
+        return filter_products(queryset, self.get_filters())
+
+    def get_fast_serializer_class(self):
+        return ProductListingFastSerializer if is_listing_enabled() else self.fast_serializer_class
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="category", type=str, description="Slug категории"),
+            OpenApiParameter(name="subcategory", type=str, description="Slug подкатегории"),
+            OpenApiParameter(name="min_price", type=float, description="Минимальная цена"),
+            OpenApiParameter(name="max_price", type=float, description="Максимальная цена"),
+            OpenApiParameter(name="sort", type=str, enum=list(PRODUCT_SORT_FIELDS), description="Сортировка"),
+            OpenApiParameter(name="facets", type=bool, description="Добавить фасеты по подкатегориям и ценам"),
+            OpenApiParameter(name="pagination", type=str, enum=["cursor"], description="Keyset-пагинация"),
+        ]
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """ Список продуктов с фильтрами; при ?facets=true добавляет блок facets """
+        response = super().list(request, *args, **kwargs)
+        if self.get_filters()["facets"]:
+            response.data["facets"] = get_product_facets(self.get_queryset())
+        return response
+
+
+class ProductSearchView(InstrumentedViewMixin, FastListMixin, ListAPIView):
+    """ Поиск продуктов по названию с ранжированием по релевантности """
+    permission_classes = [AllowAny]
+    queryset = Product.objects.select_related("subcategory__category")
+    serializer_class = ProductSerializer
+    fast_serializer_class = ProductFastSerializer
     pagination_class = ProductPagination
+    query_budget = {"get": 3}
+
+    def get_queryset(self):
+        serializer = ProductSearchSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return get_product_search().search(super().get_queryset(), serializer.validated_data["q"])
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="q", type=str, required=True, description="Поисковый запрос"),
+        ]
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        return super().get(request, *args, **kwargs)
+
+
+class ProductExportView(InstrumentedViewMixin, APIView):
+    """ Потоковая выгрузка всего каталога в NDJSON или CSV (для персонала) """
+    permission_classes = [IsAdminUser]
+    chunk_size = 2000
+    formats = {
+        "ndjson": (stream_ndjson, "application/x-ndjson"),
+        "csv": (stream_csv, "text/csv; charset=utf-8"),
+    }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="output",
+                type=str,
+                enum=["ndjson", "csv"],
+                description="Формат выгрузки (по умолчанию ndjson)"
+            ),
+        ],
+        responses={200: None, 400: {"description": "Неизвестный формат"}},
+        description="Выгружает каталог продуктов потоком в формате ProductSerializer"
+    )
+    def get(self, request: Request):
+        output = request.query_params.get("output", "ndjson")
+        if output not in self.formats:
+            return Response(
+                {"error": f"Неизвестный формат: {output}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stream, content_type = self.formats[output]
+        queryset = Product.objects.select_related("subcategory__category").order_by("id")
+        response = StreamingHttpResponse(stream(queryset, self.chunk_size), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="products.{output}"'
+        return response
 
 
-class CartView(APIView):
+class CartView(InstrumentedViewMixin, APIView):
     """ Обрабатывает операции с корзиной: добавление, изменение, удаление товаров """
     permission_classes = [IsAuthenticated]
+    # Строки, снимки продуктов (при промахе кеша) и итоги
+    query_budget = {"get": 3}
+
+    @staticmethod
+    def get_cart_summary(user) -> dict:
+        """ Состав корзины с итогами из текущего хранилища корзин """
+        storage = get_cart_storage()
+        return CartView.build_cart_summary(storage.get_lines(user), storage.get_summary(user))
+
+    @staticmethod
+    def build_cart_summary(lines, summary: dict) -> dict:
+        with timed("serialize"):
+            products = CartProductLineSerializer(lines, many=True).data
+        return {
+            "products": products,
+            "total_quantity": summary["total_quantity"],
+            "total_cost": float(summary["total_cost"])
+        }
 
     def get(self, request: Request) -> Response:
         """ Выводит состав корзины с подсчетом количества товаров и суммы стоимости товаров в корзине """
-        cart, created = Cart.objects.get_or_create(user=request.user)
-
-        cart_product = CartProduct.objects.filter(cart=cart).select_related("product")
-        if not cart_product.exists():
-            return Response({
-                "products": [],
-                "total_quantity": 0,
-                "total_cost": 0
-            })
-
-        products_serializer = CartProductSerializer(cart_product, many=True)
-        total_quantity = sum(product.quantity for product in cart_product)
-        total_cost = sum(product.product.price for product in cart_product)
-        return Response({
-            "products": products_serializer.data,
-            "total_quantity": total_quantity,
-            "total_cost": float(total_cost)
-        })
+        return Response(self.get_cart_summary(request.user))
 
     @extend_schema(
         request={
@@ -82,6 +277,7 @@ class CartView(APIView):
         serializer = AddToCartSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
             product_cart = serializer.save()
+            attach_product_snapshots([product_cart])
             response_serializer = CartProductSerializer(product_cart)
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -108,17 +304,14 @@ class CartView(APIView):
         product_id = request.data.get("product_id")
         quantity = request.data.get("quantity")
 
-        try:
-            cart = Cart.objects.get(user=request.user)
-            product_cart = CartProduct.objects.get(cart=cart, product_id=product_id)
-        except CartProduct.DoesNotExist:
+        product_cart = get_cart_storage().set(request.user, product_id, int(quantity))
+        if product_cart is None:
             return Response(
                 {"error": "Продукт не найден в корзине"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        product_cart.quantity = int(quantity)
-        product_cart.save()
+        attach_product_snapshots([product_cart])
         serializer = CartProductSerializer(product_cart)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -150,10 +343,10 @@ class CartView(APIView):
         clear_all = request.query_params.get("clear", False)
         product_id = request.query_params.get("product_id")
 
-        cart = Cart.objects.get(user=request.user)
+        storage = get_cart_storage()
 
         if clear_all:
-            CartProduct.objects.filter(cart=cart).delete()
+            storage.clear(request.user)
             return Response(
                 {"detail": "Корзина очищена"},
                 status=status.HTTP_200_OK
@@ -167,18 +360,15 @@ class CartView(APIView):
                     {"error": "product_id должен быть целым числом"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            try:
-                product_cart = CartProduct.objects.get(cart=cart, product_id=product_id)
-                product_cart.delete()
+            if storage.remove(request.user, product_id):
                 return Response(
                     {"detail": f"Продукт с ID {product_id} уделен из корзины"},
                     status=status.HTTP_200_OK
                 )
-            except CartProduct.DoesNotExist:
-                return Response(
-                    {"error": "Продукт не найден в корзине"},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            return Response(
+                {"error": "Продукт не найден в корзине"},
+                status=status.HTTP_404_NOT_FOUND
+            )
         else:
             return Response(
                 {"error": "Не указан product_id или параметр clear"},
@@ -186,7 +376,52 @@ class CartView(APIView):
             )
 
 
-class AuthTokenView(ObtainAuthToken):
+class CartBatchView(InstrumentedViewMixin, APIView):
+    """ Пакетно применяет операции add/set/remove к корзине и возвращает ее итог """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=CartBatchSerializer,
+        responses={
+            200: {"description": "Состав корзины с итогами"},
+            400: {"description": "Неверные данные"},
+        },
+        description="Пакетно добавляет, изменяет и удаляет товары в корзине в одной транзакции"
+    )
+    def post(self, request: Request) -> Response:
+        serializer = CartBatchSerializer(data=request.data, context={"request": request})
+        if serializer.is_valid():
+            serializer.save()
+            return Response(CartView.get_cart_summary(request.user), status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProductCacheStatsView(InstrumentedViewMixin, APIView):
+    """ Статистика кеша снимков продуктов текущего процесса (для персонала) """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        return Response(product_cache.stats())
+
+
+class TokenCacheStatsView(InstrumentedViewMixin, APIView):
+    """ Статистика кеша аутентификации по токену текущего процесса (для персонала) """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        return Response(token_cache.stats())
+
+
+class MetricsView(InstrumentedViewMixin, APIView):
+    """ Метрики запросов по вьюхам в текстовом формате Prometheus (для персонала) """
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses={200: {"type": "string"}})
+    def get(self, request: Request) -> HttpResponse:
+        return HttpResponse(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class AuthTokenView(InstrumentedViewMixin, ObtainAuthToken):
     """ Вьюха для получения токена аутентификации """
     def post(self, request: Request, *args, **kwargs) -> Response:
         serializer = self.serializer_class(
@@ -197,4 +432,6 @@ class AuthTokenView(ObtainAuthToken):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
         token, created = Token.objects.get_or_create(user=user)
+        # Прогревает кеш аутентификации: первый запрос с токеном обойдется без запросов к БД
+        token_cache.set(token.key, make_user_snapshot(user))
         return Response({"token": token.key})
\ No newline at end of file